@@ -0,0 +1,102 @@
+"""spendings 집계 파이프라인 모음
+
+리포트/인사이트에서 필요한 카테고리별 합계를 MongoDB 서버에서 계산합니다.
+일별 문서의 items를 펼치지 않고, 저장 시점에 유지되는 `category_totals` 맵
+(rollups 참고)만 $objectToArray로 펼쳐 합산하므로 문서당 몇 개의 키만 읽습니다.
+rollup이 아직 채워지지 않은 예전 문서(category_totals 없음)는 items에서 직접 합산합니다.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+from database import collections
+
+
+def _match(user_id: str, start: str, end: str) -> Dict:
+    return {"$match": {"user_id": user_id, "spent_at": {"$gte": start, "$lte": end}}}
+
+
+# rollup이 없는 문서: items → [{k: 카테고리(없으면 "기타"), v: 금액}] (rollups.item_totals와 같은 기준)
+_ITEM_CATS: Dict = {
+    "$map": {
+        "input": {"$ifNull": ["$items", []]},
+        "as": "it",
+        "in": {
+            "k": {
+                "$cond": [
+                    {"$eq": [{"$ifNull": ["$$it.category", ""]}, ""]},
+                    "기타",
+                    "$$it.category",
+                ]
+            },
+            "v": {"$ifNull": ["$$it.amount", 0]},
+        },
+    }
+}
+
+# 일별 category_totals 맵만 남기고 (카테고리, 금액) 단위로 펼치기
+_CATEGORY_STAGES: List[Dict] = [
+    {
+        "$project": {
+            "_id": 0,
+            "spent_at": 1,
+            "cats": {
+                "$cond": [
+                    {"$eq": [{"$type": "$category_totals"}, "object"]},
+                    {"$objectToArray": "$category_totals"},
+                    _ITEM_CATS,
+                ]
+            },
+        }
+    },
+    {"$unwind": "$cats"},
+]
+
+
+def _category_group() -> List[Dict]:
+    return [{"$group": {"_id": "$cats.k", "total": {"$sum": "$cats.v"}}}]
+
+
+def _to_dict(rows: List[Dict]) -> Dict[str, int]:
+    return {str(r["_id"]): int(r.get("total") or 0) for r in rows if int(r.get("total") or 0) > 0}
+
+
+async def category_totals(user_id: str, start: str, end: str) -> Dict[str, int]:
+    """기간 내 카테고리별 합계"""
+    pipeline = [_match(user_id, start, end), *_CATEGORY_STAGES, *_category_group()]
+    rows = await collections()["spendings"].aggregate(pipeline).to_list(None)
+    return _to_dict(rows)
+
+
+async def category_totals_pair(
+    user_id: str, current: Tuple[str, str], previous: Tuple[str, str]
+) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """두 기간(이번/지난)의 카테고리별 합계를 $facet으로 한 번에 계산"""
+    lo = min(current[0], previous[0])
+    hi = max(current[1], previous[1])
+
+    def _range(s: str, e: str) -> List[Dict]:
+        return [{"$match": {"spent_at": {"$gte": s, "$lte": e}}}, *_category_group()]
+
+    pipeline = [
+        _match(user_id, lo, hi),
+        *_CATEGORY_STAGES,
+        {"$facet": {"current": _range(*current), "previous": _range(*previous)}},
+    ]
+    rows = await collections()["spendings"].aggregate(pipeline).to_list(None)
+    facet = rows[0] if rows else {}
+    return _to_dict(facet.get("current") or []), _to_dict(facet.get("previous") or [])
+
+
+async def top_category(user_id: str, start: str, end: str) -> str | None:
+    """기간 내 금액이 가장 큰 카테고리 (기록이 없으면 None)"""
+    pipeline = [
+        _match(user_id, start, end),
+        *_CATEGORY_STAGES,
+        *_category_group(),
+        {"$match": {"total": {"$gt": 0}}},
+        {"$sort": {"total": -1}},
+        {"$limit": 1},
+    ]
+    rows = await collections()["spendings"].aggregate(pipeline).to_list(1)
+    return str(rows[0]["_id"]) if rows else None
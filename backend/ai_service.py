@@ -9,96 +9,195 @@
 주의
 - OPENAI_API_KEY 가 없거나 호출 실패 시, 간단한 규칙 기반 폴백을 사용합니다.
 - 프롬프트는 한국어로 작성되어 있고, 응답은 JSON을 기대합니다.
+- 모든 호출은 비동기(`*_async`, AsyncOpenAI)로 이벤트 루프를 막지 않습니다.
+  (동시 호출 상한: AI_CONCURRENCY, 기본 8)
+- 여러 항목은 `analyze_items_async`로 AI_BATCH_SIZE(기본 20)개씩 묶어 한 번에 분류합니다.
+- 항목 분류는 키워드 사전(`keyword_classifier`)을 먼저 적용하고, 신뢰도가
+  KEYWORD_CONFIDENCE_THRESHOLD 이상이면 캐시/GPT를 건너뜁니다.
+- 분류 결과는 `classification_cache`(LRU + Mongo)에 저장해 같은 메모는 재사용합니다.
+- GPT 호출은 `llm_guard`의 서킷 브레이커/요청 마감 시간을 거칩니다.
+  (장애·지연 시 바로 폴백, 라우터에서 `llm_deadline(초)`로 AI에 쓸 시간 제한)
+- 같은 프롬프트의 GPT 응답은 `gpt_cache`(종류별 opt-in, LRU + Mongo TTL, single-flight)로 재사용합니다.
 """
 from __future__ import annotations
 
+import asyncio
 import json
 import os
-from typing import Dict, List
+import time
+from typing import AsyncIterator, Dict, List
 
-from openai import OpenAI
+from openai import APITimeoutError, AsyncOpenAI
+
+import classification_cache
+import gpt_cache
+import keyword_classifier
+import llm_guard
 
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-client: OpenAI | None = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+_CLIENT_OPTS = {"timeout": llm_guard.LLM_TIMEOUT_SEC, "max_retries": llm_guard.LLM_MAX_RETRIES}
+# 라우터/워커(이벤트 루프) 안에서 쓰는 비동기 클라이언트 (동기 경로는 없음)
+aclient: AsyncOpenAI | None = AsyncOpenAI(api_key=OPENAI_API_KEY, **_CLIENT_OPTS) if OPENAI_API_KEY else None
+
+GPT_MODEL = "gpt-4o-mini"
+GPT_TEMPERATURE = 0.6
+
+# 벌크 분류 시 동시에 보낼 GPT 요청 수 상한
+AI_CONCURRENCY = int(os.getenv("AI_CONCURRENCY", "8"))
+# 배치 분류 시 한 번의 GPT 요청에 담을 항목 수
+AI_BATCH_SIZE = int(os.getenv("AI_BATCH_SIZE", "20"))
+
+
+def _gpt_messages(system_prompt: str, user_prompt: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+def _is_timeout(e: Exception) -> bool:
+    return isinstance(e, (asyncio.TimeoutError, TimeoutError, APITimeoutError))
 
 
-def _call_gpt(system_prompt: str, user_prompt: str, max_tokens: int = 400) -> str:
-    """GPT 호출 래퍼 (에러 시 빈 문자열 반환)"""
-    if client is None:
+class StreamInterrupted(Exception):
+    """스트리밍 응답이 조각 일부를 보낸 뒤 끊김 (이미 보낸 조각은 버리고 폴백을 써야 함)"""
+
+
+def _record_result(
+    ok: bool, started: float, timeout: float, error: Exception | None = None, ended: float | None = None
+) -> None:
+    # ended: 느린 호출 판단 기준 시각 (스트리밍은 첫 조각을 받은 시각)
+    elapsed = (ended if ended is not None else time.monotonic()) - started
+    if error is not None and _is_timeout(error) and llm_guard.under_deadline(timeout):
+        # 요청 마감 때문에 끊긴 것: OpenAI 장애로 보지 않음
+        llm_guard.breaker.release()
+        return
+    llm_guard.breaker.record(ok, elapsed)
+
+
+async def _request_gpt_async(system_prompt: str, user_prompt: str, max_tokens: int) -> str:
+    if aclient is None:
         return ""
+    timeout = llm_guard.call_timeout()
+    if timeout is None or not llm_guard.breaker.allow():
+        return ""
+    started = time.monotonic()
     try:
-        res = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.6,
-            max_tokens=max_tokens,
+        res = await asyncio.wait_for(
+            aclient.chat.completions.create(
+                model=GPT_MODEL,
+                messages=_gpt_messages(system_prompt, user_prompt),
+                temperature=GPT_TEMPERATURE,
+                max_tokens=max_tokens,
+                timeout=timeout,
+            ),
+            timeout=timeout,
         )
-        return (res.choices[0].message.content or "").strip()
+    except asyncio.CancelledError:
+        llm_guard.breaker.release()
+        raise
     except Exception as e:  # pragma: no cover - 환경 의존
-        print(f"[AI ERROR] {e}")
+        _record_result(False, started, timeout, e)
+        print(f"[AI ERROR] {e!r}")
         return ""
+    _record_result(True, started, timeout)
+    return (res.choices[0].message.content or "").strip()
 
 
-def _heuristic_category_and_tags(memo: str, amount: int) -> tuple[str, List[str], float]:
-    """간단한 규칙 기반 카테고리/태그 추정 (AI 폴백용)"""
-    m = memo.lower()
-    category = "기타"
-    tags: List[str] = []
-
-    if any(k in m for k in ["택시", "버스", "지하철", "교통", "uber", "kakaot"]):
-        category = "시간절약형"
-        tags.append("교통")
-    elif any(k in m for k in ["커피", "카페", "라떼", "스타벅스"]):
-        category = "보상형"
-        tags.append("간식")
-    elif any(k in m for k in ["배달", "요기요", "배민", "배달의민족"]):
-        category = "시간절약형"
-        tags.append("배달")
-    elif any(k in m for k in ["점심", "저녁", "식사", "한식", "분식", "라면"]):
-        category = "생활필수형"
-        tags.append("식비")
-    elif any(k in m for k in ["책", "강의", "인강", "토익", "토플"]):
-        category = "자기계발형"
-        tags.append("투자")
-    elif any(k in m for k in ["술", "맥주", "소주", "회식", "모임"]):
-        category = "사교형"
-        tags.append("모임")
-
-    if amount >= 50000:
-        tags.append("고가")
-
-    # 중복 제거
-    tags = list(dict.fromkeys(tags))
-    confidence = 0.6 if category == "기타" else 0.8
-    return category, tags, confidence
-
-
-def analyze_item(memo: str, amount: int) -> Dict:
-    """단일 소비 항목에 대한 AI 기반 분류 결과 반환
-
-    반환 예: {"category": "시간절약형", "tags": ["교통"], "confidence": 0.83}
+async def _stream_gpt(system_prompt: str, user_prompt: str, max_tokens: int) -> AsyncIterator[str]:
+    """OpenAI 스트리밍 API로 응답 조각을 순서대로 yield
+
+    - 첫 조각 전에 실패하면 아무것도 yield하지 않고 종료 (호출한 쪽이 폴백)
+    - 조각을 보낸 뒤 끊기면 StreamInterrupted
+    요청 마감은 첫 응답까지의 대기에만 적용하고, 이후 조각은 LLM_TIMEOUT_SEC 안에서 계속 받습니다.
+    서킷 브레이커의 느린 호출 판단에는 첫 조각까지 걸린 시간을 씁니다.
     """
-    system_prompt = (
-        "너는 소비 내역을 의미 기반으로 분류하는 한국어 데이터 분석 어시스턴트야. "
-        "항상 JSON으로만 응답해야 해."
+    if aclient is None:
+        return
+    timeout = llm_guard.call_timeout()
+    if timeout is None or not llm_guard.breaker.allow():
+        return
+    started = time.monotonic()
+    first_at: float | None = None
+    try:
+        stream = await asyncio.wait_for(
+            aclient.chat.completions.create(
+                model=GPT_MODEL,
+                messages=_gpt_messages(system_prompt, user_prompt),
+                temperature=GPT_TEMPERATURE,
+                max_tokens=max_tokens,
+                stream=True,
+                timeout=llm_guard.LLM_TIMEOUT_SEC,
+            ),
+            timeout=timeout,
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if first_at is None:
+                    first_at = time.monotonic()
+                yield chunk.choices[0].delta.content
+    except (asyncio.CancelledError, GeneratorExit):
+        # 클라이언트가 연결을 끊음
+        llm_guard.breaker.release()
+        raise
+    except Exception as e:
+        _record_result(False, started, timeout, e)
+        print(f"[AI ERROR] stream: {e!r}")
+        if first_at is not None:
+            raise StreamInterrupted(str(e)) from e
+        return
+    _record_result(True, started, timeout, ended=first_at)
+
+
+async def _stream_cached(
+    system_prompt: str, user_prompt: str, max_tokens: int, cache: str
+) -> AsyncIterator[str]:
+    """캐시에 있으면 한 번에, 없으면 스트리밍하고 끝난 뒤 전체 응답을 캐시에 저장
+    (중간에 끊기면 StreamInterrupted가 그대로 올라가고 저장하지 않음)"""
+    key = _gpt_cache_key(system_prompt, user_prompt, max_tokens)
+    hit = await gpt_cache.lookup(cache, key)
+    if hit is not None:
+        yield hit
+        return
+    parts: List[str] = []
+    async for piece in _stream_gpt(system_prompt, user_prompt, max_tokens):
+        parts.append(piece)
+        yield piece
+    await gpt_cache.store(cache, key, "".join(parts).strip())
+
+
+def _gpt_cache_key(system_prompt: str, user_prompt: str, max_tokens: int) -> str:
+    return gpt_cache.cache_key(GPT_MODEL, system_prompt, user_prompt, GPT_TEMPERATURE, max_tokens)
+
+
+async def _call_gpt_async(
+    system_prompt: str, user_prompt: str, max_tokens: int = 400, cache: str | None = None
+) -> str:
+    """GPT 호출 래퍼 (이벤트 루프를 막지 않음, 에러 시 빈 문자열)
+
+    cache: 프롬프트 종류 (gpt_cache.CACHE_POLICIES). 주면 같은 프롬프트 응답을 재사용하고,
+    동시에 들어온 같은 프롬프트는 GPT 호출 하나를 공유합니다.
+    """
+    key = _gpt_cache_key(system_prompt, user_prompt, max_tokens) if cache else ""
+    return await gpt_cache.cached_call(
+        cache, key, lambda: _request_gpt_async(system_prompt, user_prompt, max_tokens)
     )
-    user_prompt = f"""
-다음 소비 항목을 보고, 실제로 어떤 지출(무엇을 위해 쓴 돈)인지와 
-그 소비의 성격(왜 썼는지)을 분석해 주세요.
 
-항목: {memo}
-금액: {amount}원
 
-항상 JSON 형식으로 응답해야 합니다:
-{{"category": "식비", "tags": ["필수"], "confidence": 0.87}}
+def _heuristic_category_and_tags(memo: str, amount: int) -> tuple[str, List[str], float]:
+    """키워드 사전 기반 카테고리/태그 추정 (AI 폴백 및 GPT 생략 판단용)"""
+    match = keyword_classifier.classify(memo, amount)
+    return match.category, match.tags, match.confidence
 
----
 
-카테고리(category): 
+_ITEM_SYSTEM_PROMPT = (
+    "너는 소비 내역을 의미 기반으로 분류하는 한국어 데이터 분석 어시스턴트야. "
+    "항상 JSON으로만 응답해야 해."
+)
+
+# 단일/배치 분류 프롬프트가 공유하는 카테고리·태그 기준
+_ITEM_GUIDE = """카테고리(category): 
 - 실질적으로 무엇에 쓴 돈인지 설명합니다. 
 - 아래 예시들은 참고용이며, 이 예시들 외에도 설명 가능합니다. 
 [식비, 교통, 주거, 통신, 쇼핑, 여가, 여행, 교육, 건강, 금융, 반려동물, 문화, 기타]
@@ -109,40 +208,240 @@ def analyze_item(memo: str, amount: int) -> Dict:
 - 각 소비에 가장 적절한 동기나 성향을 정해주세요.
 - 아래 예시들은 참고용이며, 이 예시들 외에도 설명 가능합니다. 
 [필수, 효율, 즐거움, 관계, 자기계발, 충동, 관리, 낭비]
-- 2개까지 선택 가능. (일반적으로는 1개)
+- 2개까지 선택 가능. (일반적으로는 1개)"""
+
+
+def _item_prompts(memo: str, amount: int) -> tuple[str, str]:
+    """단일 항목 분류용 (system, user) 프롬프트"""
+    user_prompt = f"""
+다음 소비 항목을 보고, 실제로 어떤 지출(무엇을 위해 쓴 돈)인지와 
+그 소비의 성격(왜 썼는지)을 분석해 주세요.
+
+항목: {memo}
+금액: {amount}원
+
+항상 JSON 형식으로 응답해야 합니다:
+{{"category": "식비", "tags": ["필수"], "confidence": 0.87}}
+
+---
+
+{_ITEM_GUIDE}
 
 ---
 
 항상 category와 tags를 모두 포함한 JSON으로만 응답하세요.
 명확한 기준이 없더라도, 가장 가능성이 높은 분류를 자신 있게 선택하세요.
 """
+    return _ITEM_SYSTEM_PROMPT, user_prompt
+
+
+def _batch_prompts(items: List[tuple[str, int]]) -> tuple[str, str]:
+    """여러 항목을 한 번에 분류하는 (system, user) 프롬프트 (index로 결과 매칭)"""
+    lines = "\n".join(f"{i}. 항목: {memo} / 금액: {amount}원" for i, (memo, amount) in enumerate(items))
+    user_prompt = f"""
+다음 소비 항목들을 각각 보고, 실제로 어떤 지출(무엇을 위해 쓴 돈)인지와 
+그 소비의 성격(왜 썼는지)을 분석해 주세요.
+
+{lines}
+
+항상 아래와 같은 JSON 배열로만 응답해야 합니다. (항목마다 하나씩, index는 위 번호)
+[{{"index": 0, "category": "식비", "tags": ["필수"], "confidence": 0.87}}]
+
+---
+
+{_ITEM_GUIDE}
+
+---
+
+모든 index에 대해 category와 tags를 빠짐없이 포함하세요.
+명확한 기준이 없더라도, 가장 가능성이 높은 분류를 자신 있게 선택하세요.
+"""
+    return _ITEM_SYSTEM_PROMPT, user_prompt
+
+
+def _validate_item_result(data: Dict) -> Dict | None:
+    """GPT가 돌려준 항목 하나를 검증해 분류 결과로 변환 (형식이 틀리면 None)"""
+    if not isinstance(data, dict):
+        return None
+    category = data.get("category")
+    if not category:
+        return None
+    tags = data.get("tags") or []
+    if not isinstance(tags, list):
+        tags = []
+    try:
+        confidence = float(data.get("confidence", 0.8))
+    except (TypeError, ValueError):
+        confidence = 0.8
+    return {"category": str(category), "tags": tags, "confidence": confidence}
+
 
+def _heuristic_result(memo: str, amount: int) -> Dict:
+    cat, tags, conf = _heuristic_category_and_tags(memo, amount)
+    return {"category": cat, "tags": tags, "confidence": conf}
 
 
-    content = _call_gpt(system_prompt, user_prompt, max_tokens=180)
+def _parse_item_result(content: str) -> Dict | None:
+    """GPT 응답(JSON)을 분류 결과로 변환 (실패 시 None → 호출부에서 폴백)"""
     if content:
         try:
-            data = json.loads(content)
-            category = data.get("category")
-            tags = data.get("tags") or []
-            if not isinstance(tags, list):
-                tags = []
-            confidence = float(data.get("confidence", 0.8))
-            if category:
-                return {"category": str(category), "tags": tags, "confidence": confidence}
+            return _validate_item_result(json.loads(content))
         except Exception:
             # JSON 파싱 실패 시 폴백
             pass
+    return None
 
-    cat, tags, conf = _heuristic_category_and_tags(memo, amount)
-    return {"category": cat, "tags": tags, "confidence": conf}
 
+def _parse_batch_result(content: str, n: int) -> Dict[int, Dict]:
+    """배치 응답(JSON 배열)을 {index: 결과}로 변환
 
-def generate_daily_comment(items: List[Dict]) -> str:
-    """일간 코멘트 생성"""
-    if not items:
-        return "오늘 기록이 없어요. 오늘 한 건부터 가볍게 적어볼까요?"
+    - 0..n-1 범위의 index만 받고, 누락/형식 오류 항목은 빠진 채로 반환
+    """
+    by_index: Dict[int, Dict] = {}
+    if content:
+        try:
+            data = json.loads(content)
+            if isinstance(data, dict):
+                # {"results": [...]} 처럼 감싸서 오는 경우도 허용
+                data = next((v for v in data.values() if isinstance(v, list)), [])
+            for entry in data if isinstance(data, list) else []:
+                if not isinstance(entry, dict):
+                    continue
+                try:
+                    idx = int(entry.get("index"))
+                except (TypeError, ValueError):
+                    continue
+                result = _validate_item_result(entry)
+                if result and 0 <= idx < n and idx not in by_index:
+                    by_index[idx] = result
+        except Exception:
+            # JSON 파싱 실패 시 전체 폴백
+            pass
+    return by_index
 
+
+def _confident_keyword_result(memo: str, amount: int) -> Dict | None:
+    """키워드 분류 신뢰도가 임계값 이상이면 그 결과, 아니면 None"""
+    match = keyword_classifier.classify(memo, amount)
+    if not keyword_classifier.is_confident(match):
+        return None
+    return {"category": match.category, "tags": match.tags, "confidence": match.confidence}
+
+
+async def analyze_item_async(memo: str, amount: int) -> Dict:
+    """단일 소비 항목에 대한 AI 기반 분류 결과 반환 (키워드 → LRU → Mongo 캐시 → GPT 순)
+
+    반환 예: {"category": "교통", "tags": ["필수"], "confidence": 0.83}
+    """
+    confident = _confident_keyword_result(memo, amount)
+    if confident is not None:
+        return confident
+
+    key = classification_cache.cache_key(memo, amount)
+    cached = await classification_cache.get_many([key])
+    if key in cached:
+        return cached[key]
+
+    system_prompt, user_prompt = _item_prompts(memo, amount)
+    result = _parse_item_result(await _call_gpt_async(system_prompt, user_prompt, max_tokens=180, cache="classify"))
+    if result is None:
+        return _heuristic_result(memo, amount)
+    await classification_cache.put_many({key: result})
+    return result
+
+
+def _batch_max_tokens(n: int) -> int:
+    return 40 + 60 * n
+
+
+def _chunks(items: List, size: int) -> List[List]:
+    size = max(1, size)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _unique_misses(
+    items: List[tuple[str, int]], keys: List[str], found: Dict[str, Dict]
+) -> List[tuple[str, tuple[str, int]]]:
+    """캐시에 없는 항목을 키 기준으로 중복 제거해 [(key, (memo, amount))]로 반환"""
+    misses: Dict[str, tuple[str, int]] = {}
+    for key, item in zip(keys, items):
+        if key not in found and key not in misses:
+            misses[key] = item
+    return list(misses.items())
+
+
+def _merge_results(
+    items: List[tuple[str, int]], keys: List[str], found: Dict[str, Dict]
+) -> List[Dict]:
+    """입력 순서대로 결과를 구성, 끝내 결과가 없는 항목은 규칙 기반 폴백"""
+    return [
+        classification_cache.copy_result(found[key]) if key in found else _heuristic_result(memo, amount)
+        for key, (memo, amount) in zip(keys, items)
+    ]
+
+
+def _split_keyword_confident(
+    items: List[tuple[str, int]],
+) -> tuple[List[Dict | None], List[int]]:
+    """키워드만으로 확정되는 항목과 GPT가 필요한 항목(index 목록)으로 나눔"""
+    results = [_confident_keyword_result(m, a) for m, a in items]
+    pending = [i for i, r in enumerate(results) if r is None]
+    return results, pending
+
+
+async def analyze_items_async(
+    items: List[tuple[str, int]],
+    batch_size: int | None = None,
+    concurrency: int | None = None,
+) -> List[Dict]:
+    """여러 (memo, amount)를 batch_size개씩 묶어 한 번의 GPT 요청으로 분류
+
+    - 키워드 신뢰도가 충분한 항목은 GPT 없이 바로 확정
+    - 나머지는 LRU → Mongo 캐시를 먼저 조회하고, 미스만 GPT로 보낸 뒤 캐시에 채운다.
+    - 배치들은 동시에 요청하고(상한: AI_CONCURRENCY) 입력 순서대로 합친다.
+    - 결과는 입력 순서대로 반환, 누락된 항목은 규칙 기반 폴백 (batch_size 기본값: AI_BATCH_SIZE)
+    """
+    results, pending = _split_keyword_confident(items)
+    if pending:
+        llm = await _analyze_items_llm_async([items[i] for i in pending], batch_size, concurrency)
+        for i, r in zip(pending, llm):
+            results[i] = r
+    return results
+
+
+async def _analyze_items_llm_async(
+    items: List[tuple[str, int]],
+    batch_size: int | None = None,
+    concurrency: int | None = None,
+) -> List[Dict]:
+    keys = [classification_cache.cache_key(m, a) for m, a in items]
+    found = await classification_cache.get_many(keys)
+    misses = _unique_misses(items, keys, found)
+
+    sem = asyncio.Semaphore(max(1, concurrency or AI_CONCURRENCY))
+
+    async def _one(chunk: List[tuple[str, tuple[str, int]]]) -> Dict[str, Dict]:
+        batch = [item for _, item in chunk]
+        async with sem:
+            system_prompt, user_prompt = _batch_prompts(batch)
+            content = await _call_gpt_async(
+                system_prompt, user_prompt, max_tokens=_batch_max_tokens(len(batch)), cache="classify"
+            )
+        return {chunk[idx][0]: r for idx, r in _parse_batch_result(content, len(batch)).items()}
+
+    fresh: Dict[str, Dict] = {}
+    for part in await asyncio.gather(*(_one(c) for c in _chunks(misses, batch_size or AI_BATCH_SIZE))):
+        fresh.update(part)
+    await classification_cache.put_many(fresh)
+    found.update(fresh)
+    return _merge_results(items, keys, found)
+
+
+_EMPTY_DAILY_COMMENT = "오늘 기록이 없어요. 오늘 한 건부터 가볍게 적어볼까요?"
+
+
+def _daily_prompts(items: List[Dict]) -> tuple[str, str, str]:
+    """일간 코멘트용 (system, user, 폴백 문장)"""
     total = sum(int(i.get("amount", 0)) for i in items)
     memos = ", ".join(i.get("memo", "") for i in items[:10])
 
@@ -166,32 +465,34 @@ def generate_daily_comment(items: List[Dict]) -> str:
 - 두 번째 문장은 내일을 위한 구체적 제안
 """
 
-    content = _call_gpt(system_prompt, user_prompt, max_tokens=200)
-    if content:
-        return content
-
     if top_tag:
-        return f"오늘은 {top_tag} 관련 지출 비중이 높았어요. 한 번은 대중교통이나 대체 옵션을 시도해보는 건 어떨까요?"
-    return "오늘 지출이 소액으로 분산되었어요. 불필요한 간식이나 이동 한 번만 줄여보는 걸 추천드립니다."
+        fallback = f"오늘은 {top_tag} 관련 지출 비중이 높았어요. 한 번은 대중교통이나 대체 옵션을 시도해보는 건 어떨까요?"
+    else:
+        fallback = "오늘 지출이 소액으로 분산되었어요. 불필요한 간식이나 이동 한 번만 줄여보는 걸 추천드립니다."
+    return system_prompt, user_prompt, fallback
+
 
+async def generate_daily_comment_async(items: List[Dict]) -> str:
+    """하루 소비 항목 → 일간 코멘트 (AI 실패 시 규칙 기반 문장)"""
+    if not items:
+        return _EMPTY_DAILY_COMMENT
 
-def generate_weekly_comment(summary: Dict) -> str:
-    """주간 SpendWallet Insight 문장 생성.
+    system_prompt, user_prompt, fallback = _daily_prompts(items)
+    content = await _call_gpt_async(system_prompt, user_prompt, max_tokens=200, cache="daily")
+    return content or fallback
 
-    summary 예:
-    {"week": "2025-W47", "totals": {...}, "deltas": {...}}
-    """
-    totals: Dict[str, int] = summary.get("totals", {}) or {}
-    deltas: Dict[str, float] = summary.get("deltas", {}) or {}
-    week = summary.get("week", "")
 
-    if not totals:
-        return "이번 주에는 소비 기록이 거의 없었어요. 한 건부터 가볍게 적어보면 어떨까요? 😊"
+_EMPTY_WEEKLY_COMMENT = "이번 주에는 소비 기록이 거의 없었어요. 한 건부터 가볍게 적어보면 어떨까요? 😊"
+# AI 호출 실패/생략 시 폴백 문장 (라우터는 이 값이면 다음 조회 때 다시 생성)
+WEEKLY_FALLBACK_COMMENT = "이번 주에는 한두 개 카테고리에 소비가 집중된 모습이에요. 주요 지출을 한 번만 줄여도 다음 주 지갑이 훨씬 가벼워질 거예요. 🌿"
 
+
+def _weekly_prompts(summary: Dict) -> tuple[str, str]:
+    """주간 코멘트용 (system, user)"""
     weekly_summary = {
-        "week": week,
-        "totals": totals,
-        "deltas": deltas,
+        "week": summary.get("week", ""),
+        "totals": summary.get("totals", {}) or {},
+        "deltas": summary.get("deltas", {}) or {},
     }
 
     system_prompt = (
@@ -220,40 +521,65 @@ def generate_weekly_comment(summary: Dict) -> str:
 결과는 아래 형식의 문자열로만 출력하세요:
 "문장1\n문장2\n문장3"
 """
+    return system_prompt, user_prompt
 
-    content = _call_gpt(system_prompt, user_prompt, max_tokens=260)
-    if content:
-        return content
 
-    # 폴백 문장
-    return "이번 주에는 한두 개 카테고리에 소비가 집중된 모습이에요. 주요 지출을 한 번만 줄여도 다음 주 지갑이 훨씬 가벼워질 거예요. 🌿"
+async def generate_weekly_comment_async(summary: Dict) -> str:
+    """카테고리 합계/증감 → 주간 코멘트 (AI 실패 시 WEEKLY_FALLBACK_COMMENT)"""
+    if not (summary.get("totals") or {}):
+        return _EMPTY_WEEKLY_COMMENT
+
+    system_prompt, user_prompt = _weekly_prompts(summary)
+    content = await _call_gpt_async(system_prompt, user_prompt, max_tokens=260, cache="weekly")
+    return content or WEEKLY_FALLBACK_COMMENT
 
 
-def generate_monthly_profile(aggregate: Dict) -> Dict:
-    """월간 소비자 리포트 (재미있는 유형/요약/조언 포함)
+async def stream_weekly_comment(summary: Dict) -> AsyncIterator[str]:
+    """주간 코멘트를 생성되는 대로 조각 단위로 yield (AI 실패 시 폴백 문장 한 번)
 
-    프롬프트는 summary/persona/advice 구조를 사용하지만,
-    이 함수는 라우터에서 기대하는 필드(type/label/rationale/advice)까지
-    함께 구성해서 반환한다.
+    조각을 보낸 뒤 끊기면 StreamInterrupted (호출한 쪽이 WEEKLY_FALLBACK_COMMENT로 대체)
     """
+    if not (summary.get("totals") or {}):
+        yield _EMPTY_WEEKLY_COMMENT
+        return
+
+    system_prompt, user_prompt = _weekly_prompts(summary)
+    got = False
+    async for piece in _stream_cached(system_prompt, user_prompt, 260, "weekly"):
+        got = True
+        yield piece
+    if not got:
+        yield WEEKLY_FALLBACK_COMMENT
+
+
+def _profile(summary: str, persona: str, advice: str, fallback: bool = False) -> Dict:
+    """라우터에서 기대하는 필드(type/label/rationale/advice)까지 채운 월간 프로필"""
+    prof = {
+        "type": persona,
+        "label": persona,
+        "rationale": summary,
+        "advice": advice,
+        "summary": summary,
+        "persona": persona,
+    }
+    if fallback:
+        prof["fallback"] = True
+    return prof
+
+
+def _monthly_empty(aggregate: Dict) -> Dict | None:
+    if aggregate.get("totals") or aggregate.get("tags"):
+        return None
+    return _profile(
+        "이번 달에는 소비 기록이 거의 없었어요. 절약왕 등극 👑",
+        "절약형 소비자",
+        "지금처럼 잘 아껴쓰되, 자신에게 선물 하나쯤은 괜찮아요 🎁",
+    )
 
-    totals: Dict[str, int] = aggregate.get("totals", {}) or {}
-    tag_ratio: Dict[str, float] = aggregate.get("tags", {}) or {}
-    month = aggregate.get("month", "")
-
-    if not totals and not tag_ratio:
-        summary = "이번 달에는 소비 기록이 거의 없었어요. 절약왕 등극 👑"
-        persona = "절약형 소비자"
-        advice = "지금처럼 잘 아껴쓰되, 자신에게 선물 하나쯤은 괜찮아요 🎁"
-        return {
-            "type": persona,
-            "label": persona,
-            "rationale": summary,
-            "advice": advice,
-            "summary": summary,
-            "persona": persona,
-        }
 
+def _monthly_prompts(aggregate: Dict) -> tuple[str, str]:
+    """월간 프로필용 (system, user)"""
+    totals: Dict[str, int] = aggregate.get("totals", {}) or {}
     total_amt = sum(totals.values())
     detail = "\n".join([f"- {k}: {v}원" for k, v in totals.items()])
 
@@ -304,34 +630,57 @@ def generate_monthly_profile(aggregate: Dict) -> Dict:
   "advice": "다음 달엔 카드 대신 산책으로 리프레시해보세요 🌿"
 }}
 """
+    return system_prompt, user_prompt
+
 
-    content = _call_gpt(system_prompt, user_prompt, max_tokens=400)
+def _parse_monthly_profile(content: str) -> Dict:
+    """GPT 응답(JSON) → 월간 프로필. 비었거나 파싱 실패 시 폴백(fallback=True)"""
     if content:
         try:
             data = json.loads(content)
-            summary = data.get("summary") or "이번 달엔 다양한 소비 패턴이 섞여 있었어요 🎨"
-            persona = data.get("persona") or "혼합형 소비자"
-            advice = data.get("advice") or "다음 달엔 ‘지출보다 휴식’을 목표로 해보세요 ☕"
-            return {
-                "type": persona,
-                "label": persona,
-                "rationale": summary,
-                "advice": advice,
-                "summary": summary,
-                "persona": persona,
-            }
+            return _profile(
+                data.get("summary") or "이번 달엔 다양한 소비 패턴이 섞여 있었어요 🎨",
+                data.get("persona") or "혼합형 소비자",
+                data.get("advice") or "다음 달엔 ‘지출보다 휴식’을 목표로 해보세요 ☕",
+            )
         except Exception:
             # JSON 파싱 실패 시 폴백
             pass
 
-    summary = "이번 달엔 편의 중심의 소비가 많았어요 😌"
-    persona = "귀찮음형 소비자"
-    advice = "다음 달엔 귀찮음을 조금만 이겨내면, 지갑이 행복해질 거예요 💸"
-    return {
-        "type": persona,
-        "label": persona,
-        "rationale": summary,
-        "advice": advice,
-        "summary": summary,
-        "persona": persona,
-    }
+    return _profile(
+        "이번 달엔 편의 중심의 소비가 많았어요 😌",
+        "귀찮음형 소비자",
+        "다음 달엔 귀찮음을 조금만 이겨내면, 지갑이 행복해질 거예요 💸",
+        fallback=True,
+    )
+
+
+async def generate_monthly_profile_async(aggregate: Dict) -> Dict:
+    """월간 집계 → 소비자 유형 프로필 (AI 대신 폴백을 쓴 경우 fallback=True)"""
+    empty = _monthly_empty(aggregate)
+    if empty is not None:
+        return empty
+
+    system_prompt, user_prompt = _monthly_prompts(aggregate)
+    content = await _call_gpt_async(system_prompt, user_prompt, max_tokens=400, cache="monthly")
+    return _parse_monthly_profile(content)
+
+
+async def stream_monthly_profile(aggregate: Dict) -> AsyncIterator[str]:
+    """월간 프로필 GPT 응답(JSON 텍스트)을 생성되는 대로 yield
+
+    완성된 텍스트는 `_parse_monthly_profile`로 프로필 dict로 바꿉니다.
+    기록이 없으면 아무것도 yield하지 않습니다 (`_monthly_empty` 사용).
+    조각을 보낸 뒤 끊기면 StreamInterrupted (호출한 쪽이 빈 텍스트로 폴백 프로필 사용)
+    """
+    if _monthly_empty(aggregate) is not None:
+        return
+    system_prompt, user_prompt = _monthly_prompts(aggregate)
+    async for piece in _stream_cached(system_prompt, user_prompt, 400, "monthly"):
+        yield piece
+
+
+def monthly_profile_from_text(aggregate: Dict, content: str) -> Dict:
+    """`stream_monthly_profile`로 받은 전체 텍스트 → 월간 프로필"""
+    empty = _monthly_empty(aggregate)
+    return empty if empty is not None else _parse_monthly_profile(content)
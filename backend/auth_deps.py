@@ -0,0 +1,120 @@
+"""인증 의존성 (FastAPI Depends)
+
+`Authorization: Bearer <token>` 을 검증하고 호출한 사용자를 돌려줍니다.
+요청마다 jwt.decode + users.find_one 을 하지 않도록 두 단계로 캐시합니다.
+
+- 토큰 → 디코딩된 claims: 크기 제한 LRU (AUTH_TOKEN_CACHE_SIZE, 기본 4096), 토큰 exp까지만 유효
+- user_id → 사용자 문서: 짧은 TTL 캐시 (AUTH_USER_TTL_SEC, 기본 30초)
+  프로필 수정 시 `invalidate_user`로 바로 비움. 삭제된 사용자는 TTL 안에 차단됨
+
+기존 API의 user_id 쿼리/바디는 호환을 위해 남겨두되, 토큰의 사용자와 다르면 403입니다.
+"""
+from __future__ import annotations
+
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import jwt
+from bson import ObjectId
+from fastapi import Header, HTTPException
+
+from database import collections
+from routers.auth import JWT_SECRET
+
+
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "4096"))
+AUTH_USER_TTL_SEC = float(os.getenv("AUTH_USER_TTL_SEC", "30"))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "4096"))
+
+
+class CurrentUser(NamedTuple):
+    id: str
+    email: Optional[str]
+    display_name: Optional[str]
+
+
+# token → claims
+_claims: "OrderedDict[str, Dict]" = OrderedDict()
+# user_id → (만료 시각, CurrentUser | None)
+_users: "OrderedDict[str, Tuple[float, Optional[CurrentUser]]]" = OrderedDict()
+_stats: Dict[str, int] = {"token_hits": 0, "token_misses": 0, "user_hits": 0, "user_misses": 0}
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(status_code=401, detail=detail, headers={"WWW-Authenticate": "Bearer"})
+
+
+def _decode(token: str) -> Dict:
+    claims = _claims.get(token)
+    if claims is not None:
+        if claims.get("exp", 0) > time.time():
+            _claims.move_to_end(token)
+            _stats["token_hits"] += 1
+            return claims
+        _claims.pop(token, None)
+
+    _stats["token_misses"] += 1
+    try:
+        claims = jwt.decode(token, JWT_SECRET, algorithms=["HS256"], options={"require": ["exp", "sub"]})
+    except jwt.ExpiredSignatureError:
+        raise _unauthorized("Token expired")
+    except jwt.InvalidTokenError:
+        raise _unauthorized("Invalid token")
+
+    _claims[token] = claims
+    if len(_claims) > AUTH_TOKEN_CACHE_SIZE:
+        _claims.popitem(last=False)
+    return claims
+
+
+async def _load_user(user_id: str) -> Optional[CurrentUser]:
+    now = time.monotonic()
+    cached = _users.get(user_id)
+    if cached is not None and cached[0] > now:
+        _users.move_to_end(user_id)
+        _stats["user_hits"] += 1
+        return cached[1]
+
+    _stats["user_misses"] += 1
+    try:
+        oid = ObjectId(user_id)
+    except Exception:
+        return None
+    doc = await collections()["users"].find_one({"_id": oid}, {"email": 1, "display_name": 1})
+    user = CurrentUser(user_id, doc.get("email"), doc.get("display_name")) if doc else None
+
+    _users[user_id] = (now + AUTH_USER_TTL_SEC, user)
+    _users.move_to_end(user_id)
+    if len(_users) > AUTH_USER_CACHE_SIZE:
+        _users.popitem(last=False)
+    return user
+
+
+async def get_current_user(authorization: Optional[str] = Header(None)) -> CurrentUser:
+    """Bearer 토큰을 검증하고 호출한 사용자를 반환 (Depends 용)"""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise _unauthorized("Not authenticated")
+
+    claims = _decode(token.strip())
+    user = await _load_user(str(claims["sub"]))
+    if user is None:
+        raise _unauthorized("User not found")
+    return user
+
+
+def resolve_user_id(user: CurrentUser, requested: Optional[str]) -> str:
+    """요청에 실린 user_id(호환용)가 있으면 토큰의 사용자와 같은지 확인"""
+    if requested and requested != user.id:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return user.id
+
+
+def invalidate_user(user_id: str) -> None:
+    _users.pop(user_id, None)
+
+
+def stats() -> Dict:
+    return {**_stats, "tokens_cached": len(_claims), "users_cached": len(_users)}
@@ -0,0 +1,81 @@
+"""로그인 비밀번호 검증 처리량 벤치마크 (이벤트 루프 직접 호출 vs 스레드 풀)
+
+동시에 N개의 로그인 요청이 들어올 때의 초당 처리량(req/s)과,
+그 사이 이벤트 루프가 다른 요청을 얼마나 늦게 처리하는지(최대 지연)를 비교합니다.
+Mongo 없이 bcrypt 검증 부분만 측정합니다.
+
+Command 예시:
+- cd backend && python -m benchmarks.login_hashing
+- cd backend && PASSWORD_POOL_SIZE=8 python -m benchmarks.login_hashing --requests 200 --concurrency 50
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable, Tuple
+
+import password_hashing
+from password_hashing import pwd_ctx, verify_password
+
+
+PASSWORD = "correct horse battery staple"
+
+
+async def _inline_verify(password: str, password_hash: str) -> Tuple[bool, None]:
+    # 변경 전 방식: async 핸들러 안에서 바로 bcrypt 검증
+    return pwd_ctx.verify(password, password_hash), None
+
+
+async def _probe(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """이벤트 루프가 interval마다 깨어나는지 확인해 최대 지연(ms) 측정"""
+    worst = 0.0
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        worst = max(worst, (loop.time() - start - interval) * 1000)
+    return worst
+
+
+async def _run(
+    verify: Callable[[str, str], Awaitable[Tuple[bool, object]]],
+    password_hash: str,
+    total: int,
+    concurrency: int,
+) -> Tuple[float, float]:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _login() -> None:
+        async with sem:
+            ok, _ = await verify(PASSWORD, password_hash)
+            assert ok
+
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(_login() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    return total / elapsed, await probe
+
+
+async def main(total: int, concurrency: int) -> None:
+    password_hash = pwd_ctx.hash(PASSWORD)
+    print(
+        f"bcrypt rounds={password_hashing.BCRYPT_ROUNDS} pool={password_hashing.PASSWORD_POOL_SIZE} "
+        f"requests={total} concurrency={concurrency}"
+    )
+    for name, verify in (("inline (before)", _inline_verify), ("thread pool (after)", verify_password)):
+        rps, lag = await _run(verify, password_hash, total, concurrency)
+        print(f"{name:<20} {rps:8.1f} req/s   max event-loop lag {lag:8.1f} ms")
+    print(password_hashing.stats())
+    password_hashing.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
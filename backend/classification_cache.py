@@ -0,0 +1,144 @@
+"""메모 분류 결과 캐시 (2단계)
+
+같은 메모("스타벅스 라떼", "지하철", "점심" 등)가 반복해서 들어오므로,
+GPT 분류 결과를 재사용해 LLM 호출을 줄입니다.
+
+- 1단계: 프로세스 내 LRU (CLASSIFY_CACHE_SIZE, 기본 2048개)
+- 2단계: MongoDB `classification_cache` 컬렉션
+  (updated_at TTL 인덱스: CLASSIFY_CACHE_TTL_DAYS, 기본 30일 / hits 카운터)
+
+키: 정규화된 메모 + 금액 구간(자릿수)
+히트/미스 집계는 `cache_stats()`로 확인합니다 (GET /api/metrics).
+"""
+from __future__ import annotations
+
+import os
+import re
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List
+
+from pymongo import UpdateOne
+
+from database import collections
+
+
+CLASSIFY_CACHE_SIZE = int(os.getenv("CLASSIFY_CACHE_SIZE", "2048"))
+CLASSIFY_CACHE_TTL_DAYS = int(os.getenv("CLASSIFY_CACHE_TTL_DAYS", "30"))
+
+_lru: "OrderedDict[str, Dict]" = OrderedDict()
+_stats: Dict[str, int] = {"lru_hits": 0, "mongo_hits": 0, "misses": 0, "stores": 0}
+
+
+def normalize_memo(memo: str) -> str:
+    """대소문자/공백/문장부호 차이를 무시한 메모 문자열"""
+    m = (memo or "").lower()
+    m = re.sub(r"[^\w가-힣]+", " ", m)
+    return " ".join(m.split())
+
+
+def amount_bucket(amount: int) -> int:
+    """금액 구간 (자릿수 기준: 1,000원대/10,000원대/100,000원대 ...)"""
+    return len(str(max(0, int(amount))))
+
+
+def cache_key(memo: str, amount: int) -> str:
+    return f"{normalize_memo(memo)}|{amount_bucket(amount)}"
+
+
+def copy_result(result: Dict) -> Dict:
+    return {**result, "tags": list(result.get("tags") or [])}
+
+
+def get_local(key: str) -> Dict | None:
+    """1단계(LRU)만 조회"""
+    hit = _lru.get(key)
+    if hit is None:
+        return None
+    _lru.move_to_end(key)
+    _stats["lru_hits"] += 1
+    return copy_result(hit)
+
+
+def put_local(key: str, result: Dict) -> None:
+    _lru[key] = copy_result(result)
+    _lru.move_to_end(key)
+    while len(_lru) > CLASSIFY_CACHE_SIZE:
+        _lru.popitem(last=False)
+
+
+def record_miss(count: int = 1) -> None:
+    _stats["misses"] += count
+
+
+async def get_many(keys: List[str]) -> Dict[str, Dict]:
+    """LRU → Mongo 순으로 조회해 {key: 결과}를 반환 (없는 키는 미포함)
+
+    Mongo 히트는 LRU에 채워 넣고 hits 카운터를 올립니다.
+    """
+    found: Dict[str, Dict] = {}
+    remote: List[str] = []
+    for key in dict.fromkeys(keys):
+        hit = get_local(key)
+        if hit is not None:
+            found[key] = hit
+        else:
+            remote.append(key)
+
+    if remote:
+        try:
+            col = collections()["classification_cache"]
+            cur = col.find({"_id": {"$in": remote}}, {"result": 1})
+            async for doc in cur:
+                result = doc.get("result")
+                if isinstance(result, dict) and result.get("category"):
+                    found[doc["_id"]] = copy_result(result)
+                    put_local(doc["_id"], result)
+            mongo_hits = [k for k in remote if k in found]
+            if mongo_hits:
+                _stats["mongo_hits"] += len(mongo_hits)
+                await col.update_many(
+                    {"_id": {"$in": mongo_hits}},
+                    {"$inc": {"hits": 1}, "$set": {"last_hit_at": datetime.utcnow()}},
+                )
+        except Exception as e:  # 캐시 장애는 미스로 취급
+            print(f"[CLASSIFY CACHE] lookup error: {e}")
+
+    record_miss(len([k for k in dict.fromkeys(keys) if k not in found]))
+    return found
+
+
+async def put_many(entries: Dict[str, Dict]) -> None:
+    """분류 결과를 LRU와 Mongo 양쪽에 저장 (GPT 결과만 저장할 것)"""
+    if not entries:
+        return
+    now = datetime.utcnow()
+    for key, result in entries.items():
+        put_local(key, result)
+    ops = [
+        UpdateOne(
+            {"_id": key},
+            {
+                "$set": {"result": copy_result(result), "updated_at": now},
+                "$setOnInsert": {"hits": 0, "created_at": now},
+            },
+            upsert=True,
+        )
+        for key, result in entries.items()
+    ]
+    try:
+        await collections()["classification_cache"].bulk_write(ops, ordered=False)
+        _stats["stores"] += len(ops)
+    except Exception as e:
+        print(f"[CLASSIFY CACHE] store error: {e}")
+
+
+def cache_stats() -> Dict:
+    """히트/미스 집계 (절약된 LLM 호출 수 = lru_hits + mongo_hits)"""
+    lookups = _stats["lru_hits"] + _stats["mongo_hits"] + _stats["misses"]
+    hits = _stats["lru_hits"] + _stats["mongo_hits"]
+    return {
+        **_stats,
+        "size": len(_lru),
+        "hit_ratio": (hits / lookups) if lookups else 0.0,
+    }
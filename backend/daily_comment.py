@@ -0,0 +1,128 @@
+"""일간 AI 코멘트 재생성 디바운스/병합
+
+같은 날짜에 여러 번 연달아 저장해도 코멘트 LLM 호출은 한 번만 하도록,
+(user_id, spent_at) 단위로 재생성을 미뤘다가 합쳐서 실행합니다.
+
+- 저장 API는 일별 문서에 ai_comment_stale=True, comment_version += 1 을 기록하고 `mark_stale`을 호출
+- 마지막 저장 후 COMMENT_QUIET_SEC(기본 20초) 동안 조용하거나,
+  첫 저장 후 COMMENT_MAX_DELAY_SEC(기본 120초)가 지나면 한 번 재생성
+- 재생성 중에 새 저장이 들어오면 진행 중인 재생성은 취소하고 새로 예약
+  (다른 프로세스와 겹쳐도 comment_version 조건부 업데이트로 최신 코멘트만 반영)
+- 프로세스가 재시작돼 예약이 사라졌다면 일간 리포트 조회 시 다시 예약됩니다.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Dict, Tuple
+
+from database import collections
+from ai_service import generate_daily_comment_async
+
+
+COMMENT_QUIET_SEC = float(os.getenv("COMMENT_QUIET_SEC", "20"))
+COMMENT_MAX_DELAY_SEC = float(os.getenv("COMMENT_MAX_DELAY_SEC", "120"))
+
+Key = Tuple[str, str]
+
+
+class _Pending:
+    def __init__(self, now: float):
+        self.first_at = now
+        self.last_at = now
+        self.task: asyncio.Task | None = None
+
+
+_pending: Dict[Key, _Pending] = {}
+_running: Dict[Key, asyncio.Task] = {}
+_stats: Dict[str, int] = {"marks": 0, "regenerations": 0, "superseded": 0}
+
+
+def stale_update() -> Dict:
+    """저장 시 일별 문서에 함께 적용할 업데이트 연산자"""
+    return {"$set": {"ai_comment_stale": True}, "$inc": {"comment_version": 1}}
+
+
+def is_scheduled(user_id: str, spent_at: str) -> bool:
+    key = (user_id, spent_at)
+    return key in _pending or key in _running
+
+
+def mark_stale(user_id: str, spent_at: str) -> None:
+    """코멘트 재생성을 예약(또는 기존 예약을 연장)합니다."""
+    key = (user_id, spent_at)
+    now = asyncio.get_running_loop().time()
+    _stats["marks"] += 1
+
+    running = _running.pop(key, None)
+    if running is not None and not running.done():
+        running.cancel()
+        _stats["superseded"] += 1
+
+    pending = _pending.get(key)
+    if pending is None:
+        pending = _Pending(now)
+        _pending[key] = pending
+        pending.task = asyncio.create_task(_debounced(key))
+    else:
+        pending.last_at = now
+
+
+async def _debounced(key: Key) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        pending = _pending[key]
+        due = min(pending.last_at + COMMENT_QUIET_SEC, pending.first_at + COMMENT_MAX_DELAY_SEC)
+        wait = due - loop.time()
+        if wait <= 0:
+            break
+        await asyncio.sleep(wait)
+
+    _pending.pop(key, None)
+    task = asyncio.create_task(regenerate(*key))
+    _running[key] = task
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    finally:
+        if _running.get(key) is task:
+            _running.pop(key, None)
+
+
+async def regenerate(user_id: str, spent_at: str) -> None:
+    """현재 항목으로 코멘트를 생성하고, 그 사이 새 저장이 없었을 때만 반영"""
+    col = collections()["spendings"]
+    try:
+        doc = await col.find_one(
+            {"user_id": user_id, "spent_at": spent_at}, {"items": 1, "comment_version": 1}
+        )
+        if not doc:
+            return
+        version = doc.get("comment_version", 0)
+        comment = await generate_daily_comment_async(doc.get("items") or [])
+        res = await col.update_one(
+            {"_id": doc["_id"], "comment_version": version},
+            {"$set": {"ai_comment": comment, "ai_comment_stale": False}},
+        )
+        _stats["regenerations"] += 1
+        if res.matched_count == 0:
+            _stats["superseded"] += 1
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"[DAILY COMMENT] regenerate error {user_id} {spent_at}: {e}")
+
+
+async def stop() -> None:
+    """앱 종료 시 예약/진행 중인 재생성 정리 (stale 상태는 다음 조회 때 복구)"""
+    tasks = [p.task for p in _pending.values() if p.task] + list(_running.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _pending.clear()
+    _running.clear()
+
+
+def stats() -> Dict:
+    return {**_stats, "pending": len(_pending), "running": len(_running)}
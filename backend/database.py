@@ -72,6 +72,14 @@ def collections() -> Dict[str, Any]:
     - spendings (일별 문서)
     - weekly_reports
     - monthly_profiles
+    - news_insights
+    - news_headlines (주 단위 공용 헤드라인 캐시)
+    - classification_cache (메모 분류 결과 캐시)
+    - enrichment_jobs (비동기 분류 작업 큐)
+    - monthly_rollups (사용자/월별 합계)
+    - job_checkpoints (배치 작업 진행 상황)
+    - gpt_cache (GPT 응답 캐시)
+    - import_jobs (CSV 가져오기 작업 상태)
     """
     db = get_db()
     return {
@@ -80,4 +88,11 @@ def collections() -> Dict[str, Any]:
         "weekly_reports": db.get_collection("weekly_reports"),
         "monthly_profiles": db.get_collection("monthly_profiles"),
         "news_insights": db.get_collection("news_insights"),
+        "news_headlines": db.get_collection("news_headlines"),
+        "classification_cache": db.get_collection("classification_cache"),
+        "enrichment_jobs": db.get_collection("enrichment_jobs"),
+        "monthly_rollups": db.get_collection("monthly_rollups"),
+        "job_checkpoints": db.get_collection("job_checkpoints"),
+        "gpt_cache": db.get_collection("gpt_cache"),
+        "import_jobs": db.get_collection("import_jobs"),
     }
@@ -0,0 +1,265 @@
+"""소비 항목 AI 분류 비동기 큐 (write-first 모드)
+
+ENRICHMENT_MODE=async 이면 벌크 저장 API는 항목을 "pending" 상태로 바로 저장하고,
+분류 작업은 `enrichment_jobs` 컬렉션에 넣어 백그라운드 워커가 처리합니다.
+(기본값 sync: 기존처럼 저장 전에 분류)
+
+작업 문서:
+{
+  _id, kind: "classify", user_id, spent_at,
+  items: [{id, memo, amount}],
+  status: queued | running | done | dead,
+  attempts, run_after, lease_until, last_error, created_at, updated_at
+}
+
+- 워커는 find_one_and_update로 작업을 원자적으로 가져갑니다(claim).
+- running 상태로 lease_until(가시성 타임아웃)이 지나면 다른 워커가 다시 가져갈 수 있습니다.
+- 실패하면 지수 백오프 후 재시도, ENRICH_MAX_ATTEMPTS를 넘기면 dead(데드레터)로 남기고
+  그 항목들은 pending 대신 status="failed"로 표시합니다 (다시 저장하면 재분류).
+- 분류 결과는 일별 문서의 pending 항목(id와 memo 일치, id 없는 예전 작업은 memo/amount 일치)에
+  category/tags/confidence로 반영하고, 일/월 rollup을 다시 맞춘 뒤 일간 코멘트 재생성을 예약합니다 (daily_comment).
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from pymongo import ReturnDocument, UpdateOne
+
+from database import collections
+from ai_service import analyze_items_async
+from daily_comment import mark_stale, stale_update
+from rollups import apply_month_delta, daily_fields, doc_totals, month_writes
+
+
+ENRICHMENT_MODE = os.getenv("ENRICHMENT_MODE", "sync")
+ENRICH_WORKERS = int(os.getenv("ENRICH_WORKERS", "2"))
+ENRICH_VISIBILITY_SEC = int(os.getenv("ENRICH_VISIBILITY_SEC", "120"))
+ENRICH_MAX_ATTEMPTS = int(os.getenv("ENRICH_MAX_ATTEMPTS", "5"))
+ENRICH_POLL_SEC = float(os.getenv("ENRICH_POLL_SEC", "1.0"))
+ENRICH_BACKOFF_SEC = float(os.getenv("ENRICH_BACKOFF_SEC", "5"))
+
+# 일별 rollup 재계산 중 다른 저장과 겹쳤을 때 다시 시도할 횟수
+ROLLUP_REFRESH_RETRIES = 3
+
+PENDING = "pending"
+FAILED = "failed"
+
+_workers: List[asyncio.Task] = []
+_wakeup = asyncio.Event()
+
+
+def is_async_mode() -> bool:
+    return ENRICHMENT_MODE.lower() == "async"
+
+
+async def enqueue_classification(user_id: str, spent_at: str, items: List[Dict]) -> None:
+    """pending 항목들의 분류 작업을 큐에 넣습니다."""
+    if not items:
+        return
+    now = datetime.utcnow()
+    await collections()["enrichment_jobs"].insert_one(
+        {
+            "kind": "classify",
+            "user_id": user_id,
+            "spent_at": spent_at,
+            "items": [{"id": it.get("id"), "memo": it["memo"], "amount": it["amount"]} for it in items],
+            "status": "queued",
+            "attempts": 0,
+            "run_after": now,
+            "lease_until": None,
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+    )
+    _wakeup.set()
+
+
+async def claim_job() -> Dict | None:
+    """실행 가능한 작업 하나를 원자적으로 가져옵니다 (없으면 None)."""
+    now = datetime.utcnow()
+    return await collections()["enrichment_jobs"].find_one_and_update(
+        {
+            "$or": [
+                {"status": "queued", "run_after": {"$lte": now}},
+                # 가시성 타임아웃 초과: 처리하던 워커가 죽은 것으로 간주
+                {"status": "running", "lease_until": {"$lt": now}},
+            ]
+        },
+        {
+            "$set": {
+                "status": "running",
+                "lease_until": now + timedelta(seconds=ENRICH_VISIBILITY_SEC),
+                "updated_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("run_after", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def _pending_filter(item: Dict) -> Dict:
+    """작업 항목과 짝이 되는 pending 항목 조건
+    (작업 등록 후 메모가 수정된 항목에는 예전 메모의 분류를 쓰지 않음)"""
+    if item.get("id"):
+        return {"it.id": item["id"], "it.memo": item["memo"], "it.status": PENDING}
+    return {"it.memo": item["memo"], "it.amount": item["amount"], "it.status": PENDING}
+
+
+def classification_updates(query: Dict, items: List[Dict], results: List[Dict]) -> List[UpdateOne]:
+    """분류 결과를 일별 문서(query)의 pending 항목에 반영하는 bulk_write 연산들"""
+    return [
+        UpdateOne(
+            query,
+            {
+                "$set": {
+                    "items.$[it].category": ai.get("category"),
+                    "items.$[it].tags": ai.get("tags", []),
+                    "items.$[it].confidence": ai.get("confidence"),
+                },
+                "$unset": {"items.$[it].status": ""},
+            },
+            array_filters=[_pending_filter(it)],
+        )
+        for it, ai in zip(items, results)
+    ]
+
+
+async def refresh_rollups(user_id: str, spent_at: str, schedule_comment: bool = True) -> None:
+    """분류가 채워진 일별 문서의 일/월 rollup을 다시 맞추고 코멘트를 stale 표시
+    ("기타" → 실제 카테고리). schedule_comment=False면 재생성 예약 없이 표시만
+    (조회 시 일간 리포트가 예약함)"""
+    spend_col = collections()["spendings"]
+    query = {"user_id": user_id, "spent_at": spent_at}
+    for _ in range(ROLLUP_REFRESH_RETRIES):
+        doc = await spend_col.find_one(query, {"items": 1, "category_totals": 1, "tag_totals": 1})
+        if not doc:
+            break
+        fields = daily_fields(doc.get("items") or [])
+        async with month_writes(user_id, [spent_at]):
+            # 읽은 items 그대로일 때만 덮어씀 (그 사이 저장의 $inc를 잃지 않도록, 바뀌었으면 다시 읽음)
+            result = await spend_col.update_one(
+                {"_id": doc["_id"], "items": doc.get("items") or []}, {"$set": fields}
+            )
+            if result.matched_count:
+                await apply_month_delta(
+                    user_id, spent_at, doc_totals(doc), (fields["category_totals"], fields["tag_totals"])
+                )
+        if result.matched_count:
+            break
+    else:
+        print(f"[ENRICH] rollup refresh for {user_id} {spent_at} kept conflicting, skipped")
+
+    # 일간 코멘트는 바로 만들지 않고 재생성을 예약 (연속 저장과 합쳐짐)
+    await spend_col.update_one(query, stale_update())
+    if schedule_comment:
+        mark_stale(user_id, spent_at)
+
+
+async def _apply_classification(job: Dict) -> None:
+    """작업 항목을 분류하고 일별 문서의 pending 항목에 반영"""
+    items = job.get("items") or []
+    results = await analyze_items_async([(it["memo"], int(it["amount"])) for it in items])
+
+    ops = classification_updates({"user_id": job["user_id"], "spent_at": job["spent_at"]}, items, results)
+    if ops:
+        await collections()["spendings"].bulk_write(ops, ordered=True)
+    await refresh_rollups(job["user_id"], job["spent_at"])
+
+
+async def _mark_failed(job: Dict) -> None:
+    """dead 작업의 pending 항목을 failed로 표시 (pending으로 영원히 남지 않도록)"""
+    items = job.get("items") or []
+    if not items:
+        return
+    await collections()["spendings"].bulk_write(
+        [
+            UpdateOne(
+                {"user_id": job["user_id"], "spent_at": job["spent_at"]},
+                {"$set": {"items.$[it].status": FAILED}},
+                array_filters=[_pending_filter(it)],
+            )
+            for it in items
+        ],
+        ordered=False,
+    )
+    # 분석 중 표시가 풀리도록 코멘트 재생성 예약
+    mark_stale(job["user_id"], job["spent_at"])
+
+
+async def process_job(job: Dict) -> None:
+    """작업 하나를 처리하고 상태를 done / queued(재시도) / dead 로 갱신"""
+    jobs_col = collections()["enrichment_jobs"]
+    try:
+        await _apply_classification(job)
+    except Exception as e:
+        now = datetime.utcnow()
+        attempts = int(job.get("attempts", 1))
+        if attempts >= ENRICH_MAX_ATTEMPTS:
+            print(f"[ENRICH] job {job['_id']} dead after {attempts} attempts: {e}")
+            update = {"status": "dead", "last_error": str(e), "lease_until": None, "updated_at": now}
+        else:
+            delay = ENRICH_BACKOFF_SEC * (2 ** (attempts - 1))
+            update = {
+                "status": "queued",
+                "last_error": str(e),
+                "lease_until": None,
+                "run_after": now + timedelta(seconds=delay),
+                "updated_at": now,
+            }
+        await jobs_col.update_one({"_id": job["_id"]}, {"$set": update})
+        if update["status"] == "dead":
+            await _mark_failed(job)
+        return
+
+    await jobs_col.update_one(
+        {"_id": job["_id"]},
+        {"$set": {"status": "done", "lease_until": None, "updated_at": datetime.utcnow()}},
+    )
+
+
+async def _worker_loop(worker_no: int) -> None:
+    while True:
+        try:
+            job = await claim_job()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[ENRICH] worker {worker_no} claim error: {e}")
+            job = None
+
+        if job is None:
+            _wakeup.clear()
+            try:
+                await asyncio.wait_for(_wakeup.wait(), timeout=ENRICH_POLL_SEC)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        try:
+            await process_job(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 상태 기록에 실패해도 워커는 계속 (작업은 lease 만료 후 다시 가져감)
+            print(f"[ENRICH] worker {worker_no} job {job.get('_id')} error: {e}")
+
+
+def start_workers() -> None:
+    """앱 시작 시 워커 풀 기동 (ENRICHMENT_MODE=async 일 때만)"""
+    if not is_async_mode() or _workers:
+        return
+    for n in range(max(1, ENRICH_WORKERS)):
+        _workers.append(asyncio.create_task(_worker_loop(n)))
+
+
+async def stop_workers() -> None:
+    """앱 종료 시 워커 정리 (처리 중이던 작업은 lease 만료 후 재시도됨)"""
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
@@ -0,0 +1,180 @@
+"""GPT 응답 캐시 + single-flight
+
+`ai_service._call_gpt_async`/`_stream_cached`에서 같은 프롬프트에 대한 응답을 재사용합니다.
+프롬프트 종류(kind)별로 opt-in 하며, 종류마다 TTL과 Mongo 저장 여부가 다릅니다 (CACHE_POLICIES).
+kind 없이 호출하면 캐시하지 않습니다.
+
+- 키: sha256(model, system/user 프롬프트, temperature, max_tokens)
+- 1단계: 프로세스 내 LRU (GPT_CACHE_SIZE, 기본 512개, 항목별 만료)
+- 2단계: MongoDB `gpt_cache` 컬렉션 (persist=True 인 종류만, expires_at TTL 인덱스)
+- single-flight: 같은 키의 비동기 호출이 동시에 들어오면 GPT 호출 하나의 결과를 함께 사용
+  (먼저 호출한 쪽이 취소되었거나 자기 마감 때문에 빈 응답을 받았으면, 합류한 호출은 직접 다시 시도)
+- 빈 응답(에러/키 없음)은 저장하지 않음
+- GPT_CACHE=0 이면 전체 비활성화
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+from database import collections
+
+
+GPT_CACHE_ENABLED = os.getenv("GPT_CACHE", "1") == "1"
+GPT_CACHE_SIZE = int(os.getenv("GPT_CACHE_SIZE", "512"))
+
+
+class CachePolicy(NamedTuple):
+    ttl_sec: int
+    persist: bool
+
+
+# 프롬프트 종류별 정책 (창의적인 문장은 짧게, 분류/월간 프로필은 길게)
+CACHE_POLICIES: Dict[str, CachePolicy] = {
+    "classify": CachePolicy(ttl_sec=24 * 3600, persist=False),  # 메모 단위 캐시는 classification_cache
+    "daily": CachePolicy(ttl_sec=6 * 3600, persist=True),
+    "weekly": CachePolicy(ttl_sec=7 * 24 * 3600, persist=True),
+    "monthly": CachePolicy(ttl_sec=31 * 24 * 3600, persist=True),
+    "news": CachePolicy(ttl_sec=7 * 24 * 3600, persist=True),
+}
+
+# key → (만료 시각(monotonic), 응답)
+_lru: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+_inflight: Dict[str, asyncio.Future] = {}
+# 합류한 호출에게 "결과 없음, 직접 호출할 것"을 알리는 값
+_RETRY = object()
+_stats: Dict[str, int] = {"lru_hits": 0, "mongo_hits": 0, "misses": 0, "shared": 0, "stores": 0}
+
+
+def policy_for(kind: Optional[str]) -> Optional[CachePolicy]:
+    if not GPT_CACHE_ENABLED or not kind:
+        return None
+    return CACHE_POLICIES.get(kind)
+
+
+def cache_key(model: str, system_prompt: str, user_prompt: str, temperature: float, max_tokens: int) -> str:
+    raw = json.dumps([model, system_prompt, user_prompt, temperature, max_tokens], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _get_local(key: str) -> Optional[str]:
+    hit = _lru.get(key)
+    if hit is None:
+        return None
+    if hit[0] <= time.monotonic():
+        _lru.pop(key, None)
+        return None
+    _lru.move_to_end(key)
+    _stats["lru_hits"] += 1
+    return hit[1]
+
+
+def _put_local(key: str, value: str, ttl_sec: float) -> None:
+    _lru[key] = (time.monotonic() + ttl_sec, value)
+    _lru.move_to_end(key)
+    while len(_lru) > GPT_CACHE_SIZE:
+        _lru.popitem(last=False)
+
+
+async def _get_remote(key: str, policy: CachePolicy) -> Optional[str]:
+    try:
+        doc = await collections()["gpt_cache"].find_one(
+            {"_id": key, "expires_at": {"$gt": datetime.utcnow()}}, {"content": 1, "expires_at": 1}
+        )
+    except Exception as e:
+        print(f"[GPT CACHE] mongo lookup failed: {e}")
+        return None
+    if not doc:
+        return None
+    remaining = (doc["expires_at"] - datetime.utcnow()).total_seconds()
+    _put_local(key, doc["content"], min(remaining, policy.ttl_sec))
+    _stats["mongo_hits"] += 1
+    return doc["content"]
+
+
+async def _put_remote(key: str, kind: str, value: str, policy: CachePolicy) -> None:
+    now = datetime.utcnow()
+    try:
+        await collections()["gpt_cache"].update_one(
+            {"_id": key},
+            {"$set": {"kind": kind, "content": value, "expires_at": now + timedelta(seconds=policy.ttl_sec)}},
+            upsert=True,
+        )
+    except Exception as e:
+        print(f"[GPT CACHE] mongo store failed: {e}")
+
+
+async def lookup(kind: Optional[str], key: str) -> Optional[str]:
+    """LRU → Mongo 순으로 캐시된 응답 조회 (스트리밍 경로용)"""
+    policy = policy_for(kind)
+    if policy is None:
+        return None
+    hit = _get_local(key)
+    if hit is None and policy.persist:
+        hit = await _get_remote(key, policy)
+    if hit is None:
+        _stats["misses"] += 1
+    return hit
+
+
+async def store(kind: Optional[str], key: str, value: str) -> None:
+    policy = policy_for(kind)
+    if policy is None or not value:
+        return
+    _put_local(key, value, policy.ttl_sec)
+    _stats["stores"] += 1
+    if policy.persist:
+        await _put_remote(key, kind, value, policy)
+
+
+async def cached_call(kind: Optional[str], key: str, call: Callable[[], Awaitable[str]]) -> str:
+    """비동기 경로: LRU → (같은 키 진행 중이면 합류) → Mongo → GPT 호출"""
+    policy = policy_for(kind)
+    if policy is None:
+        return await call()
+
+    hit = _get_local(key)
+    if hit is not None:
+        return hit
+
+    inflight = _inflight.get(key)
+    if inflight is not None:
+        _stats["shared"] += 1
+        value = await asyncio.shield(inflight)
+        if value is _RETRY:
+            # 먼저 호출한 쪽의 취소/마감은 이 호출과 무관: 다시 조회하거나 직접 호출
+            return await cached_call(kind, key, call)
+        return value
+
+    future: asyncio.Future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        value = await _get_remote(key, policy) if policy.persist else None
+        if value is None:
+            _stats["misses"] += 1
+            value = await call()
+            await store(kind, key, value)
+        # 빈 응답은 이 호출의 마감/장애 때문일 수 있으므로 공유하지 않음
+        future.set_result(value if value else _RETRY)
+        return value
+    except asyncio.CancelledError:
+        # 공유 future를 취소하면 합류한 호출까지 CancelledError를 받으므로 다시 시도하라고 알림
+        future.set_result(_RETRY)
+        raise
+    except Exception as e:
+        # 합류한 호출들도 같은 예외를 받음
+        future.set_exception(e)
+        future.exception()  # 합류한 호출이 없을 때 "never retrieved" 경고 방지
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+
+def stats() -> Dict:
+    return {**_stats, "size": len(_lru), "inflight": len(_inflight)}
@@ -0,0 +1,205 @@
+"""공용 비동기 외부 HTTP 클라이언트
+
+외부 API(Yahoo, NewsAPI, SendGrid, Google OAuth) 호출을 하나의 httpx.AsyncClient로 모읍니다.
+
+- 앱 시작 시 `start()`, 종료 시 `aclose()` (스크립트에서는 첫 호출 때 자동 생성)
+- 호스트별 커넥션 풀/keep-alive 재사용, h2 패키지가 있으면 HTTP/2 사용
+- 서비스별 타임아웃 예산(SERVICES)과 지터가 들어간 지수 백오프 재시도
+  - GET 등 멱등 요청: 연결 오류/타임아웃/429/5xx 재시도
+  - POST 등: 요청이 전송되기 전 실패(연결 오류)만 재시도 (메일 중복 발송 방지)
+- 헤지 요청(HTTP_HEDGE=1): 멱등 요청이 hedge_after 초 안에 끝나지 않으면
+  같은 요청을 하나 더 보내 먼저 끝난 응답을 사용
+- 호스트별 요청 수/오류/재시도/헤지/지연 시간 지표 (`stats()`, /api/metrics)
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import os
+import random
+import time
+from typing import Dict, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_SEC = float(os.getenv("HTTP_KEEPALIVE_SEC", "30"))
+HTTP_RETRY_BASE_SEC = float(os.getenv("HTTP_RETRY_BASE_SEC", "0.2"))
+HTTP_HEDGE = os.getenv("HTTP_HEDGE", "0") == "1"
+# HTTP/2는 h2 패키지(httpx[http2])가 설치된 경우에만 사용
+HTTP2_ENABLED = os.getenv("HTTP_HTTP2", "1") == "1" and importlib.util.find_spec("h2") is not None
+
+
+class ServiceConfig(NamedTuple):
+    timeout: float
+    retries: int
+    hedge_after: Optional[float] = None
+
+
+# 서비스별 타임아웃 예산 (초) / 재시도 횟수 / 헤지 지연
+SERVICES: Dict[str, ServiceConfig] = {
+    "yahoo": ServiceConfig(timeout=5, retries=2, hedge_after=1.0),
+    "newsapi": ServiceConfig(timeout=5, retries=2, hedge_after=1.5),
+    "sendgrid": ServiceConfig(timeout=10, retries=2),
+    "google": ServiceConfig(timeout=10, retries=1),
+}
+_DEFAULT_SERVICE = ServiceConfig(timeout=10, retries=1)
+
+_IDEMPOTENT = {"GET", "HEAD", "OPTIONS"}
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+# 요청이 서버에 도달하기 전에 실패한 경우 (POST도 안전하게 재시도 가능)
+_NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+_client: Optional[httpx.AsyncClient] = None
+_stats: Dict[str, Dict[str, float]] = {}
+
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=HTTP2_ENABLED,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_SEC,
+        ),
+        timeout=_DEFAULT_SERVICE.timeout,
+    )
+
+
+async def start() -> None:
+    """앱 시작 시 공용 클라이언트 생성"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _new_client()
+
+
+async def aclose() -> None:
+    """앱 종료 시 커넥션 풀 정리"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _new_client()
+    return _client
+
+
+def _host_stats(host: str) -> Dict[str, float]:
+    return _stats.setdefault(
+        host,
+        {"requests": 0, "errors": 0, "retries": 0, "hedges": 0, "latency_ms_total": 0.0, "latency_ms_max": 0.0},
+    )
+
+
+def _record(host: str, started: float, error: bool) -> None:
+    s = _host_stats(host)
+    elapsed = (time.perf_counter() - started) * 1000
+    s["requests"] += 1
+    s["latency_ms_total"] += elapsed
+    s["latency_ms_max"] = max(s["latency_ms_max"], elapsed)
+    if error:
+        s["errors"] += 1
+
+
+def _backoff(attempt: int) -> float:
+    # full jitter: 0 ~ base * 2^attempt
+    return random.uniform(0, HTTP_RETRY_BASE_SEC * (2 ** attempt))
+
+
+async def _send_once(method: str, url: str, host: str, timeout: float, **kwargs) -> httpx.Response:
+    started = time.perf_counter()
+    try:
+        res = await get_client().request(method, url, timeout=timeout, **kwargs)
+    except Exception:
+        _record(host, started, error=True)
+        raise
+    _record(host, started, error=res.status_code >= 500)
+    return res
+
+
+async def _send_hedged(
+    method: str, url: str, host: str, timeout: float, hedge_after: float, **kwargs
+) -> httpx.Response:
+    """첫 요청이 hedge_after 안에 끝나지 않으면 두 번째 요청을 보내 먼저 끝난 쪽 사용"""
+    first = asyncio.create_task(_send_once(method, url, host, timeout, **kwargs))
+    done, _ = await asyncio.wait({first}, timeout=hedge_after)
+    if done:
+        return first.result()
+
+    _host_stats(host)["hedges"] += 1
+    second = asyncio.create_task(_send_once(method, url, host, timeout, **kwargs))
+    pending = {first, second}
+    error: Optional[BaseException] = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error  # 둘 다 실패
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def request(service: str, method: str, url: str, **kwargs) -> httpx.Response:
+    """서비스 설정(타임아웃/재시도/헤지)을 적용해 요청
+
+    재시도 후에도 실패하면 마지막 예외를 올리고, 재시도 대상 상태 코드는 마지막 응답을 그대로 반환합니다.
+    """
+    cfg = SERVICES.get(service, _DEFAULT_SERVICE)
+    method = method.upper()
+    idempotent = method in _IDEMPOTENT
+    host = urlsplit(url).netloc
+    timeout = kwargs.pop("timeout", cfg.timeout)
+    hedge = HTTP_HEDGE and idempotent and cfg.hedge_after is not None
+
+    for attempt in range(cfg.retries + 1):
+        last = attempt == cfg.retries
+        try:
+            if hedge:
+                res = await _send_hedged(method, url, host, timeout, cfg.hedge_after, **kwargs)
+            else:
+                res = await _send_once(method, url, host, timeout, **kwargs)
+        except httpx.HTTPError as e:
+            if last or not (idempotent or isinstance(e, _NOT_SENT)):
+                raise
+        else:
+            if last or not idempotent or res.status_code not in _RETRY_STATUS:
+                return res
+
+        _host_stats(host)["retries"] += 1
+        await asyncio.sleep(_backoff(attempt))
+    raise RuntimeError("unreachable")
+
+
+async def get(service: str, url: str, **kwargs) -> httpx.Response:
+    return await request(service, "GET", url, **kwargs)
+
+
+async def post(service: str, url: str, **kwargs) -> httpx.Response:
+    return await request(service, "POST", url, **kwargs)
+
+
+def stats() -> Dict:
+    """호스트별 요청/오류/재시도/헤지 수와 평균·최대 지연(ms)"""
+    out: Dict[str, Dict] = {}
+    for host, s in _stats.items():
+        avg = s["latency_ms_total"] / s["requests"] if s["requests"] else 0.0
+        out[host] = {
+            "requests": int(s["requests"]),
+            "errors": int(s["errors"]),
+            "retries": int(s["retries"]),
+            "hedges": int(s["hedges"]),
+            "latency_ms_avg": round(avg, 1),
+            "latency_ms_max": round(s["latency_ms_max"], 1),
+        }
+    return {"http2": HTTP2_ENABLED, "hosts": out}
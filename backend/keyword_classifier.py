@@ -0,0 +1,170 @@
+"""키워드 사전 기반 소비 항목 분류기
+
+역할
+- 메모에서 키워드(브랜드/품목)를 찾아 카테고리·태그·신뢰도를 계산합니다.
+- 모든 키워드는 모듈 로드 시 하나의 정규식으로 컴파일되어, 메모 1개를 한 번만 훑습니다.
+- 한 글자 키워드("술", "책")는 단어 전체일 때만 매칭합니다 ("미술", "기술", "책상"은 제외).
+  두 글자 이상은 붙여 쓴 메모("스타벅스라떼")도 잡도록 부분 문자열로 매칭합니다.
+- 신뢰도가 KEYWORD_CONFIDENCE_THRESHOLD(기본 0.85) 이상이면
+  ai_service가 GPT 호출 없이 이 결과를 그대로 사용합니다.
+
+신뢰도 계산
+- 같은 카테고리로 잡힌 키워드 가중치 w를 1 - Π(1 - w)로 합쳐 근거 점수를 만들고,
+- 가장 점수가 높은 카테고리의 점수 × (그 점수 / 전체 카테고리 점수 합)을 신뢰도로 씁니다.
+  (서로 다른 카테고리 키워드가 섞이면 신뢰도가 내려감)
+
+카테고리/태그 체계는 GPT 분류 프롬프트(ai_service._ITEM_GUIDE)와 같습니다.
+"""
+from __future__ import annotations
+
+import os
+import re
+from typing import Dict, List, NamedTuple
+
+
+KEYWORD_CONFIDENCE_THRESHOLD = float(os.getenv("KEYWORD_CONFIDENCE_THRESHOLD", "0.85"))
+
+# 이 금액 이상이면 "고가" 태그 추가
+HIGH_AMOUNT = 50000
+# 이보다 짧은 키워드는 단어 경계에서만 매칭
+MIN_SUBSTRING_LEN = 2
+# GPT 분류 프롬프트와 같은 태그 최대 개수
+MAX_TAGS = 2
+
+
+class KeywordRule(NamedTuple):
+    category: str
+    tags: List[str]
+    weight: float  # 0~1, 이 키워드 하나만으로 확신할 수 있는 정도
+
+
+# 키워드 → 규칙. 키워드는 소문자로 적습니다.
+KEYWORD_RULES: Dict[str, KeywordRule] = {
+    # 교통
+    "지하철": KeywordRule("교통", ["필수"], 0.95),
+    "버스": KeywordRule("교통", ["필수"], 0.9),
+    "교통": KeywordRule("교통", ["필수"], 0.9),
+    "ktx": KeywordRule("교통", ["필수"], 0.9),
+    "택시": KeywordRule("교통", ["효율"], 0.95),
+    "카카오t": KeywordRule("교통", ["효율"], 0.9),
+    "kakaot": KeywordRule("교통", ["효율"], 0.9),
+    "uber": KeywordRule("교통", ["효율"], 0.9),
+    "주유": KeywordRule("교통", ["필수"], 0.9),
+    "주차": KeywordRule("교통", ["필수"], 0.85),
+    # 카페/간식
+    "스타벅스": KeywordRule("식비", ["즐거움"], 0.95),
+    "투썸": KeywordRule("식비", ["즐거움"], 0.9),
+    "이디야": KeywordRule("식비", ["즐거움"], 0.9),
+    "메가커피": KeywordRule("식비", ["즐거움"], 0.9),
+    "커피": KeywordRule("식비", ["즐거움"], 0.85),
+    "카페": KeywordRule("식비", ["즐거움"], 0.85),
+    "라떼": KeywordRule("식비", ["즐거움"], 0.85),
+    "아메리카노": KeywordRule("식비", ["즐거움"], 0.9),
+    "디저트": KeywordRule("식비", ["즐거움"], 0.8),
+    "간식": KeywordRule("식비", ["즐거움"], 0.8),
+    # 배달
+    "배달의민족": KeywordRule("식비", ["효율"], 0.95),
+    "배민": KeywordRule("식비", ["효율"], 0.95),
+    "요기요": KeywordRule("식비", ["효율"], 0.95),
+    "쿠팡이츠": KeywordRule("식비", ["효율"], 0.95),
+    "배달": KeywordRule("식비", ["효율"], 0.85),
+    # 식사
+    "점심": KeywordRule("식비", ["필수"], 0.9),
+    "저녁": KeywordRule("식비", ["필수"], 0.85),
+    "아침": KeywordRule("식비", ["필수"], 0.8),
+    "식사": KeywordRule("식비", ["필수"], 0.9),
+    "한식": KeywordRule("식비", ["필수"], 0.9),
+    "분식": KeywordRule("식비", ["필수"], 0.9),
+    "라면": KeywordRule("식비", ["필수"], 0.85),
+    "편의점": KeywordRule("식비", ["필수"], 0.7),
+    "마트": KeywordRule("쇼핑", ["필수"], 0.7),
+    # 교육
+    "책": KeywordRule("교육", ["자기계발"], 0.6),
+    "도서": KeywordRule("교육", ["자기계발"], 0.85),
+    "강의": KeywordRule("교육", ["자기계발"], 0.9),
+    "인강": KeywordRule("교육", ["자기계발"], 0.95),
+    "토익": KeywordRule("교육", ["자기계발"], 0.95),
+    "토플": KeywordRule("교육", ["자기계발"], 0.95),
+    "학원": KeywordRule("교육", ["자기계발"], 0.9),
+    # 모임/술
+    "회식": KeywordRule("식비", ["관계"], 0.9),
+    "모임": KeywordRule("여가", ["관계"], 0.7),
+    "술": KeywordRule("여가", ["관계"], 0.6),
+    "맥주": KeywordRule("여가", ["즐거움"], 0.8),
+    "소주": KeywordRule("여가", ["관계"], 0.8),
+    # 통신/주거/건강/문화
+    "통신비": KeywordRule("통신", ["필수"], 0.95),
+    "핸드폰": KeywordRule("통신", ["필수"], 0.8),
+    "월세": KeywordRule("주거", ["필수"], 0.95),
+    "관리비": KeywordRule("주거", ["필수"], 0.95),
+    "병원": KeywordRule("건강", ["관리"], 0.95),
+    "약국": KeywordRule("건강", ["관리"], 0.95),
+    "헬스": KeywordRule("건강", ["관리"], 0.85),
+    "영화": KeywordRule("문화", ["즐거움"], 0.9),
+    "넷플릭스": KeywordRule("문화", ["즐거움"], 0.95),
+}
+
+
+class KeywordMatch(NamedTuple):
+    category: str
+    tags: List[str]
+    confidence: float
+    matched: List[str]
+
+
+class KeywordClassifier:
+    """키워드 사전을 하나의 정규식으로 컴파일해 한 번의 스캔으로 점수를 매깁니다."""
+
+    def __init__(self, rules: Dict[str, KeywordRule]):
+        self.rules = {k.lower(): r for k, r in rules.items()}
+        # 긴 키워드 우선 (예: "배달의민족"이 "배달"보다 먼저 매칭)
+        alternation = "|".join(
+            re.escape(k) if len(k) >= MIN_SUBSTRING_LEN else rf"(?<!\w){re.escape(k)}(?!\w)"
+            for k in sorted(self.rules, key=len, reverse=True)
+        )
+        self.pattern = re.compile(alternation) if alternation else None
+
+    def classify(self, memo: str, amount: int) -> KeywordMatch:
+        text = (memo or "").lower()
+        matched = list(dict.fromkeys(self.pattern.findall(text))) if self.pattern else []
+
+        # 카테고리별 근거 점수: 1 - Π(1 - w)
+        miss_prob: Dict[str, float] = {}
+        for kw in matched:
+            rule = self.rules[kw]
+            miss_prob[rule.category] = miss_prob.get(rule.category, 1.0) * (1.0 - rule.weight)
+        evidence = {cat: 1.0 - p for cat, p in miss_prob.items()}
+
+        category = "기타"
+        tags: List[str] = []
+        confidence = 0.5
+        if evidence:
+            category = max(evidence, key=evidence.get)
+            share = evidence[category] / sum(evidence.values())
+            confidence = round(evidence[category] * share, 3)
+            winners = sorted(
+                (self.rules[kw] for kw in matched if self.rules[kw].category == category),
+                key=lambda r: r.weight,
+                reverse=True,
+            )
+            for rule in winners:
+                tags.extend(rule.tags)
+
+        if amount >= HIGH_AMOUNT:
+            tags.append("고가")
+        # 중복 제거, GPT 프롬프트와 같이 최대 2개 (가중치 높은 키워드의 태그 우선)
+        tags = list(dict.fromkeys(tags))[:MAX_TAGS]
+        return KeywordMatch(category, tags, confidence, matched)
+
+
+_classifier = KeywordClassifier(KEYWORD_RULES)
+
+
+def classify(memo: str, amount: int) -> KeywordMatch:
+    """모듈 공용 분류기로 분류"""
+    return _classifier.classify(memo, amount)
+
+
+def is_confident(match: KeywordMatch) -> bool:
+    """GPT 호출 없이 바로 써도 될 만큼 확신하는지"""
+    return bool(match.matched) and match.confidence >= KEYWORD_CONFIDENCE_THRESHOLD
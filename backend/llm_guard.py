@@ -0,0 +1,136 @@
+"""LLM 호출 보호: 서킷 브레이커 + 요청별 마감 시간(deadline)
+
+OpenAI가 느려지거나 장애일 때 저장/리포트 요청이 오래 매달리지 않고
+바로 기존 폴백(휴리스틱 분류, 기본 코멘트)으로 가도록 합니다.
+
+서킷 브레이커 (프로세스 단위)
+- closed: 정상. 연속 실패(에러 또는 LLM_SLOW_CALL_SEC 이상 걸린 호출)가
+  LLM_BREAKER_FAILURES(기본 5)번이면 open
+- open: LLM_BREAKER_COOLDOWN_SEC(기본 30초) 동안 호출하지 않고 즉시 폴백
+- half_open: 쿨다운 후 한 번만 시험 호출. 성공하면 closed, 실패하면 다시 open
+
+마감 시간
+- 라우터에서 `with llm_deadline(초):` 로 감싸면 그 안의 GPT 호출은 남은 시간만큼만 기다림
+  (contextvars로 전달되므로 하위 함수/태스크에 인자를 넘길 필요 없음)
+- 마감이 지나면 GPT를 호출하지 않고 폴백. 마감 때문에 끊긴 호출은 브레이커 실패로 세지 않음
+"""
+from __future__ import annotations
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+
+LLM_TIMEOUT_SEC = float(os.getenv("LLM_TIMEOUT_SEC", "15"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "1"))
+LLM_SLOW_CALL_SEC = float(os.getenv("LLM_SLOW_CALL_SEC", "10"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN_SEC = float(os.getenv("LLM_BREAKER_COOLDOWN_SEC", "30"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, failures: int, cooldown_sec: float, slow_sec: float):
+        self.failure_threshold = failures
+        self.cooldown_sec = cooldown_sec
+        self.slow_sec = slow_sec
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.stats: Dict[str, int] = {
+            "calls": 0,
+            "failures": 0,
+            "slow_calls": 0,
+            "short_circuited": 0,
+            "deadline_skipped": 0,
+            "trips": 0,
+        }
+
+    def allow(self) -> bool:
+        """지금 LLM을 호출해도 되는지 (False면 바로 폴백)"""
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.cooldown_sec:
+                self.stats["short_circuited"] += 1
+                return False
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self.probing:
+                self.stats["short_circuited"] += 1
+                return False
+            self.probing = True
+        self.stats["calls"] += 1
+        return True
+
+    def record(self, ok: bool, elapsed: float) -> None:
+        """호출 결과 반영 (느린 호출은 실패로 취급)"""
+        self.probing = False
+        if ok and elapsed >= self.slow_sec:
+            self.stats["slow_calls"] += 1
+            ok = False
+        if ok:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            return
+        self.stats["failures"] += 1
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._trip()
+
+    def release(self) -> None:
+        """결과를 판단할 수 없는 경우(마감으로 중단) 시험 호출 자리만 반납"""
+        self.probing = False
+
+    def _trip(self) -> None:
+        if self.state != OPEN:
+            self.stats["trips"] += 1
+            print(f"[LLM] circuit open after {self.consecutive_failures} failures")
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict:
+        return {"state": self.state, "consecutive_failures": self.consecutive_failures, **self.stats}
+
+
+breaker = CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_COOLDOWN_SEC, LLM_SLOW_CALL_SEC)
+
+# 마감 시각 (time.monotonic 기준). None이면 마감 없음
+_deadline: ContextVar[Optional[float]] = ContextVar("llm_deadline", default=None)
+
+
+@contextmanager
+def llm_deadline(seconds: float) -> Iterator[None]:
+    """이 블록 안의 LLM 호출에 마감 시간 적용 (바깥 마감이 더 빠르면 그쪽 유지)"""
+    new = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(min(new, current) if current is not None else new)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def call_timeout() -> Optional[float]:
+    """이번 호출에 쓸 타임아웃(초). 마감이 이미 지났으면 None (호출하지 말 것)"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return LLM_TIMEOUT_SEC
+    remaining = deadline - time.monotonic()
+    if remaining <= 0.05:
+        breaker.stats["deadline_skipped"] += 1
+        return None
+    return min(LLM_TIMEOUT_SEC, remaining)
+
+
+def under_deadline(timeout: float) -> bool:
+    """timeout이 기본값보다 짧다면 요청 마감에 의해 잘린 것"""
+    return timeout < LLM_TIMEOUT_SEC
+
+
+def stats() -> Dict:
+    return breaker.snapshot()
@@ -7,6 +7,7 @@ FastAPI 엔트리포인트
 환경 변수:
 - MONGO_URI, MONGO_DB
 - OPENAI_API_KEY
+- ENRICHMENT_MODE (sync | async, 기본 sync): async면 저장 먼저, AI 분류는 백그라운드 워커
 
 배포(Render):
 - Start Command: uvicorn backend.main:app --host 0.0.0.0 --port 10000
@@ -17,14 +18,32 @@ from __future__ import annotations
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+import http_client
+import password_hashing
+from auth_deps import stats as auth_stats
+from gpt_cache import stats as gpt_cache_stats
+from llm_guard import stats as llm_stats
 from database import connect_to_mongo, close_mongo_connection
+from classification_cache import CLASSIFY_CACHE_TTL_DAYS, cache_stats as classification_cache_stats
+from daily_comment import stats as daily_comment_stats, stop as stop_daily_comment
+from enrichment import start_workers as start_enrichment_workers, stop_workers as stop_enrichment_workers
 from routers.spendings import router as spendings_router
-from routers.reports import router as reports_router
+from spending_import import stop as stop_imports
+from scheduler.backfill_rollups import start_once as start_rollup_backfill, stop as stop_rollup_backfill
+from routers.reports import router as reports_router, stop_refreshes as stop_report_refreshes
 from routers.users import router as users_router
 from routers.auth import router as auth_router
 from routers.auth_google import router as auth_google_router
-from routers.stocks import router as stocks_router
-from routers.insights import router as insights_router
+from routers.stocks import (
+    router as stocks_router,
+    start_refresher as start_market_refresher,
+    stop_refresher as stop_market_refresher,
+)
+from routers.insights import (
+    router as insights_router,
+    start_refresher as start_news_refresher,
+    stop_refresher as stop_news_refresher,
+)
 
 app = FastAPI(title="spendWallet API", version="0.1.0")
 
@@ -43,27 +62,92 @@ app.add_middleware(
 )
 
 
+async def _ensure_spendings_unique_index(col) -> None:
+    """(user_id, spent_at) unique 인덱스 보장 (벌크 저장의 원자적 upsert 전제)
+
+    예전 non-unique 인덱스가 있으면 지우고 unique로 다시 만듭니다.
+    같은 날짜 문서가 중복으로 남아 있으면 생성이 실패하므로 로그를 남깁니다.
+    """
+    keys = [("user_id", 1), ("spent_at", 1)]
+    try:
+        info = await col.index_information()
+        current = info.get("user_id_1_spent_at_1")
+        if current and not current.get("unique"):
+            await col.drop_index("user_id_1_spent_at_1")
+        await col.create_index(keys, unique=True)
+    except Exception as e:
+        print(f"[INDEX] spendings (user_id, spent_at) unique 인덱스 생성 실패 (중복 문서 확인 필요): {e}")
+        try:
+            await col.create_index(keys)
+        except Exception:
+            pass
+
+
 @app.on_event("startup")
 async def on_startup():
-    # 서버 시작 시 MongoDB 연결
+    # 서버 시작 시 MongoDB 연결 / 공용 외부 HTTP 클라이언트 생성
     await connect_to_mongo()
+    await http_client.start()
     # 필수 인덱스 준비 (이메일 unique)
     from database import collections
 
     cols = collections()
-    try:
-        await cols["users"].create_index("email", unique=True)
-        await cols["spendings"].create_index([("user_id", 1), ("spent_at", 1)], unique=False)
-        await cols["weekly_reports"].create_index([("user_id", 1), ("week_start", 1), ("week_end", 1)], unique=True)
-        await cols["monthly_profiles"].create_index([("user_id", 1), ("month", 1)], unique=True)
-    except Exception:
-        # 인덱스 에러는 서비스 구동에 치명적이지 않으므로 로깅만
-        pass
+    indexes = [
+        (cols["users"], "email", {"unique": True}),
+        (cols["weekly_reports"], [("user_id", 1), ("week_start", 1), ("week_end", 1)], {"unique": True}),
+        (cols["monthly_profiles"], [("user_id", 1), ("month", 1)], {"unique": True}),
+        (cols["monthly_rollups"], [("user_id", 1), ("month", 1)], {"unique": True}),
+        # 항목 단위 수정/삭제 (items.id 조회)
+        (cols["spendings"], [("user_id", 1), ("items.id", 1)], {}),
+        (
+            cols["classification_cache"],
+            "updated_at",
+            {"expireAfterSeconds": CLASSIFY_CACHE_TTL_DAYS * 24 * 3600},
+        ),
+        # GPT 응답 캐시: 항목별 expires_at 시각에 삭제
+        (cols["gpt_cache"], "expires_at", {"expireAfterSeconds": 0}),
+        (cols["enrichment_jobs"], [("status", 1), ("run_after", 1)], {}),
+        # 완료된 작업은 7일 뒤 자동 삭제 (dead 작업은 확인용으로 남김)
+        (
+            cols["enrichment_jobs"],
+            "updated_at",
+            {"expireAfterSeconds": 7 * 24 * 3600, "partialFilterExpression": {"status": "done"}},
+        ),
+        # 끝난 CSV 가져오기 작업 상태는 7일 뒤 자동 삭제
+        (
+            cols["import_jobs"],
+            "updated_at",
+            {"expireAfterSeconds": 7 * 24 * 3600, "partialFilterExpression": {"status": "done"}},
+        ),
+    ]
+    for col, keys, opts in indexes:
+        try:
+            await col.create_index(keys, **opts)
+        except Exception as e:
+            # 인덱스 에러는 서비스 구동에 치명적이지 않으므로 로깅만
+            print(f"[INDEX] {col.name} {keys}: {e}")
+    await _ensure_spendings_unique_index(cols["spendings"])
+    # 기존 데이터 일별 rollup 맞추기 (한 번만, 끝날 때까지 월간 조회는 items 기준으로 계산)
+    start_rollup_backfill()
+    # 비동기 분류 워커 (ENRICHMENT_MODE=async 일 때만)
+    start_enrichment_workers()
+    # 지수 요약 / 주간 헤드라인 캐시 백그라운드 갱신
+    start_market_refresher()
+    start_news_refresher()
 
 
 @app.on_event("shutdown")
 async def on_shutdown():
+    await stop_market_refresher()
+    await stop_news_refresher()
+    await stop_enrichment_workers()
+    await stop_daily_comment()
+    await stop_report_refreshes()
+    await stop_imports()
+    await stop_rollup_backfill()
     # 서버 종료 시 연결 닫기
+    await http_client.aclose()
+    password_hashing.shutdown()
     await close_mongo_connection()
 
 
@@ -80,3 +164,17 @@ app.include_router(insights_router)
 @app.get("/")
 async def root():
     return {"status": "ok", "service": "spendWallet"}
+
+
+@app.get("/api/metrics")
+async def metrics():
+    """운영 지표 (캐시 히트율 등)"""
+    return {
+        "classification_cache": classification_cache_stats(),
+        "gpt_cache": gpt_cache_stats(),
+        "llm_breaker": llm_stats(),
+        "daily_comment": daily_comment_stats(),
+        "http": http_client.stats(),
+        "password_hashing": password_hashing.stats(),
+        "auth_cache": auth_stats(),
+    }
@@ -0,0 +1,118 @@
+"""비밀번호 해시/검증을 이벤트 루프 밖에서 실행
+
+bcrypt 한 번에 수십~수백 ms CPU를 쓰므로 async 핸들러에서 바로 호출하면
+그동안 다른 모든 요청이 멈춥니다. 여기서는 전용 스레드 풀에서 실행합니다.
+(bcrypt는 해시 계산 중 GIL을 놓기 때문에 스레드만으로도 코어 수만큼 병렬 처리됨)
+
+- PASSWORD_POOL_SIZE (기본 min(4, CPU 수)): 동시에 계산하는 해시 수
+- PASSWORD_MAX_QUEUE (기본 256): 대기열이 이보다 길면 PasswordPoolBusy (→ 503)
+- BCRYPT_ROUNDS (기본 12): 새 해시의 cost
+- PASSWORD_REHASH=1: 로그인 성공 시 cost가 바뀐 해시를 새 cost로 다시 저장 (기본 꺼짐)
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+
+
+PASSWORD_POOL_SIZE = int(os.getenv("PASSWORD_POOL_SIZE", str(min(4, os.cpu_count() or 1))))
+PASSWORD_MAX_QUEUE = int(os.getenv("PASSWORD_MAX_QUEUE", "256"))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_REHASH = os.getenv("PASSWORD_REHASH", "0") == "1"
+
+pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_POOL_SIZE, thread_name_prefix="bcrypt")
+_semaphore: Optional[asyncio.Semaphore] = None
+_stats: Dict[str, float] = {
+    "hashes": 0,
+    "verifies": 0,
+    "rehashes": 0,
+    "rejected": 0,
+    "waiting": 0,
+    "running": 0,
+    "max_waiting": 0,
+    "wait_ms_total": 0.0,
+}
+
+
+class PasswordPoolBusy(RuntimeError):
+    """해시 대기열이 가득 참"""
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(PASSWORD_POOL_SIZE)
+    return _semaphore
+
+
+async def _run(fn, *args):
+    if _stats["waiting"] >= PASSWORD_MAX_QUEUE:
+        _stats["rejected"] += 1
+        raise PasswordPoolBusy("password hashing queue is full")
+
+    queued_at = time.perf_counter()
+    _stats["waiting"] += 1
+    _stats["max_waiting"] = max(_stats["max_waiting"], _stats["waiting"])
+    try:
+        await _get_semaphore().acquire()
+    finally:
+        _stats["waiting"] -= 1
+    _stats["wait_ms_total"] += (time.perf_counter() - queued_at) * 1000
+
+    _stats["running"] += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+    finally:
+        _stats["running"] -= 1
+        _get_semaphore().release()
+
+
+async def hash_password(password: str) -> str:
+    hashed = await _run(pwd_ctx.hash, password)
+    _stats["hashes"] += 1
+    return hashed
+
+
+async def verify_password(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    """(일치 여부, 새 해시) 반환
+
+    새 해시는 PASSWORD_REHASH가 켜져 있고 저장된 해시의 cost가 현재 설정과 다를 때만 채워집니다.
+    """
+    if not password_hash:
+        return False, None
+    if PASSWORD_REHASH:
+        ok, new_hash = await _run(pwd_ctx.verify_and_update, password, password_hash)
+    else:
+        ok, new_hash = await _run(pwd_ctx.verify, password, password_hash), None
+    _stats["verifies"] += 1
+    if new_hash:
+        _stats["rehashes"] += 1
+    return ok, new_hash
+
+
+def shutdown() -> None:
+    _executor.shutdown(wait=False, cancel_futures=True)
+
+
+def stats() -> Dict:
+    done = _stats["hashes"] + _stats["verifies"]
+    avg_wait = _stats["wait_ms_total"] / done if done else 0.0
+    return {
+        "pool_size": PASSWORD_POOL_SIZE,
+        "rounds": BCRYPT_ROUNDS,
+        "hashes": int(_stats["hashes"]),
+        "verifies": int(_stats["verifies"]),
+        "rehashes": int(_stats["rehashes"]),
+        "rejected": int(_stats["rejected"]),
+        "queue_depth": int(_stats["waiting"]),
+        "running": int(_stats["running"]),
+        "max_queue_depth": int(_stats["max_waiting"]),
+        "wait_ms_avg": round(avg_wait, 1),
+    }
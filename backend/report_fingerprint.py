@@ -0,0 +1,72 @@
+"""저장된 AI 리포트(주간 코멘트/월간 프로필)를 다시 만들지 판단
+
+총액이 1원만 바뀌어도 GPT를 다시 부르지 않도록, 리포트를 만들 때의
+카테고리 분포를 지문(fingerprint)으로 저장해 두고 의미 있게 달라졌을 때만 재생성합니다.
+
+fingerprint = {"total": 총액, "shares": {카테고리: 비중(0~1)}}
+
+재생성 조건 (둘 중 하나라도 넘으면)
+- 분포 거리: 두 비중 벡터의 total variation distance (0~1, 절반의 L1 거리)
+- 총액 상대 변화: |새 총액 - 이전 총액| / 이전 총액
+
+임계값은 리포트 종류별 환경 변수로 조정합니다.
+- REPORT_WEEKLY_MAX_DISTANCE (기본 0.10), REPORT_WEEKLY_MAX_REL_CHANGE (기본 0.15)
+- REPORT_MONTHLY_MAX_DISTANCE (기본 0.08), REPORT_MONTHLY_MAX_REL_CHANGE (기본 0.10)
+"""
+from __future__ import annotations
+
+import os
+from typing import Dict, NamedTuple, Optional
+
+
+class Thresholds(NamedTuple):
+    distance: float
+    relative_change: float
+
+
+THRESHOLDS: Dict[str, Thresholds] = {
+    "weekly": Thresholds(
+        distance=float(os.getenv("REPORT_WEEKLY_MAX_DISTANCE", "0.10")),
+        relative_change=float(os.getenv("REPORT_WEEKLY_MAX_REL_CHANGE", "0.15")),
+    ),
+    "monthly": Thresholds(
+        distance=float(os.getenv("REPORT_MONTHLY_MAX_DISTANCE", "0.08")),
+        relative_change=float(os.getenv("REPORT_MONTHLY_MAX_REL_CHANGE", "0.10")),
+    ),
+}
+
+
+def fingerprint(totals: Dict[str, int]) -> Dict:
+    """카테고리별 합계 → {total, shares}"""
+    total = sum(int(v) for v in totals.values() if int(v) > 0)
+    shares = {k: round(int(v) / total, 4) for k, v in totals.items() if total and int(v) > 0}
+    return {"total": total, "shares": shares}
+
+
+def distance(a: Dict[str, float], b: Dict[str, float]) -> float:
+    """두 비중 벡터의 total variation distance (0: 같음, 1: 전혀 겹치지 않음)"""
+    return 0.5 * sum(abs(a.get(k, 0.0) - b.get(k, 0.0)) for k in set(a) | set(b))
+
+
+def relative_change(old_total: int, new_total: int) -> float:
+    if old_total <= 0:
+        return 0.0 if new_total <= 0 else float("inf")
+    return abs(new_total - old_total) / old_total
+
+
+def needs_refresh(kind: str, doc: Optional[Dict], totals: Dict[str, int]) -> bool:
+    """저장된 리포트 doc을 현재 합계 기준으로 다시 만들어야 하는지
+
+    fingerprint가 없는 예전 문서는 기존처럼 총액이 정확히 같을 때만 재사용합니다.
+    """
+    if not doc:
+        return True
+    new = fingerprint(totals)
+    old = doc.get("fingerprint")
+    if not old:
+        return doc.get("total_amount") != new["total"]
+
+    limits = THRESHOLDS[kind]
+    if relative_change(int(old.get("total", 0)), new["total"]) > limits.relative_change:
+        return True
+    return distance(old.get("shares") or {}, new["shares"]) > limits.distance
@@ -0,0 +1,221 @@
+"""쓰기 시점 집계(rollup) 유지
+
+리포트 조회가 저장보다 훨씬 잦으므로, 합계를 저장 시점에 미리 계산해 둡니다.
+
+- spendings 일별 문서: category_totals / tag_totals 맵 (항목 금액 합계)
+- monthly_rollups 컬렉션: (user_id, month) 당 문서 1개
+  {user_id, month(YYYY-MM), category_totals, tag_totals, total_amount,
+   complete, version, writing, writing_at, updated_at}
+  저장/교체/삭제 시 일별 맵의 변화량(delta)을 $inc로 반영합니다.
+
+월간 문서는 complete로 표시된 것만 믿습니다. 배포 전 데이터가 있는 달은 첫 delta가
+빈 문서에 더해지므로(complete 없음), 조회 시 그 달 일별 문서의 items로 다시 계산해 채웁니다.
+- 일별 문서를 쓰는 쪽은 `month_writes()` 안에서 씀: 시작할 때 writing/version을 올리고
+  끝나면 writing을 내림
+- 채우기는 읽을 때의 version이 그대로이고 쓰는 중인 요청이 없을 때만 조건부로 저장
+  → 채우는 동안 들어온 저장이 있으면 이번에는 계산값만 돌려주고 다음 조회 때 다시 채움
+
+일별 rollup 필드는 앱 시작 시 `scheduler.backfill_rollups`가 한 번 items 기준으로 맞춥니다
+(수동: `python -m scheduler.backfill_rollups`). 그게 끝나기 전에는 월간 문서를 채우지 않고
+조회가 일별 문서로 폴백합니다.
+"""
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, Iterable, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+from database import collections
+
+
+Totals = Tuple[Dict[str, int], Dict[str, int]]
+
+# 일별 rollup 맞추기(scheduler.backfill_rollups)의 job_checkpoints 문서 id
+# (항목 id 채우기가 추가되어 v2: 이미 끝난 배포에서도 한 번 더 실행)
+DAILY_BACKFILL_ID = "rollups_daily_backfill_v2"
+# writing 표시가 이 시간 넘게 갱신되지 않으면 죽은 요청이 남긴 것으로 보고 무시
+MONTH_WRITE_STALE_SEC = 300
+
+_daily_ready = False
+
+
+def safe_key(key: str) -> str:
+    """Mongo 필드 경로에 쓸 수 없는 문자('.', 앞의 '$') 치환"""
+    return str(key).replace(".", "·").lstrip("$") or "기타"
+
+
+def item_totals(items: Iterable[Dict]) -> Totals:
+    """항목 리스트 → (카테고리별 합계, 태그별 합계)"""
+    cat: Dict[str, int] = {}
+    tag: Dict[str, int] = {}
+    for it in items:
+        amt = int(it.get("amount", 0) or 0)
+        c = safe_key(it.get("category") or "기타")
+        cat[c] = cat.get(c, 0) + amt
+        for t in it.get("tags", []) or []:
+            t = safe_key(t)
+            tag[t] = tag.get(t, 0) + amt
+    return cat, tag
+
+
+def daily_fields(items: Iterable[Dict]) -> Dict[str, Dict[str, int]]:
+    """일별 문서 $set 에 넣을 rollup 필드"""
+    cat, tag = item_totals(items)
+    return {"category_totals": cat, "tag_totals": tag}
+
+
+def doc_totals(doc: Dict | None) -> Totals:
+    """일별 문서에 저장된 rollup (없으면 items로 계산)"""
+    if not doc:
+        return {}, {}
+    if "category_totals" in doc:
+        return dict(doc.get("category_totals") or {}), dict(doc.get("tag_totals") or {})
+    return item_totals(doc.get("items") or [])
+
+
+def _diff(new: Dict[str, int], old: Dict[str, int]) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for k in set(new) | set(old):
+        d = int(new.get(k, 0)) - int(old.get(k, 0))
+        if d:
+            out[k] = d
+    return out
+
+
+def diff_totals(old: Totals, new: Totals) -> Totals:
+    """rollup이 old → new로 바뀐 변화량 (0인 키 제외)"""
+    return _diff(new[0], old[0]), _diff(new[1], old[1])
+
+
+def inc_paths(cat: Dict[str, int], tag: Dict[str, int]) -> Dict[str, int]:
+    """rollup 맵 변화량 → $inc 에 쓸 필드 경로 dict"""
+    inc = {f"category_totals.{k}": v for k, v in cat.items()}
+    inc.update({f"tag_totals.{k}": v for k, v in tag.items()})
+    return inc
+
+
+@asynccontextmanager
+async def month_writes(user_id: str, months: Iterable[str]) -> AsyncIterator[None]:
+    """그 달들의 일별 문서를 쓰는 동안 monthly_rollups에 '쓰는 중' 표시
+    (채우기가 이 사이에 읽은 일별 문서로 월간 문서를 덮어쓰지 않도록)
+
+    안에서 예외가 나면 일별 문서만 바뀌고 delta는 빠졌을 수 있으므로
+    그 달의 complete를 지워 다음 조회 때 다시 채우게 합니다."""
+    col = collections()["monthly_rollups"]
+    months = sorted({m[:7] for m in months})
+    for month in months:
+        await col.update_one(
+            {"user_id": user_id, "month": month},
+            {"$inc": {"writing": 1, "version": 1}, "$set": {"writing_at": datetime.utcnow()}},
+            upsert=True,
+        )
+    end: Dict = {"$inc": {"writing": -1}}
+    try:
+        yield
+    except BaseException:
+        end["$unset"] = {"complete": ""}
+        raise
+    finally:
+        for month in months:
+            await col.update_one({"user_id": user_id, "month": month}, end)
+
+
+async def apply_month_delta(user_id: str, spent_at: str, old: Totals, new: Totals) -> None:
+    """일별 rollup이 old → new로 바뀐 만큼 monthly_rollups에 $inc"""
+    cat_delta, tag_delta = diff_totals(old, new)
+    total_delta = sum(new[0].values()) - sum(old[0].values())
+    if not cat_delta and not tag_delta and not total_delta:
+        return
+
+    inc: Dict[str, int] = {"total_amount": total_delta, **inc_paths(cat_delta, tag_delta)}
+    await collections()["monthly_rollups"].update_one(
+        {"user_id": user_id, "month": spent_at[:7]},
+        {"$inc": inc, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True,
+    )
+
+
+def _positive(d: Dict | None) -> Dict[str, int]:
+    # 감소로 0이 된 키는 제외
+    return {k: int(v) for k, v in (d or {}).items() if int(v) > 0}
+
+
+def _add(acc: Dict[str, int], src: Dict[str, int]) -> None:
+    for k, v in src.items():
+        acc[k] = acc.get(k, 0) + int(v)
+
+
+async def _month_totals_from_days(user_id: str, month: str) -> Totals:
+    """그 달 일별 문서들의 items로 합계 계산 (아직 채워지지 않은 달)"""
+    cat: Dict[str, int] = {}
+    tag: Dict[str, int] = {}
+    cur = collections()["spendings"].find(
+        {"user_id": user_id, "spent_at": {"$gte": f"{month}-01", "$lte": f"{month}-31"}},
+        {"items.amount": 1, "items.category": 1, "items.tags": 1},
+    )
+    async for doc in cur:
+        day_cat, day_tag = item_totals(doc.get("items") or [])
+        _add(cat, day_cat)
+        _add(tag, day_tag)
+    return _positive(cat), _positive(tag)
+
+
+def _writing(doc: Dict, now: datetime) -> bool:
+    """쓰는 중인 요청이 있는지 (오래된 표시는 무시)"""
+    if int(doc.get("writing") or 0) <= 0:
+        return False
+    at = doc.get("writing_at")
+    return at is None or now - at < timedelta(seconds=MONTH_WRITE_STALE_SEC)
+
+
+async def _seed_month(user_id: str, month: str) -> Totals:
+    """일별 문서로 그 달 합계를 계산하고, 그 사이 저장이 없었으면 complete로 저장"""
+    col = collections()["monthly_rollups"]
+    key = {"user_id": user_id, "month": month}
+    doc = await col.find_one(key, {"version": 1, "writing": 1, "writing_at": 1})
+    now = datetime.utcnow()
+    if doc and _writing(doc, now):
+        return await _month_totals_from_days(user_id, month)
+
+    cat, tag = await _month_totals_from_days(user_id, month)
+    fields = {
+        "category_totals": cat,
+        "tag_totals": tag,
+        "total_amount": sum(cat.values()),
+        "complete": True,
+        "updated_at": now,
+    }
+    if doc is None:
+        try:
+            # 그 사이 저장이 문서를 만들었으면 아무것도 바꾸지 않음
+            await col.update_one(key, {"$setOnInsert": {**fields, "version": 0, "writing": 0}}, upsert=True)
+        except DuplicateKeyError:
+            pass
+    else:
+        # 읽은 뒤 month_writes가 시작됐으면 version이 달라져 저장하지 않음
+        await col.update_one({"_id": doc["_id"], "version": doc.get("version")}, {"$set": fields})
+    return cat, tag
+
+
+async def _daily_rollups_ready() -> bool:
+    """일별 rollup 맞추기가 끝났는지 (끝난 뒤에는 다시 조회하지 않음)"""
+    global _daily_ready
+    if not _daily_ready:
+        ckpt = await collections()["job_checkpoints"].find_one({"_id": DAILY_BACKFILL_ID}, {"done": 1})
+        _daily_ready = bool(ckpt and ckpt.get("done"))
+    return _daily_ready
+
+
+async def month_totals(user_id: str, month: str) -> Totals:
+    """monthly_rollups 문서 하나로 (카테고리별, 태그별) 합계 반환
+    (complete가 아닌 달은 일별 문서로 계산해 채움)"""
+    doc = await collections()["monthly_rollups"].find_one(
+        {"user_id": user_id, "month": month}, {"category_totals": 1, "tag_totals": 1, "complete": 1}
+    )
+    if doc and doc.get("complete"):
+        return _positive(doc.get("category_totals")), _positive(doc.get("tag_totals"))
+    if not await _daily_rollups_ready():
+        return await _month_totals_from_days(user_id, month)
+    return await _seed_month(user_id, month)
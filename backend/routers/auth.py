@@ -6,6 +6,7 @@
 - POST /api/auth/logout -> {ok: true}
 
 JWT 기반 토큰. 프론트는 Authorization: Bearer <token> 로 전송.
+bcrypt 해시/검증은 password_hashing의 스레드 풀에서 실행 (이벤트 루프를 막지 않음)
 """
 from __future__ import annotations
 
@@ -15,15 +16,14 @@ from typing import Optional
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, EmailStr
-from passlib.context import CryptContext
 import jwt
 
 from database import collections
+from password_hashing import PasswordPoolBusy, hash_password, verify_password
 
 
 JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret-change-me")
 JWT_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRE_MINUTES", "120"))
-pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 class SignupReq(BaseModel):
@@ -59,10 +59,15 @@ async def signup(body: SignupReq):
     if exists:
         raise HTTPException(status_code=409, detail="Email already registered")
 
+    try:
+        password_hash = await hash_password(body.password)
+    except PasswordPoolBusy:
+        raise HTTPException(status_code=503, detail="Too many requests, please retry")
+
     user_doc = {
         "email": body.email,
         "display_name": body.display_name,
-        "password_hash": pwd_ctx.hash(body.password),
+        "password_hash": password_hash,
         "created_at": datetime.utcnow(),
     }
     res = await col.insert_one(user_doc)
@@ -77,8 +82,20 @@ async def signup(body: SignupReq):
 async def login(body: LoginReq):
     col = collections()["users"]
     user = await col.find_one({"email": body.email})
-    if not user or not pwd_ctx.verify(body.password, user.get("password_hash", "")):
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    try:
+        ok, new_hash = await verify_password(body.password, user.get("password_hash", ""))
+    except PasswordPoolBusy:
+        raise HTTPException(status_code=503, detail="Too many requests, please retry")
+    if not ok:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        # cost 설정이 바뀐 해시는 새 cost로 교체 (PASSWORD_REHASH=1)
+        await col.update_one(
+            {"_id": user["_id"], "password_hash": user.get("password_hash")},
+            {"$set": {"password_hash": new_hash}},
+        )
     token = _create_token(str(user["_id"]), user["email"])
     return {
         "access_token": token,
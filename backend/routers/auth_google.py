@@ -9,6 +9,7 @@ import jwt
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import RedirectResponse
 
+import http_client
 from database import collections
 from routers.auth import _create_token
 
@@ -54,8 +55,9 @@ async def google_callback(code: str, request: Request):
     "grant_type": "authorization_code",
   }
 
-  async with httpx.AsyncClient() as client:
-    token_res = await client.post(token_url, data=data)
+  # 공용 클라이언트의 커넥션 풀 재사용 (로그인마다 TLS 연결을 새로 맺지 않음)
+  try:
+    token_res = await http_client.post("google", token_url, data=data)
     token_res.raise_for_status()
     token_json = token_res.json()
 
@@ -64,12 +66,16 @@ async def google_callback(code: str, request: Request):
       raise HTTPException(status_code=400, detail="Failed to get access token from Google")
 
     # 구글 사용자 정보 가져오기
-    userinfo_res = await client.get(
+    userinfo_res = await http_client.get(
+      "google",
       "https://www.googleapis.com/oauth2/v3/userinfo",
       headers={"Authorization": f"Bearer {access_token_google}"},
     )
     userinfo_res.raise_for_status()
     userinfo = userinfo_res.json()
+  except httpx.HTTPError as e:
+    print(f"[GOOGLE] oauth request failed: {e}")
+    raise HTTPException(status_code=502, detail="Google OAuth request failed")
 
   email = userinfo.get("email")
   name = userinfo.get("name") or "사용자"
@@ -1,44 +1,58 @@
+"""Insights 라우터
+
+- GET /api/insights/week_news?user_id : 이번 주 뉴스 분위기 + 대표 소비 카테고리 인사이트
+
+헤드라인은 사용자 요청마다 NewsAPI를 부르지 않고, 백그라운드 갱신 작업이
+NEWS_REFRESH_SEC(기본 6시간)마다 한 번 받아 메모리와 Mongo(news_headlines, 주 단위 키)에 저장합니다.
+주는 Asia/Seoul 기준(월요일 0시 시작)입니다. 새 주가 시작되어 이번 주 헤드라인이 아직 없으면
+지난 주 헤드라인을 stale=True로 주고 갱신만 깨웁니다. 저장된 헤드라인이 하나도 없을 때
+(처음 배포)만 요청이 첫 갱신을 최대 NEWS_FIRST_FILL_SEC(기본 10초) 기다립니다.
+(kr business → kr 전체 → everything 전략 순서는 갱신 작업에서만 실행)
+"""
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime, timedelta
 import os
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
 
-import requests
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 
+import http_client
+from aggregations import top_category
+from auth_deps import CurrentUser, get_current_user, resolve_user_id
 from database import collections
-from ai_service import _call_gpt
+from ai_service import _call_gpt_async
 
 router = APIRouter(prefix="/api/insights", tags=["insights"])
 
+NEWS_REFRESH_SEC = int(os.getenv("NEWS_REFRESH_SEC", str(6 * 3600)))
+NEWS_FIRST_FILL_SEC = float(os.getenv("NEWS_FIRST_FILL_SEC", "10"))
+
+# 주 단위 키 → {"headlines": [...], "fetched_at": datetime} (가장 최근 주 하나만 보관)
+_headlines_cache: Dict[str, Dict] = {}
+_refresh_lock = asyncio.Lock()
+_refresher: asyncio.Task | None = None
+# 요청이 깨운 한 번짜리 갱신 (참조를 들고 있어야 GC되지 않고 예외도 기록됨)
+_kick: asyncio.Task | None = None
+
 
 async def _get_user_top_category_this_week(user_id: str) -> str:
     """최근 7일 기준 대표 소비 카테고리 한 개를 반환."""
-    spend_col = collections()["spendings"]
-
     end_dt = datetime.utcnow()
     start_dt = end_dt - timedelta(days=7)
     start, end = start_dt.strftime("%Y-%m-%d"), end_dt.strftime("%Y-%m-%d")
 
-    cur = spend_col.find({"user_id": user_id, "spent_at": {"$gte": start, "$lte": end}})
-    cat_sum: Dict[str, int] = {}
-    async for d in cur:
-        for it in d.get("items", []):
-            cat = (it.get("category") or "기타")
-            cat_sum[cat] = cat_sum.get(cat, 0) + int(it.get("amount", 0) or 0)
-
-    if not cat_sum:
-        return "기본 생활비"
-
-    # 가장 금액이 큰 카테고리 하나
-    return max(cat_sum.items(), key=lambda x: x[1])[0]
+    # 가장 금액이 큰 카테고리 하나 (서버 측 집계)
+    top = await top_category(user_id, start, end)
+    return top or "기본 생활비"
 
 
-def _request_articles(url: str, params: Dict[str, str]) -> List[Dict[str, str]]:
+async def _request_articles(url: str, params: Dict[str, str]) -> List[Dict[str, str]]:
     """NewsAPI에서 기사 {title,url} 리스트를 가져온다. 실패하면 빈 리스트."""
     try:
-        res = requests.get(url, params=params, timeout=5)
+        res = await http_client.get("newsapi", url, params=params)
         res.raise_for_status()
         data = res.json()
     except Exception as e:
@@ -63,13 +77,16 @@ def _request_articles(url: str, params: Dict[str, str]) -> List[Dict[str, str]]:
     return result
 
 
-def _fetch_headlines(api_key: str) -> List[Dict[str, str]]:
-    """여러 전략으로 한국어 경제/일반 뉴스를 시도해서 최대 3개의 헤드라인을 반환."""
+async def _fetch_headlines(api_key: str) -> List[Dict[str, str]]:
+    """여러 전략으로 한국어 경제/일반 뉴스를 시도해서 최대 3개의 헤드라인을 반환.
+
+    갱신 작업(refresh_headlines)에서만 호출한다.
+    """
     base_top = "https://newsapi.org/v2/top-headlines"
     base_everything = "https://newsapi.org/v2/everything"
 
     # 1) 한국 비즈니스 헤드라인
-    arts = _request_articles(
+    arts = await _request_articles(
         base_top,
         {
             "country": "kr",
@@ -82,7 +99,7 @@ def _fetch_headlines(api_key: str) -> List[Dict[str, str]]:
         return arts[:3]
 
     # 2) 한국 전체 헤드라인 (카테고리 제한 없음)
-    arts = _request_articles(
+    arts = await _request_articles(
         base_top,
         {
             "country": "kr",
@@ -94,7 +111,7 @@ def _fetch_headlines(api_key: str) -> List[Dict[str, str]]:
         return arts[:3]
 
     # 3) everything 검색으로 한국어 경제/소비 관련 키워드
-    arts = _request_articles(
+    arts = await _request_articles(
         base_everything,
         {
             "q": "경제 OR 물가 OR 소비 OR 기술",
@@ -107,24 +124,164 @@ def _fetch_headlines(api_key: str) -> List[Dict[str, str]]:
     return arts[:3]
 
 
+def _week_key(dt: datetime | None = None) -> str:
+    """ISO 주 키 (Asia/Seoul 날짜 기준)"""
+    year, week, _ = (dt or datetime.now(ZoneInfo("Asia/Seoul"))).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def _is_fresh(entry: Dict | None) -> bool:
+    fetched_at = (entry or {}).get("fetched_at")
+    return bool(fetched_at) and (datetime.utcnow() - fetched_at).total_seconds() < NEWS_REFRESH_SEC
+
+
+async def refresh_headlines(force: bool = False) -> None:
+    """이번 주 헤드라인을 NewsAPI에서 받아 메모리/Mongo 캐시에 저장.
+
+    다른 프로세스가 이미 최근에 받아 Mongo에 저장했다면 그것을 가져다 쓴다.
+    """
+    api_key = os.getenv("NEWS_API_KEY")
+    if not api_key or _refresh_lock.locked():
+        return
+    async with _refresh_lock:
+        week_key = _week_key()
+        col = collections()["news_headlines"]
+        doc = await col.find_one({"_id": week_key})
+        if doc and _is_fresh(doc) and not force:
+            _headlines_cache.clear()
+            _headlines_cache[week_key] = doc
+            return
+
+        headlines = await _fetch_headlines(api_key)
+        if not headlines:
+            # 실패 시 기존 캐시 유지
+            return
+        entry = {"headlines": headlines, "fetched_at": datetime.utcnow()}
+        _headlines_cache.clear()
+        _headlines_cache[week_key] = entry
+        await col.update_one({"_id": week_key}, {"$set": entry}, upsert=True)
+
+
+async def _refresh_once() -> None:
+    """한 번 갱신 (다른 갱신이 진행 중이면 그게 끝날 때까지 기다림)"""
+    if _refresh_lock.locked():
+        async with _refresh_lock:
+            return
+    await refresh_headlines()
+
+
+def _log_kick_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        print(f"[NEWS] refresh error: {task.exception()}")
+
+
+def _trigger_refresh() -> asyncio.Task:
+    """한 번짜리 갱신 작업 (이미 진행 중이면 그 작업)"""
+    global _kick
+    if _kick is None or _kick.done():
+        _kick = asyncio.create_task(_refresh_once())
+        _kick.add_done_callback(_log_kick_error)
+    return _kick
+
+
+async def _latest_entry() -> Dict | None:
+    """이번 주 것이 없을 때 쓸 가장 최근 주의 헤드라인 (메모리 → Mongo)"""
+    if _headlines_cache:
+        return _headlines_cache[max(_headlines_cache)]
+    return await collections()["news_headlines"].find_one({}, sort=[("_id", -1)])
+
+
+async def _cached_headlines(week_key: str) -> Tuple[List[Dict[str, str]], bool]:
+    """메모리 → Mongo 순으로 이번 주 헤드라인 조회. (헤드라인, stale 여부) 반환
+
+    - 오래됐거나 이번 주 것이 없으면 기다리지 않고 갱신만 트리거 (지난 주 헤드라인을 stale로)
+    - 저장된 헤드라인이 전혀 없을 때만 첫 갱신을 NEWS_FIRST_FILL_SEC까지 기다림
+    """
+    entry = _headlines_cache.get(week_key)
+    if entry is None:
+        entry = await collections()["news_headlines"].find_one({"_id": week_key})
+        if entry:
+            _headlines_cache.clear()
+            _headlines_cache[week_key] = entry
+    if entry is not None:
+        stale = not _is_fresh(entry)
+        if stale and not _refresh_lock.locked():
+            # 갱신이 늦어진 경우: 기다리지 않고 갱신만 트리거
+            _trigger_refresh()
+        return list(entry.get("headlines") or []), stale
+
+    previous = await _latest_entry()
+    refresh = _trigger_refresh()
+    if previous is not None:
+        # 새 주 시작: 지난 주 헤드라인으로 응답하고 갱신은 백그라운드에서
+        return list(previous.get("headlines") or []), True
+
+    # 처음 배포 등 저장된 헤드라인이 없음: 빈 헤드라인 대신 첫 갱신을 한 번 기다림
+    try:
+        await asyncio.wait_for(asyncio.shield(refresh), NEWS_FIRST_FILL_SEC)
+    except Exception:
+        # 시간 초과/갱신 실패: 빈 헤드라인으로 응답 (실패는 _log_kick_error가 기록)
+        pass
+    entry = _headlines_cache.get(week_key)
+    return list((entry or {}).get("headlines") or []), entry is None
+
+
+async def _refresh_loop() -> None:
+    while True:
+        try:
+            await refresh_headlines()
+        except Exception as e:
+            print(f"[NEWS] refresh error: {e}")
+        await asyncio.sleep(NEWS_REFRESH_SEC)
+
+
+def start_refresher() -> None:
+    """앱 시작 시 헤드라인 백그라운드 갱신 시작"""
+    global _refresher
+    if _refresher is None or _refresher.done():
+        _refresher = asyncio.create_task(_refresh_loop())
+
+
+async def stop_refresher() -> None:
+    global _refresher, _kick
+    tasks = [t for t in (_refresher, _kick) if t is not None]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _refresher = _kick = None
+
+
 @router.get("/week_news")
-async def get_weekly_news_insight(user_id: str = Query(...)) -> Dict:
+async def get_weekly_news_insight(
+    user_id: Optional[str] = Query(None),
+    user: CurrentUser = Depends(get_current_user),
+) -> Dict:
     """
     이번 주 세계 뉴스 분위기 + 사용자의 대표 소비 카테고리를
     가볍게 엮은 인사이트를 반환한다.
     """
+    user_id = resolve_user_id(user, user_id)
     api_key = os.getenv("NEWS_API_KEY")
     if not api_key:
         raise HTTPException(status_code=500, detail="NEWS_API_KEY is not configured")
 
-    headlines = _fetch_headlines(api_key)
+    # 주 단위 캐시 키 (같은 주/같은 뉴스면 같은 멘트 유지)
+    week_key = _week_key()
+
+    # 공용 캐시의 이번 주 헤드라인 (사용자 요청에서는 NewsAPI를 직접 호출하지 않음)
+    headlines, stale = await _cached_headlines(week_key)
 
     # 이번 주 대표 소비 카테고리
     top_category = await _get_user_top_category_this_week(user_id)
 
-    # 주 단위 캐시 키 (같은 주/같은 뉴스면 같은 멘트 유지)
-    year, week, _ = datetime.utcnow().isocalendar()
-    week_key = f"{year}-W{week:02d}"
+    if not headlines:
+        # 아직 헤드라인이 준비되지 않음: GPT 호출 없이 빈 인사이트
+        return {
+            "headlines": [],
+            "insight": {"summary": "", "mood": "중립"},
+            "top_category": top_category,
+            "stale": stale,
+        }
 
     news_col = collections()["news_insights"]
     existing = await news_col.find_one({"user_id": user_id, "week_key": week_key})
@@ -138,6 +295,7 @@ async def get_weekly_news_insight(user_id: str = Query(...)) -> Dict:
                     "mood": str(insight.get("mood") or "중립"),
                 },
                 "top_category": top_category,
+                "stale": stale,
             }
 
     # GPT에게 분위기 + 소비 카테고리 한 문장 요청
@@ -162,7 +320,7 @@ async def get_weekly_news_insight(user_id: str = Query(...)) -> Dict:
 }}
 """
 
-    raw = _call_gpt(system_prompt, user_prompt, max_tokens=300)
+    raw = await _call_gpt_async(system_prompt, user_prompt, max_tokens=300, cache="news")
 
     insight: Dict = {"summary": "", "mood": "중립"}
     if raw:
@@ -191,5 +349,5 @@ async def get_weekly_news_insight(user_id: str = Query(...)) -> Dict:
     else:
         await news_col.insert_one(doc)
 
-    return {"headlines": headlines, "insight": insight, "top_category": top_category}
+    return {"headlines": headlines, "insight": insight, "top_category": top_category, "stale": stale}
 
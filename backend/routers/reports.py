@@ -4,25 +4,84 @@
 - GET /api/reports/daily?user_id&date=YYYY-MM-DD
 - GET /api/reports/weekly?user_id&week=YYYY-WW (주 시작: 월요일)
 - GET /api/reports/monthly?user_id&month=YYYY-MM
+- GET /api/reports/weekly/stream, /api/reports/monthly/stream : 같은 내용을 SSE로
+  (합계를 먼저 보내고 AI 코멘트는 생성되는 대로 전송)
+(Bearer 토큰의 사용자 기준. user_id는 선택이며 보내면 토큰의 사용자와 같아야 함)
 
 일간: 태그 비율 계산 + 저장된 코멘트 반환
 주간: 카테고리 합계 + 전주 대비 증감률 + AI 코멘트
-월간: 소비자 타입/요약/조언, 월간 합계가 바뀔 때만 재분석
+월간: 소비자 타입/요약/조언
+저장된 코멘트/프로필은 카테고리 분포 지문(report_fingerprint)이 임계값 이상 달라질 때만 재생성
+(AI는 요청당 REPORT_AI_DEADLINE_SEC까지만 기다리고, 넘으면 폴백 문장을 주고 다음 조회 때 재시도)
+
+주간/월간은 stale-while-revalidate: 분포가 크게 바뀌었으면 저장된 코멘트/프로필을 stale=True로
+바로 반환하고(합계 숫자는 최신), 재생성은 백그라운드에서 실행해 저장합니다.
+기간의 첫 리포트만 AI 응답을 기다립니다.
 """
 from __future__ import annotations
 
+import asyncio
+import json
+import os
 from datetime import datetime, timedelta
-from typing import Dict
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
+from aggregations import category_totals_pair
+from auth_deps import CurrentUser, get_current_user, resolve_user_id
 from database import collections
 from schemas import DailyReportResponse, WeeklyReportResponse, MonthlyProfileResponse
-from ai_service import generate_weekly_comment, generate_monthly_profile
+from ai_service import (
+    WEEKLY_FALLBACK_COMMENT,
+    StreamInterrupted,
+    generate_monthly_profile_async,
+    generate_weekly_comment_async,
+    monthly_profile_from_text,
+    stream_monthly_profile,
+    stream_weekly_comment,
+)
+from llm_guard import llm_deadline
+from daily_comment import is_scheduled, mark_stale
+from report_fingerprint import fingerprint, needs_refresh
+from rollups import month_totals
 
 
 router = APIRouter(prefix="/api/reports", tags=["reports"])
 
+# 주간/월간 리포트 요청 하나에서 AI 코멘트 생성에 쓸 최대 시간 (넘으면 폴백 문장)
+REPORT_AI_DEADLINE_SEC = float(os.getenv("REPORT_AI_DEADLINE_SEC", "8"))
+
+# (종류, user_id, 기간) → 진행 중인 백그라운드 재생성
+_refreshing: Dict[Tuple[str, str, str], asyncio.Task] = {}
+
+
+def _refresh_in_background(key: Tuple[str, str, str], regenerate: Callable[[], Awaitable[None]]) -> None:
+    """stale 리포트 재생성을 백그라운드로 실행 (같은 키는 한 번에 하나만)"""
+    running = _refreshing.get(key)
+    if running is not None and not running.done():
+        return
+
+    async def _run() -> None:
+        try:
+            await regenerate()
+        except Exception as e:
+            print(f"[REPORTS] background refresh error {key}: {e}")
+        finally:
+            _refreshing.pop(key, None)
+
+    _refreshing[key] = asyncio.create_task(_run())
+
+
+async def stop_refreshes() -> None:
+    """앱 종료 시 진행 중인 재생성 취소 (다음 조회 때 다시 stale로 감지됨)"""
+    tasks = list(_refreshing.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _refreshing.clear()
+
 
 def _week_range_from_iso(week_str: str) -> tuple[str, str]:
     """입력: YYYY-WW → 월요일 시작 ~ 일요일 종료 날짜 문자열 반환"""
@@ -41,10 +100,16 @@ def _week_range_from_iso(week_str: str) -> tuple[str, str]:
 
 
 @router.get("/daily", response_model=DailyReportResponse)
-async def get_daily_report(user_id: str = Query(...), date: str = Query(...)):
+async def get_daily_report(
+    date: str = Query(...),
+    user_id: Optional[str] = Query(None),
+    user: CurrentUser = Depends(get_current_user),
+):
     """일간 리포트
     - spendings 컬렉션에서 해당 날짜 문서를 찾고 태그 비율/코멘트를 반환.
+    - 코멘트 재생성이 대기 중이면 직전 코멘트와 stale=True를 반환.
     """
+    user_id = resolve_user_id(user, user_id)
     col = collections()["spendings"]
     doc = await col.find_one({"user_id": user_id, "spent_at": date})
     if not doc:
@@ -63,39 +128,40 @@ async def get_daily_report(user_id: str = Query(...), date: str = Query(...)):
     if total > 0:
         chart = {k: v / total for k, v in tag_total.items()}
 
+    stale = bool(doc.get("ai_comment_stale"))
+    enriching = any(it.get("status") == "pending" for it in items)
+    if stale and not enriching and not is_scheduled(user_id, date):
+        # 재시작 등으로 예약이 사라진 경우 다시 예약 (분류 대기 중이면 워커가 예약)
+        mark_stale(user_id, date)
+
     return DailyReportResponse(
         total_amount=int(doc.get("total_amount", total)),
         chart_data=chart,
         ai_comment=doc.get("ai_comment"),
+        stale=stale,
     )
 
 
-@router.get("/weekly", response_model=WeeklyReportResponse)
-async def get_weekly_report(user_id: str = Query(...), week: str = Query(...)):
-    """주간 리포트
-    - 해당 주 범위의 spendings 문서를 합산해 카테고리 totals 계산
-    - 전주 대비 증감률 deltas 계산
-    - AI 코멘트를 생성하고 weekly_reports에 캐시
-    """
-    spend_col = collections()["spendings"]
-    weekly_col = collections()["weekly_reports"]
+class _WeeklyContext(NamedTuple):
+    start: str
+    end: str
+    totals: Dict[str, int]
+    deltas: Dict[str, float]
+    total_amount: int
+    existing: Optional[Dict]
 
+
+async def _weekly_context(user_id: str, week: str) -> _WeeklyContext:
+    """주간 합계/증감률과 저장된 주간 리포트 (AI 호출 전까지의 DB 작업)"""
     start, end = _week_range_from_iso(week)
     prev_start_dt = (datetime.strptime(start, "%Y-%m-%d") - timedelta(days=7))
     prev_end_dt = (datetime.strptime(end, "%Y-%m-%d") - timedelta(days=7))
     prev_start, prev_end = prev_start_dt.strftime("%Y-%m-%d"), prev_end_dt.strftime("%Y-%m-%d")
 
-    async def _aggregate_category_sum(s: str, e: str) -> Dict[str, int]:
-        cur = spend_col.find({"user_id": user_id, "spent_at": {"$gte": s, "$lte": e}})
-        cat_sum: Dict[str, int] = {}
-        async for d in cur:
-            for it in d.get("items", []):
-                cat = (it.get("category") or "기타")
-                cat_sum[cat] = cat_sum.get(cat, 0) + int(it.get("amount", 0))
-        return cat_sum
-
-    this_totals = await _aggregate_category_sum(start, end)
-    prev_totals = await _aggregate_category_sum(prev_start, prev_end)
+    # 이번 주/지난 주 카테고리 합계를 한 번의 집계 쿼리로 계산
+    this_totals, prev_totals = await category_totals_pair(
+        user_id, (start, end), (prev_start, prev_end)
+    )
 
     total_amount = sum(this_totals.values())
 
@@ -109,93 +175,270 @@ async def get_weekly_report(user_id: str = Query(...), week: str = Query(...)):
         else:
             deltas[k] = (a - b) / b
 
-    weekly_col_ref = weekly_col
-    existing = await weekly_col_ref.find_one({"user_id": user_id, "week_start": start, "week_end": end})
+    existing = await collections()["weekly_reports"].find_one(
+        {"user_id": user_id, "week_start": start, "week_end": end}
+    )
+    return _WeeklyContext(start, end, this_totals, deltas, total_amount, existing)
+
 
-    # 총액이 같으면 기존 코멘트를 재사용 (AI 재호출 방지)
-    if existing and existing.get("total_amount") == total_amount:
-        comment = existing.get("comment", "")
+def _weekly_cached_comment(ctx: _WeeklyContext) -> Optional[str]:
+    """분포가 크게 달라지지 않았으면 기존 코멘트를 재사용 (AI 재호출 방지, 폴백 문장이었으면 다시 시도)"""
+    existing = ctx.existing
+    if existing and not existing.get("ai_fallback") and not needs_refresh("weekly", existing, ctx.totals):
+        return existing.get("comment", "")
+    return None
+
+
+async def _save_weekly(user_id: str, ctx: _WeeklyContext, comment: str) -> None:
+    weekly_col = collections()["weekly_reports"]
+    doc = {
+        "user_id": user_id,
+        "week_start": ctx.start,
+        "week_end": ctx.end,
+        "totals": ctx.totals,
+        "deltas": ctx.deltas,
+        "comment": comment,
+        "ai_fallback": comment == WEEKLY_FALLBACK_COMMENT,
+        "total_amount": ctx.total_amount,
+        "fingerprint": fingerprint(ctx.totals),
+        "updated_at": datetime.utcnow(),
+    }
+    if ctx.existing:
+        await weekly_col.update_one({"_id": ctx.existing["_id"]}, {"$set": doc})
     else:
-        summary = {"totals": this_totals, "deltas": deltas, "week": week}
-        comment = generate_weekly_comment(summary)
-        doc = {
-            "user_id": user_id,
-            "week_start": start,
-            "week_end": end,
-            "totals": this_totals,
-            "deltas": deltas,
-            "comment": comment,
-            "total_amount": total_amount,
-            "updated_at": datetime.utcnow(),
-        }
-        if existing:
-            await weekly_col_ref.update_one({"_id": existing["_id"]}, {"$set": doc})
-        else:
-            await weekly_col_ref.insert_one({**doc, "created_at": datetime.utcnow()})
+        await weekly_col.insert_one({**doc, "created_at": datetime.utcnow()})
 
-    return WeeklyReportResponse(totals=this_totals, deltas=deltas, comment=comment, total_amount=total_amount)
 
+@router.get("/weekly", response_model=WeeklyReportResponse)
+async def get_weekly_report(
+    week: str = Query(...),
+    user_id: Optional[str] = Query(None),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """주간 리포트
+    - 해당 주 범위의 spendings 문서를 서버 측 집계로 합산해 카테고리 totals 계산
+    - 전주 대비 증감률 deltas 계산
+    - AI 코멘트를 생성하고 weekly_reports에 캐시
+    """
+    user_id = resolve_user_id(user, user_id)
+    ctx = await _weekly_context(user_id, week)
+    summary = {"totals": ctx.totals, "deltas": ctx.deltas, "week": week}
+
+    comment = _weekly_cached_comment(ctx)
+    stale = False
+    if comment is None and ctx.existing and ctx.existing.get("comment"):
+        # 분포가 크게 바뀜: 이전 코멘트를 바로 주고 새 코멘트는 백그라운드에서 생성
+        comment, stale = ctx.existing["comment"], True
+        _refresh_in_background(
+            ("weekly", user_id, week),
+            lambda: _regenerate_weekly(user_id, ctx, summary),
+        )
+    elif comment is None:
+        # 이 주의 첫 리포트만 AI를 기다림
+        with llm_deadline(REPORT_AI_DEADLINE_SEC):
+            comment = await generate_weekly_comment_async(summary)
+        await _save_weekly(user_id, ctx, comment)
+
+    return WeeklyReportResponse(
+        totals=ctx.totals, deltas=ctx.deltas, comment=comment, total_amount=ctx.total_amount, stale=stale
+    )
 
-@router.get("/monthly", response_model=MonthlyProfileResponse)
-async def get_monthly_profile(user_id: str = Query(...), month: str = Query(...)):
-    """월간 리포트
 
-    - month: YYYY-MM
-    - 월간 소비 총액이 변경될 때만 AI 분석을 다시 수행하고,
-      총액이 같으면 이전에 저장된 월간 타입/코멘트를 재사용한다.
+async def _regenerate_weekly(user_id: str, ctx: _WeeklyContext, summary: Dict) -> None:
+    comment = await generate_weekly_comment_async(summary)
+    await _save_weekly(user_id, ctx, comment)
+
+
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    # 프록시(Nginx/Render)가 이벤트를 모아두지 않도록 버퍼링 끄기
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/weekly/stream")
+async def stream_weekly_report(
+    week: str = Query(...),
+    user_id: Optional[str] = Query(None),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """주간 리포트 SSE 스트리밍
+
+    - event: totals  → {totals, deltas, total_amount} (DB 집계 직후 바로 전송)
+    - event: delta   → {text} AI 코멘트 조각 (여러 번)
+    - event: done    → {comment, fallback} 완성된 코멘트 (weekly_reports에 저장된 값)
+    저장된 코멘트를 재사용할 수 있으면 delta 없이 done만 보냅니다.
+    fallback=true면 AI 대신 폴백 문장이므로 그때까지 받은 delta는 버리고 comment를 표시합니다.
     """
-    spend_col = collections()["spendings"]
-    prof_col = collections()["monthly_profiles"]
+    user_id = resolve_user_id(user, user_id)
+    ctx = await _weekly_context(user_id, week)
+
+    async def events() -> AsyncIterator[str]:
+        yield _sse("totals", {"totals": ctx.totals, "deltas": ctx.deltas, "total_amount": ctx.total_amount})
+
+        comment = _weekly_cached_comment(ctx)
+        if comment is None:
+            summary = {"totals": ctx.totals, "deltas": ctx.deltas, "week": week}
+            parts: List[str] = []
+            try:
+                with llm_deadline(REPORT_AI_DEADLINE_SEC):
+                    async for piece in stream_weekly_comment(summary):
+                        parts.append(piece)
+                        yield _sse("delta", {"text": piece})
+                comment = "".join(parts).strip()
+            except StreamInterrupted:
+                comment = WEEKLY_FALLBACK_COMMENT
+            await _save_weekly(user_id, ctx, comment)
+
+        yield _sse("done", {"comment": comment, "fallback": comment == WEEKLY_FALLBACK_COMMENT})
+
+    return _sse_response(events())
+
 
+class _MonthlyContext(NamedTuple):
+    cat_sum: Dict[str, int]
+    tags_ratio: Dict[str, float]
+    total_amount: int
+    existing: Optional[Dict]
+
+
+async def _monthly_context(user_id: str, month: str) -> _MonthlyContext:
     if len(month) != 7 or month[4] != "-":
         raise HTTPException(status_code=400, detail="Invalid month format, expected YYYY-MM")
-    start = f"{month}-01"
-    end = f"{month}-31"
-
-    # 태그/카테고리 집계
-    tag_sum: Dict[str, int] = {}
-    cat_sum: Dict[str, int] = {}
-    cur = spend_col.find({"user_id": user_id, "spent_at": {"$gte": start, "$lte": end}})
-    async for d in cur:
-        for it in d.get("items", []):
-            amt = int(it.get("amount", 0))
-            cat = (it.get("category") or "기타")
-            cat_sum[cat] = cat_sum.get(cat, 0) + amt
-            for tag in it.get("tags", []) or []:
-                tag_sum[tag] = tag_sum.get(tag, 0) + amt
+
+    # 태그/카테고리 합계 (monthly_rollups 문서 하나만 조회)
+    cat_sum, tag_sum = await month_totals(user_id, month)
 
     total_amt = sum(cat_sum.values())
     tags_ratio = {k: (v / total_amt if total_amt else 0.0) for k, v in tag_sum.items()}
 
-    # 기존 프로필이 있고 총액이 같으면 재사용
-    exists = await prof_col.find_one({"user_id": user_id, "month": month})
-    if exists and exists.get("total_amount") == total_amt:
-        return MonthlyProfileResponse(
-            type=exists.get("type", ""),
-            rationale=exists.get("rationale", ""),
-            advice=exists.get("advice", ""),
-        )
+    exists = await collections()["monthly_profiles"].find_one({"user_id": user_id, "month": month})
+    return _MonthlyContext(cat_sum, tags_ratio, total_amt, exists)
+
+
+def _monthly_response(doc: Dict, total_amount: int, stale: bool = False) -> MonthlyProfileResponse:
+    return MonthlyProfileResponse(
+        type=doc.get("type") or "",
+        rationale=doc.get("rationale") or "",
+        advice=doc.get("advice") or "",
+        total_amount=total_amount,
+        stale=stale,
+    )
+
+
+def _monthly_cached(ctx: _MonthlyContext) -> Optional[MonthlyProfileResponse]:
+    """기존 프로필이 있고 카테고리 분포/총액이 크게 달라지지 않았으면 재사용"""
+    exists = ctx.existing
+    if exists and not exists.get("ai_fallback") and not needs_refresh("monthly", exists, ctx.cat_sum):
+        return _monthly_response(exists, ctx.total_amount)
+    return None
 
-    # 총액이 바뀌었거나 프로필이 없으면 AI로 다시 계산
-    aggregate = {"totals": cat_sum, "tags": tags_ratio, "month": month}
-    prof = generate_monthly_profile(aggregate)
 
+async def _save_monthly(user_id: str, month: str, ctx: _MonthlyContext, prof: Dict) -> MonthlyProfileResponse:
+    prof_col = collections()["monthly_profiles"]
     doc = {
         "user_id": user_id,
         "month": month,
         "type": prof.get("label", prof.get("type")),
         "rationale": prof.get("rationale"),
         "advice": prof.get("advice"),
-        "total_amount": total_amt,
+        "total_amount": ctx.total_amount,
+        "fingerprint": fingerprint(ctx.cat_sum),
         "summary": prof.get("summary"),
         "persona": prof.get("persona"),
+        "ai_fallback": bool(prof.get("fallback")),
         "updated_at": datetime.utcnow(),
     }
-    if exists:
-        await prof_col.update_one({"_id": exists["_id"]}, {"$set": doc})
+    if ctx.existing:
+        await prof_col.update_one({"_id": ctx.existing["_id"]}, {"$set": doc})
     else:
         await prof_col.insert_one({**doc, "created_at": datetime.utcnow()})
 
-    return MonthlyProfileResponse(
-        type=doc["type"], rationale=doc["rationale"], advice=doc["advice"]
-    )
+    return _monthly_response(doc, ctx.total_amount)
+
+
+@router.get("/monthly", response_model=MonthlyProfileResponse)
+async def get_monthly_profile(
+    month: str = Query(...),
+    user_id: Optional[str] = Query(None),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """월간 리포트
+
+    - month: YYYY-MM
+    - 카테고리 분포/총액이 임계값 이상 달라질 때만 AI 분석을 다시 수행하고,
+      아니면 이전에 저장된 월간 타입/코멘트를 재사용한다.
+    """
+    user_id = resolve_user_id(user, user_id)
+    ctx = await _monthly_context(user_id, month)
+
+    cached = _monthly_cached(ctx)
+    if cached is not None:
+        return cached
+
+    aggregate = {"totals": ctx.cat_sum, "tags": ctx.tags_ratio, "month": month}
+    if ctx.existing:
+        # 분포가 크게 바뀜: 이전 프로필을 바로 주고 새 프로필은 백그라운드에서 계산
+        _refresh_in_background(
+            ("monthly", user_id, month),
+            lambda: _regenerate_monthly(user_id, month, ctx, aggregate),
+        )
+        return _monthly_response(ctx.existing, ctx.total_amount, stale=True)
+
+    # 이 달의 첫 리포트만 AI를 기다림
+    with llm_deadline(REPORT_AI_DEADLINE_SEC):
+        prof = await generate_monthly_profile_async(aggregate)
+    return await _save_monthly(user_id, month, ctx, prof)
+
+
+async def _regenerate_monthly(user_id: str, month: str, ctx: _MonthlyContext, aggregate: Dict) -> None:
+    prof = await generate_monthly_profile_async(aggregate)
+    await _save_monthly(user_id, month, ctx, prof)
+
+
+@router.get("/monthly/stream")
+async def stream_monthly_profile_report(
+    month: str = Query(...),
+    user_id: Optional[str] = Query(None),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """월간 리포트 SSE 스트리밍
+
+    - event: totals  → {totals, tags, total_amount} (rollup 조회 직후 바로 전송)
+    - event: delta   → {text} AI 응답 조각 (JSON 텍스트가 생성되는 대로)
+    - event: done    → {type, rationale, advice, fallback} 완성된 프로필 (monthly_profiles에 저장된 값)
+      fallback=true면 AI 응답이 끊기거나 파싱에 실패해 폴백 프로필을 쓴 것
+    """
+    user_id = resolve_user_id(user, user_id)
+    ctx = await _monthly_context(user_id, month)
+
+    async def events() -> AsyncIterator[str]:
+        yield _sse("totals", {"totals": ctx.cat_sum, "tags": ctx.tags_ratio, "total_amount": ctx.total_amount})
+
+        result = _monthly_cached(ctx)
+        if result is None:
+            aggregate = {"totals": ctx.cat_sum, "tags": ctx.tags_ratio, "month": month}
+            parts: List[str] = []
+            try:
+                with llm_deadline(REPORT_AI_DEADLINE_SEC):
+                    async for piece in stream_monthly_profile(aggregate):
+                        parts.append(piece)
+                        yield _sse("delta", {"text": piece})
+            except StreamInterrupted:
+                # 끊긴 JSON 조각은 버리고 폴백 프로필
+                parts = []
+            prof = monthly_profile_from_text(aggregate, "".join(parts).strip())
+            fallback = bool(prof.get("fallback"))
+            result = await _save_monthly(user_id, month, ctx, prof)
+        else:
+            fallback = False
+
+        yield _sse("done", {**result.model_dump(), "fallback": fallback})
+
+    return _sse_response(events())
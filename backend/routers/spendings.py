@@ -3,34 +3,64 @@ Spendings 라우터
 
 기능:
 - POST /api/spendings/bulk : 벌크 입력 + AI 분석 + 일별 문서 upsert
-- GET  /api/spendings       : 날짜 범위 조회 (from, to)
+  (ENRICHMENT_MODE=async면 저장 먼저, AI 분석은 enrichment 워커)
+- PUT  /api/spendings/bulk : 특정 날짜 항목 통째로 교체 (기존 분류 재사용)
+- PATCH  /api/spendings/items/{id} : 항목 하나 수정
+- DELETE /api/spendings/items/{id} : 항목 하나 삭제
+- POST /api/spendings/import : CSV(날짜, 메모, 금액) 가져오기 (분류는 백그라운드, spending_import)
+- GET  /api/spendings/import/{job_id} : 가져오기 진행 상황
+- GET  /api/spendings       : 날짜 범위 조회 (from, to, 선택: limit/cursor 페이지네이션, format=ndjson 스트리밍)
+
+모든 엔드포인트는 Bearer 토큰의 사용자 기준 (user_id를 보내면 토큰의 사용자와 같아야 함)
 
 DB 구조(일별 문서):
 {
   _id, user_id, spent_at(YYYY-MM-DD),
-  items: [{memo, amount, category, tags, confidence}],
-  total_amount, ai_comment, created_at
+  items: [{id, memo, amount, category, tags, confidence, status?}],  # id: 항목 고유 id (ObjectId 문자열)
+  total_amount, category_totals, tag_totals,  # 쓰기 시점 rollup
+  ai_comment, ai_comment_stale, comment_version, created_at
 }
 """
 from __future__ import annotations
 
+import base64
+import codecs
+from collections import Counter
 from datetime import datetime
+import json
+import os
 import re
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException, Query
+from bson import ObjectId
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
+from pymongo import ReturnDocument
 
+from auth_deps import CurrentUser, get_current_user, resolve_user_id
 from database import collections
 from schemas import (
     BulkSpendingsRequest,
-    SpendingDailyDoc,
     SpendingItemAnalyzed,
+    SpendingItemInput,
+    SpendingItemPatch,
 )
-from ai_service import analyze_item, generate_daily_comment
+from ai_service import analyze_items_async
+from classification_cache import cache_key
+from daily_comment import mark_stale, stale_update
+from enrichment import FAILED, PENDING, enqueue_classification, is_async_mode
+from llm_guard import llm_deadline
+from spending_import import get_job as get_import_job, start_import
+from rollups import apply_month_delta, daily_fields, diff_totals, doc_totals, inc_paths, item_totals, month_writes
 
 
 router = APIRouter(prefix="/api/spendings", tags=["spendings"])
 
+# 저장 요청 하나에서 AI 분류에 쓸 최대 시간
+SAVE_AI_DEADLINE_SEC = float(os.getenv("SAVE_AI_DEADLINE_SEC", "10"))
+# 항목 수정 시 읽은 뒤 다른 요청이 같은 항목을 바꿨을 때 다시 시도할 횟수
+ITEM_UPDATE_RETRIES = 3
+
 
 def _today_seoul_str() -> str:
     """오늘 날짜를 Asia/Seoul 기준 YYYY-MM-DD 문자열로 반환 (간단 처리)"""
@@ -56,144 +86,507 @@ def _normalize_date(date_str: str | None) -> str:
     return _today_seoul_str()
 
 
+def _defer_analysis(payload: BulkSpendingsRequest) -> bool:
+    """write-first 모드: 분류는 enrichment 워커에 맡기고 바로 저장할지 여부"""
+    return bool(payload.analyze) and is_async_mode()
+
+
+async def _analyze_items(
+    payload: BulkSpendingsRequest, items: List[SpendingItemInput] | None = None
+) -> List[Dict]:
+    """요청 항목들을 배치로 AI 분석해 DB 저장용 dict 리스트로 변환
+    - items를 주면 그 항목들만 변환합니다 (기본: payload.items 전체).
+    - analyze=False면 카테고리/태그 없이 변환합니다.
+    - write-first 모드면 분석하지 않고 status="pending"으로 변환합니다.
+    """
+    items = payload.items if items is None else items
+    if not items:
+        return []
+    if not payload.analyze:
+        return [
+            SpendingItemAnalyzed(memo=it.memo, amount=it.amount).model_dump(exclude_none=True)
+            for it in items
+        ]
+    if _defer_analysis(payload):
+        return [
+            SpendingItemAnalyzed(memo=it.memo, amount=it.amount, status=PENDING).model_dump(exclude_none=True)
+            for it in items
+        ]
+
+    # OpenAI가 느려도 저장이 오래 걸리지 않도록 AI 시간 제한 (넘으면 키워드 휴리스틱)
+    with llm_deadline(SAVE_AI_DEADLINE_SEC):
+        results = await analyze_items_async([(it.memo, it.amount) for it in items])
+    return [
+        SpendingItemAnalyzed(
+            memo=it.memo,
+            amount=it.amount,
+            category=ai.get("category"),
+            tags=ai.get("tags", []),
+            confidence=ai.get("confidence"),
+        ).model_dump(exclude_none=True)
+        for it, ai in zip(items, results)
+    ]
+
+
+def _match_existing(items: List[SpendingItemInput], existing: List[Dict]) -> List[Dict | None]:
+    """교체 요청 항목마다 짝이 되는 기존 항목 (없으면 None)
+
+    1) 요청 항목에 id가 있으면 같은 id의 기존 항목
+    2) (memo, amount)가 같은 기존 항목
+    3) 정규화한 메모와 금액 구간이 같은, 분류가 끝난 기존 항목 (금액만 바뀐 경우)
+    기존 항목 하나는 한 번만 짝지어집니다.
+    """
+    matched: List[Dict | None] = [None] * len(items)
+    taken: set = set()
+
+    by_id = {prev["id"]: pos for pos, prev in enumerate(existing) if prev.get("id")}
+    for idx, it in enumerate(items):
+        pos = by_id.get(it.id) if it.id else None
+        if pos is not None and pos not in taken:
+            matched[idx] = existing[pos]
+            taken.add(pos)
+
+    exact: Dict[tuple, List[int]] = {}
+    similar: Dict[str, List[int]] = {}
+    for pos, prev in enumerate(existing):
+        if pos in taken:
+            continue
+        exact.setdefault((prev.get("memo"), prev.get("amount")), []).append(pos)
+        if prev.get("status") != PENDING and prev.get("category"):
+            similar.setdefault(cache_key(prev.get("memo") or "", int(prev.get("amount") or 0)), []).append(pos)
+
+    for candidates_of in (
+        lambda it: exact.get((it.memo, it.amount)),
+        lambda it: similar.get(cache_key(it.memo, it.amount)),
+    ):
+        for idx, it in enumerate(items):
+            if matched[idx] is not None:
+                continue
+            candidates = [pos for pos in candidates_of(it) or [] if pos not in taken]
+            if candidates:
+                matched[idx] = existing[candidates[0]]
+                taken.add(candidates[0])
+    return matched
+
+
+def _reused_item(it: SpendingItemInput, prev: Dict | None) -> Dict | None:
+    """짝지은 기존 항목에서 재사용할 저장용 항목 (다시 분류해야 하면 None)
+    - memo/amount가 같으면 기존 항목 그대로 (pending 상태 포함)
+    - 분류된 적 없는 항목(analyze=False로 저장)이나 분류 실패(failed)한 항목은 다시 분류
+    - 정규화한 메모와 금액 구간이 같으면 category/tags/confidence만 새 금액으로 재사용
+    (analyze=True인 교체 요청에서만 호출)
+    """
+    if prev is None:
+        return None
+    item_id = prev.get("id") or str(ObjectId())
+    if prev.get("status") == FAILED:
+        return None
+    if prev.get("status") != PENDING and not prev.get("category"):
+        return None
+    if prev.get("memo") == it.memo and prev.get("amount") == it.amount:
+        return {**prev, "id": item_id}
+    if prev.get("status") == PENDING:
+        return None
+    if cache_key(prev.get("memo") or "", int(prev.get("amount") or 0)) != cache_key(it.memo, it.amount):
+        return None
+    return SpendingItemAnalyzed(
+        id=item_id,
+        memo=it.memo,
+        amount=it.amount,
+        category=prev.get("category"),
+        tags=prev.get("tags") or [],
+        confidence=prev.get("confidence"),
+    ).model_dump(exclude_none=True)
+
+
+def _item_signature(items: List[Dict]) -> List[tuple]:
+    """코멘트/집계에 영향을 주는 항목 내용"""
+    return [
+        (it.get("memo"), it.get("amount"), it.get("category"), tuple(it.get("tags") or []), it.get("status"))
+        for it in items
+    ]
+
+
+def _content_changed(new_sig: List[tuple], old_sig: List[tuple]) -> bool:
+    """순서를 무시하고 항목 내용이 바뀌었는지
+    (category/status가 None인 항목과 문자열인 항목이 섞일 수 있어 정렬 대신 Counter로 비교)
+    """
+    return Counter(new_sig) != Counter(old_sig)
+
+
+def _with_stale(update: Dict) -> Dict:
+    """update에 일간 코멘트 stale 표시(ai_comment_stale, comment_version 증가)를 합침"""
+    for op, fields in stale_update().items():
+        update.setdefault(op, {}).update(fields)
+    return update
+
+
+async def _after_write(user_id: str, date_str: str, items: List[Dict], deferred: bool) -> None:
+    """저장 후처리: 분류 작업 등록(write-first) 또는 코멘트 재생성 예약"""
+    if deferred:
+        # 분류가 끝난 뒤 워커가 코멘트 재생성을 예약함
+        await enqueue_classification(user_id, date_str, items)
+    else:
+        mark_stale(user_id, date_str)
+
+
 @router.post("/bulk")
-async def post_bulk_spendings(payload: BulkSpendingsRequest):
+async def post_bulk_spendings(payload: BulkSpendingsRequest, user: CurrentUser = Depends(get_current_user)):
     """여러 소비 항목을 한 번에 저장하고, AI 분석 결과를 함께 기록합니다.
-    - 동일 날짜 문서가 있으면 items에 append하고 total과 코멘트를 갱신합니다.
+    - (user_id, spent_at) 문서에 원자적 upsert 한 번으로 items를 $push 하고
+      total/rollup을 $inc 합니다. (동시 저장해도 항목이 유실되지 않음)
+    - 일간 코멘트는 stale로 표시하고, 잠시 뒤 한 번에 재생성합니다 (daily_comment).
     - analyze=False면 카테고리/태그 없이 저장합니다.
+    - ENRICHMENT_MODE=async면 pending으로 먼저 저장하고 분류는 워커가 채웁니다.
     """
+    user_id = resolve_user_id(user, payload.user_id)
     col = collections()["spendings"]
     date_str = _normalize_date(payload.date)
 
     if not payload.items:
         raise HTTPException(status_code=400, detail="items is empty")
 
-    analyzed_items: List[Dict] = []
-    for it in payload.items:
-        if payload.analyze:
-            ai = analyze_item(it.memo, it.amount)
-            analyzed_items.append(
-                SpendingItemAnalyzed(
-                    memo=it.memo,
-                    amount=it.amount,
-                    category=ai.get("category"),
-                    tags=ai.get("tags", []),
-                    confidence=ai.get("confidence"),
-                ).model_dump()
-            )
-        else:
-            analyzed_items.append(
-                SpendingItemAnalyzed(memo=it.memo, amount=it.amount).model_dump()
-            )
+    deferred = _defer_analysis(payload)
+    analyzed_items = await _analyze_items(payload)
 
-    # 기존 일별 문서 조회
-    existing = await col.find_one({"user_id": payload.user_id, "spent_at": date_str})
-    if existing:
-        # items 이어붙이고 total 재계산
-        new_items = (existing.get("items") or []) + analyzed_items
-        new_total = sum(int(i.get("amount", 0)) for i in new_items)
-        new_comment = generate_daily_comment(new_items)
-        await col.update_one(
-            {"_id": existing["_id"]},
-            {"$set": {"items": new_items, "total_amount": new_total, "ai_comment": new_comment}},
+    added = item_totals(analyzed_items)
+    async with month_writes(user_id, [date_str]):
+        doc = await col.find_one_and_update(
+            {"user_id": user_id, "spent_at": date_str},
+            _with_stale({
+                "$push": {"items": {"$each": analyzed_items}},
+                "$inc": {"total_amount": sum(it.amount for it in payload.items), **inc_paths(*added)},
+                "$setOnInsert": {"created_at": datetime.utcnow()},
+            }),
+            projection={"_id": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
         )
-        return {"saved": len(analyzed_items), "daily": {"id": str(existing["_id"]), "date": date_str}}
+        await apply_month_delta(user_id, date_str, ({}, {}), added)
 
-    # 신규 문서 생성
-    total_amount = sum(it.amount for it in payload.items)
-    ai_comment = generate_daily_comment(analyzed_items)
-    doc = SpendingDailyDoc(
-        user_id=payload.user_id,
-        spent_at=date_str,
-        items=[SpendingItemAnalyzed(**i) for i in analyzed_items],
-        total_amount=total_amount,
-        ai_comment=ai_comment,
-        created_at=datetime.utcnow(),
-    ).model_dump(by_alias=True, exclude_none=True)
-    res = await col.insert_one(doc)
-    return {"saved": len(analyzed_items), "daily": {"id": str(res.inserted_id), "date": date_str}}
+    await _after_write(user_id, date_str, analyzed_items, deferred)
+    return {
+        "saved": len(analyzed_items),
+        "daily": {"id": str(doc["_id"]), "date": date_str},
+        "pending": deferred,
+    }
 
 
 @router.put("/bulk")
-async def put_bulk_spendings(payload: BulkSpendingsRequest):
+async def put_bulk_spendings(payload: BulkSpendingsRequest, user: CurrentUser = Depends(get_current_user)):
     """특정 날짜의 소비 항목을 통째로 교체 (수정/삭제 반영용)
-    - 동일 날짜 문서가 있으면 items를 덮어쓰고 total/코멘트를 다시 계산합니다.
-    - 없으면 새로 생성합니다.
+    - 원자적 $set upsert 한 번으로 items/total/rollup을 덮어씁니다 (없으면 새로 생성).
+    - 기존 항목과 (memo, amount)가 같거나 금액만 바뀐 항목은 기존 분류를 재사용하고,
+      새로 추가되었거나 메모가 바뀐 항목만 AI로 분류합니다.
+    - 항목 내용이 실제로 바뀐 경우에만 코멘트를 stale 표시 후 재생성합니다.
+      (순서만 바뀌면 저장만, 아무것도 안 바뀌면 쓰지 않음)
     """
+    user_id = resolve_user_id(user, payload.user_id)
     col = collections()["spendings"]
     date_str = _normalize_date(payload.date)
 
     if not payload.items:
-        # 항목이 비어 있으면 해당 날짜 문서를 삭제
-        await col.delete_one({"user_id": payload.user_id, "spent_at": date_str})
+        # 항목이 비어 있으면 해당 날짜 문서를 삭제 (월간 rollup에서 차감)
+        async with month_writes(user_id, [date_str]):
+            removed = await col.find_one_and_delete({"user_id": user_id, "spent_at": date_str})
+            if removed:
+                await apply_month_delta(user_id, date_str, doc_totals(removed), ({}, {}))
         return {"saved": 0, "daily": {"id": None, "date": date_str}}
 
+    current = await col.find_one({"user_id": user_id, "spent_at": date_str}, {"items": 1})
+    existing_items: List[Dict] = (current or {}).get("items") or []
+
+    # 기존 분류 재사용, 나머지만 분석 (analyze=False면 전부 카테고리 없이)
+    matched = _match_existing(payload.items, existing_items)
+    reused = [_reused_item(it, prev) if payload.analyze else None for it, prev in zip(payload.items, matched)]
+    fresh_inputs = [it for it, item in zip(payload.items, reused) if item is None]
+    fresh_items = await _analyze_items(payload, fresh_inputs)
+    fresh_iter = iter(fresh_items)
     analyzed_items: List[Dict] = []
-    for it in payload.items:
-        if payload.analyze:
-            ai = analyze_item(it.memo, it.amount)
-            analyzed_items.append(
-                SpendingItemAnalyzed(
-                    memo=it.memo,
-                    amount=it.amount,
-                    category=ai.get("category"),
-                    tags=ai.get("tags", []),
-                    confidence=ai.get("confidence"),
-                ).model_dump()
-            )
-        else:
-            analyzed_items.append(
-                SpendingItemAnalyzed(memo=it.memo, amount=it.amount).model_dump()
-            )
+    for item, prev in zip(reused, matched):
+        if item is None:
+            # 다시 분류한 항목도 짝지은 기존 항목의 id는 유지
+            item = next(fresh_iter)
+            if prev is not None and prev.get("id"):
+                item["id"] = prev["id"]
+        analyzed_items.append(item)
+    deferred = _defer_analysis(payload) and bool(fresh_items)
 
+    new_sig = _item_signature(analyzed_items)
+    old_sig = _item_signature(existing_items)
+    if current and new_sig == old_sig:
+        # 바뀐 것이 없음: 쓰기/코멘트 재생성 생략
+        return {
+            "saved": len(analyzed_items),
+            "daily": {"id": str(current["_id"]), "date": date_str},
+            "pending": False,
+        }
+    changed = _content_changed(new_sig, old_sig)
     total_amount = sum(it.amount for it in payload.items)
-    ai_comment = generate_daily_comment(analyzed_items)
-
-    existing = await col.find_one({"user_id": payload.user_id, "spent_at": date_str})
-    if existing:
-        await col.update_one(
-            {"_id": existing["_id"]},
-            {
-                "$set": {
-                    "items": analyzed_items,
-                    "total_amount": total_amount,
-                    "ai_comment": ai_comment,
-                }
-            },
+
+    # 교체 전 문서(rollup 차이 계산용)를 돌려받는 단일 upsert
+    new_id = ObjectId()
+    update = {
+        "$set": {"items": analyzed_items, "total_amount": total_amount, **daily_fields(analyzed_items)},
+        "$setOnInsert": {"_id": new_id, "created_at": datetime.utcnow()},
+    }
+    async with month_writes(user_id, [date_str]):
+        before = await col.find_one_and_update(
+            {"user_id": user_id, "spent_at": date_str},
+            _with_stale(update) if changed else update,
+            projection={"items": 1, "category_totals": 1, "tag_totals": 1},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE,
         )
-        return {"saved": len(analyzed_items), "daily": {"id": str(existing["_id"]), "date": date_str}}
+        # 교체 전/후 rollup 차이만큼 월간 rollup 보정
+        await apply_month_delta(user_id, date_str, doc_totals(before), item_totals(analyzed_items))
+    daily_id = before["_id"] if before else new_id
+
+    if changed:
+        # write-first 모드면 새로 분류할 항목만 큐에 넣음
+        await _after_write(user_id, date_str, fresh_items if deferred else analyzed_items, deferred)
+    return {
+        "saved": len(analyzed_items),
+        "daily": {"id": str(daily_id), "date": date_str},
+        "pending": deferred,
+    }
 
-    doc = SpendingDailyDoc(
-        user_id=payload.user_id,
-        spent_at=date_str,
-        items=[SpendingItemAnalyzed(**i) for i in analyzed_items],
-        total_amount=total_amount,
-        ai_comment=ai_comment,
-        created_at=datetime.utcnow(),
-    ).model_dump(by_alias=True, exclude_none=True)
-    res = await col.insert_one(doc)
-    return {"saved": len(analyzed_items), "daily": {"id": str(res.inserted_id), "date": date_str}}
+
+async def _find_item(user_id: str, item_id: str) -> Tuple[Dict, Dict]:
+    """id로 항목 하나와 그 일별 문서(_id, spent_at)를 조회 (없으면 404)"""
+    doc = await collections()["spendings"].find_one(
+        {"user_id": user_id, "items.id": item_id}, {"spent_at": 1, "items.$": 1}
+    )
+    if not doc:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return doc, doc["items"][0]
+
+
+async def _patched_item(old: Dict, payload: SpendingItemPatch) -> Tuple[Dict, bool]:
+    """수정 요청을 반영한 저장용 항목과 write-first 분류 대기 여부
+    - category/tags를 보내면 사용자가 고친 분류로 그대로 저장
+    - 메모가 (정규화 기준, 금액 구간 포함) 그대로면 기존 분류 유지
+    - 그 외에는 이 항목만 다시 분류
+    """
+    memo = payload.memo if payload.memo is not None else old.get("memo") or ""
+    amount = payload.amount if payload.amount is not None else int(old.get("amount") or 0)
+
+    if payload.category is not None or payload.tags is not None:
+        item = SpendingItemAnalyzed(
+            id=old["id"],
+            memo=memo,
+            amount=amount,
+            category=payload.category if payload.category is not None else old.get("category"),
+            tags=payload.tags if payload.tags is not None else old.get("tags") or [],
+        ).model_dump(exclude_none=True)
+        return item, False
+
+    same_memo = memo == old.get("memo") or (
+        old.get("status") != PENDING
+        and cache_key(memo, amount) == cache_key(old.get("memo") or "", int(old.get("amount") or 0))
+    )
+    if same_memo:
+        return {**old, "memo": memo, "amount": amount}, False
+
+    request = BulkSpendingsRequest(items=[SpendingItemInput(memo=memo, amount=amount)], analyze=payload.analyze)
+    item = (await _analyze_items(request))[0]
+    item["id"] = old["id"]
+    return item, _defer_analysis(request)
+
+
+@router.patch("/items/{item_id}")
+async def patch_spending_item(
+    item_id: str, payload: SpendingItemPatch, user: CurrentUser = Depends(get_current_user)
+):
+    """소비 항목 하나만 수정합니다.
+    - 그 항목만 positional $set 하고 total/rollup은 변화량만 $inc (원자적 update 한 번)
+    - 메모가 바뀐 경우에만 그 항목을 다시 분류합니다.
+    - 읽은 뒤 다른 요청이 같은 항목을 바꿨으면 다시 읽어서 재시도 (계속 충돌하면 409)
+    """
+    col = collections()["spendings"]
+    for _ in range(ITEM_UPDATE_RETRIES):
+        doc, old = await _find_item(user.id, item_id)
+        daily = {"id": str(doc["_id"]), "date": doc["spent_at"]}
+        new, deferred = await _patched_item(old, payload)
+        if new == old:
+            return {"item": new, "daily": daily, "pending": False}
+
+        old_totals, new_totals = item_totals([old]), item_totals([new])
+        async with month_writes(user.id, [doc["spent_at"]]):
+            result = await col.update_one(
+                # 읽은 항목과 완전히 같은 원소가 남아 있을 때만 교체
+                {"_id": doc["_id"], "items": old},
+                _with_stale({
+                    "$set": {"items.$": new},
+                    "$inc": {
+                        "total_amount": int(new["amount"]) - int(old.get("amount") or 0),
+                        **inc_paths(*diff_totals(old_totals, new_totals)),
+                    },
+                }),
+            )
+            if result.matched_count:
+                await apply_month_delta(user.id, doc["spent_at"], old_totals, new_totals)
+        if result.matched_count:
+            await _after_write(user.id, doc["spent_at"], [new], deferred)
+            return {"item": new, "daily": daily, "pending": deferred}
+    raise HTTPException(status_code=409, detail="Item was modified concurrently")
+
+
+@router.delete("/items/{item_id}")
+async def delete_spending_item(item_id: str, user: CurrentUser = Depends(get_current_user)):
+    """소비 항목 하나를 삭제합니다.
+    - $pull과 total/rollup $inc 차감을 원자적 update 한 번으로 처리
+    - 마지막 항목이었으면 일별 문서도 삭제합니다.
+    """
+    col = collections()["spendings"]
+    for _ in range(ITEM_UPDATE_RETRIES):
+        doc, old = await _find_item(user.id, item_id)
+        old_totals = item_totals([old])
+        async with month_writes(user.id, [doc["spent_at"]]):
+            result = await col.update_one(
+                {"_id": doc["_id"], "items": old},
+                _with_stale({
+                    "$pull": {"items": {"id": item_id}},
+                    "$inc": {
+                        "total_amount": -int(old.get("amount") or 0),
+                        **inc_paths(*diff_totals(old_totals, ({}, {}))),
+                    },
+                }),
+            )
+            if result.matched_count:
+                await apply_month_delta(user.id, doc["spent_at"], old_totals, ({}, {}))
+        if not result.matched_count:
+            continue
+
+        emptied = await col.delete_one({"_id": doc["_id"], "items": {"$size": 0}})
+        if not emptied.deleted_count:
+            mark_stale(user.id, doc["spent_at"])
+        return {"deleted": 1, "daily": {"id": str(doc["_id"]), "date": doc["spent_at"]}}
+    raise HTTPException(status_code=409, detail="Item was modified concurrently")
+
+
+@router.post("/import")
+async def import_spendings(
+    file: UploadFile = File(...),
+    encoding: str = Query("utf-8-sig"),
+    analyze: bool = Query(True),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """CSV(날짜, 메모, 금액)로 여러 날짜의 소비 내역을 한 번에 가져옵니다.
+    - 파일을 한 줄씩 읽어 날짜별로 묶고 bulk_write upsert로 저장 (응답 전에 끝남)
+    - analyze=True면 항목을 pending으로 저장하고 분류는 백그라운드에서 배치로 진행
+      → GET /api/spendings/import/{id} 로 진행 상황 확인
+    - encoding: 은행/카드사 CSV가 EUC-KR이면 cp949
+    """
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        raise HTTPException(status_code=400, detail="Unknown encoding")
+    return await start_import(user.id, file.file, file.filename, encoding, analyze)
+
+
+@router.get("/import/{job_id}")
+async def get_import_status(job_id: str, user: CurrentUser = Depends(get_current_user)):
+    """CSV 가져오기 진행 상황 (status, rows, to_classify, classified, skipped, errors ...)"""
+    job = await get_import_job(user.id, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+
+# 목록 조회에 필요한 필드만 (ai_comment/created_at/rollup 제외)
+_LIST_PROJECTION = {
+    "spent_at": 1,
+    "items.id": 1,
+    "items.memo": 1,
+    "items.amount": 1,
+    "items.category": 1,
+    "items.tags": 1,
+}
+LIST_MAX_LIMIT = 366
+
+
+def _flatten(doc: Dict) -> List[Dict]:
+    return [
+        {
+            "id": it.get("id"),
+            "memo": it.get("memo"),
+            "amount": it.get("amount"),
+            "category": it.get("category"),
+            "tags": it.get("tags"),
+            "spentAt": doc.get("spent_at"),
+        }
+        for it in doc.get("items", [])
+    ]
+
+
+def _encode_cursor(doc: Dict) -> str:
+    raw = json.dumps({"s": doc["spent_at"], "i": str(doc["_id"])}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(token: str) -> Dict:
+    """continuation 토큰 → (spent_at, _id) 이후 문서만 고르는 조건"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = json.loads(raw)
+        spent_at, oid = str(data["s"]), ObjectId(data["i"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"$or": [{"spent_at": {"$gt": spent_at}}, {"spent_at": spent_at, "_id": {"$gt": oid}}]}
 
 
 @router.get("")
 async def list_spendings(
-    user_id: str = Query(...),
+    user_id: Optional[str] = Query(None),
     from_date: str = Query(..., alias="from"),
     to_date: str = Query(..., alias="to"),
+    limit: Optional[int] = Query(None, ge=1, le=LIST_MAX_LIMIT),
+    cursor: Optional[str] = Query(None),
+    format: Optional[str] = Query(None, pattern="^(json|ndjson)$"),
+    user: CurrentUser = Depends(get_current_user),
 ):
     """날짜 범위 내 소비 항목 단순 조회 (캘린더/목록용)
     - 응답은 일별 문서의 items를 평탄화하여 반환합니다.
+    - limit: 한 페이지에 담을 일별 문서(날짜) 수. 지정하면 응답에 next 토큰이 붙고,
+      다음 페이지는 cursor=next 로 이어서 조회합니다 ((spent_at, _id) 기준 keyset).
+    - format=ndjson: 항목을 한 줄에 하나씩 스트리밍 (커서에서 읽는 대로 전송).
+      limit과 함께 쓰면 마지막 줄이 {"next": 토큰} 입니다.
     """
+    user_id = resolve_user_id(user, user_id)
     col = collections()["spendings"]
-    cur = col.find({"user_id": user_id, "spent_at": {"$gte": from_date, "$lte": to_date}})
+    query: Dict = {"user_id": user_id, "spent_at": {"$gte": from_date, "$lte": to_date}}
+    if cursor:
+        query = {"$and": [query, _decode_cursor(cursor)]}
+
+    cur = col.find(query, _LIST_PROJECTION).sort([("spent_at", 1), ("_id", 1)])
+    if limit:
+        cur = cur.limit(limit)
+
+    if format == "ndjson":
+        async def _stream():
+            last: Dict | None = None
+            count = 0
+            async for d in cur:
+                for row in _flatten(d):
+                    yield json.dumps(row, ensure_ascii=False) + "\n"
+                last = d
+                count += 1
+            if limit is not None:
+                # 페이지 모드면 마지막 줄에 다음 페이지 토큰
+                next_token = _encode_cursor(last) if last is not None and count == limit else None
+                yield json.dumps({"next": next_token}) + "\n"
+
+        return StreamingResponse(_stream(), media_type="application/x-ndjson")
+
     result: List[Dict] = []
+    last: Dict | None = None
+    count = 0
     async for d in cur:
-        for it in d.get("items", []):
-            result.append({
-                "memo": it.get("memo"),
-                "amount": it.get("amount"),
-                "category": it.get("category"),
-                "tags": it.get("tags"),
-                "spentAt": d.get("spent_at"),
-            })
-    return {"items": result}
+        result.extend(_flatten(d))
+        last = d
+        count += 1
+    if limit is None:
+        return {"items": result}
+    next_token = _encode_cursor(last) if last is not None and count == limit else None
+    return {"items": result, "next": next_token}
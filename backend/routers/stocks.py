@@ -1,15 +1,52 @@
+"""Stocks 라우터
+
+- GET /api/stocks/summary : 주요 지수 요약 (가격·변동률, 7일 추세)
+
+모든 사용자에게 같은 데이터이므로 프로세스 공용 캐시에서 바로 응답합니다.
+- 백그라운드 갱신 작업 하나가 MARKET_REFRESH_SEC(기본 300초)마다 Yahoo를 조회
+  (심볼들은 비동기로 동시에 조회)
+- 사용자 요청은 Yahoo를 기다리지 않음. 캐시가 오래됐으면 stale=True로 응답하고 갱신만 깨움
+- 특정 심볼 조회가 실패하면 마지막으로 성공한 값(as_of 포함)을 계속 제공
+"""
 from __future__ import annotations
 
+import asyncio
+import os
+from datetime import datetime
 from typing import Dict, List, Optional
 from urllib.parse import quote
 
-import requests
 from fastapi import APIRouter
 
+import http_client
+
 router = APIRouter(prefix="/api/stocks", tags=["stocks"])
 
+MARKET_REFRESH_SEC = int(os.getenv("MARKET_REFRESH_SEC", "300"))
+
+TICKERS = {
+  "코스피": "^KS11",
+  "나스닥": "^IXIC",
+  "달러/원": "USDKRW=X",
+}
+
+_HEADERS = {
+  # 일부 환경에서 기본 UA 없이 호출하면 차단될 수 있어 브라우저 형태로 지정
+  "User-Agent": (
+    "Mozilla/5.0 (compatible; spendWallet/0.1; +https://spendwallet.vercel.app)"
+  )
+}
+
+# 프로세스 공용 캐시: 지수명 → {price, change, trend, as_of}
+_cache: Dict[str, Dict] = {}
+_cache_updated_at: Optional[datetime] = None
+_refresh_lock = asyncio.Lock()
+_refresher: Optional[asyncio.Task] = None
+# 요청이 깨운 한 번짜리 갱신 (참조를 들고 있어야 GC되지 않고 예외도 기록됨)
+_kick: Optional[asyncio.Task] = None
 
-def _get_price_series(symbol: str) -> Optional[List[float]]:
+
+async def _get_price_series(symbol: str) -> Optional[List[float]]:
   """
   Yahoo Finance chart 엔드포인트에서
   최근 7일 종가 배열을 반환한다.
@@ -19,15 +56,8 @@ def _get_price_series(symbol: str) -> Optional[List[float]]:
   url = f"https://query1.finance.yahoo.com/v8/finance/chart/{encoded_symbol}"
   params = {"range": "7d", "interval": "1d"}
 
-  headers = {
-    # 일부 환경에서 기본 UA 없이 호출하면 차단될 수 있어 브라우저 형태로 지정
-    "User-Agent": (
-      "Mozilla/5.0 (compatible; spendWallet/0.1; +https://spendwallet.vercel.app)"
-    )
-  }
-
   try:
-    res = requests.get(url, params=params, headers=headers, timeout=5)
+    res = await http_client.get("yahoo", url, params=params, headers=_HEADERS)
     res.raise_for_status()
     data = res.json()
   except Exception as e:  # 외부 API 장애 시 서버는 죽지 않고 로깅만
@@ -47,34 +77,88 @@ def _get_price_series(symbol: str) -> Optional[List[float]]:
   return cleaned or None
 
 
-@router.get("/summary")
-def get_market_summary() -> Dict[str, Dict]:
-  """이번 주 주요 지수 요약 (가격·변동률, 7일 추세)"""
-  tickers = {
-    "코스피": "^KS11",
-    "나스닥": "^IXIC",
-    "달러/원": "USDKRW=X",
-  }
+def _summarize(closes: List[float]) -> Dict:
+  current = closes[-1]
+  prev = closes[0]
+  try:
+    change = round(((current - prev) / prev) * 100, 2)
+  except ZeroDivisionError:
+    change = 0.0
+  return {"price": current, "change": change, "trend": closes}
+
+
+async def refresh_market_summary() -> None:
+  """모든 심볼을 동시에 조회해 캐시 갱신 (동시에 한 번만 실행)"""
+  global _cache_updated_at
+  if _refresh_lock.locked():
+    return
+  async with _refresh_lock:
+    series = await asyncio.gather(*(_get_price_series(symbol) for symbol in TICKERS.values()))
+    now = datetime.utcnow()
+    for name, closes in zip(TICKERS, series):
+      if not closes or len(closes) < 2:
+        # 실패한 심볼은 마지막 성공 값을 유지
+        continue
+      _cache[name] = {**_summarize(closes), "as_of": now.isoformat() + "Z"}
+    if any(series):
+      _cache_updated_at = now
+
+
+async def _refresh_loop() -> None:
+  while True:
+    try:
+      await refresh_market_summary()
+    except Exception as e:
+      print(f"[STOCKS] refresh error: {e}")
+    await asyncio.sleep(MARKET_REFRESH_SEC)
 
-  summary: Dict[str, Dict] = {}
 
-  for name, symbol in tickers.items():
-    closes = _get_price_series(symbol)
-    if not closes or len(closes) < 2:
-      continue
+def _log_kick_error(task: asyncio.Task) -> None:
+  if not task.cancelled() and task.exception() is not None:
+    print(f"[STOCKS] refresh error: {task.exception()}")
 
-    current = closes[-1]
-    prev = closes[0]
-    try:
-      change = round(((current - prev) / prev) * 100, 2)
-    except ZeroDivisionError:
-      change = 0.0
 
-    summary[name] = {
-      "price": current,
-      "change": change,
-      "trend": closes,
-    }
+def _trigger_refresh() -> None:
+  """기다리지 않고 한 번 갱신 (이미 진행 중이면 무시)"""
+  global _kick
+  if _refresh_lock.locked() or (_kick is not None and not _kick.done()):
+    return
+  _kick = asyncio.create_task(refresh_market_summary())
+  _kick.add_done_callback(_log_kick_error)
+
+
+def start_refresher() -> None:
+  """앱 시작 시 백그라운드 갱신 시작"""
+  global _refresher
+  if _refresher is None or _refresher.done():
+    _refresher = asyncio.create_task(_refresh_loop())
+
 
-  return {"indices": summary}
+async def stop_refresher() -> None:
+  global _refresher, _kick
+  tasks = [t for t in (_refresher, _kick) if t is not None]
+  for task in tasks:
+    task.cancel()
+  await asyncio.gather(*tasks, return_exceptions=True)
+  _refresher = _kick = None
 
+
+def _is_stale() -> bool:
+  if _cache_updated_at is None:
+    return True
+  return (datetime.utcnow() - _cache_updated_at).total_seconds() > MARKET_REFRESH_SEC * 2
+
+
+@router.get("/summary")
+async def get_market_summary() -> Dict:
+  """이번 주 주요 지수 요약 (가격·변동률, 7일 추세) - 공용 캐시에서 응답"""
+  stale = _is_stale()
+  if stale:
+    # 갱신 작업이 멈췄거나 늦어진 경우: 기다리지 않고 갱신만 트리거
+    _trigger_refresh()
+
+  return {
+    "indices": _cache,
+    "updated_at": _cache_updated_at.isoformat() + "Z" if _cache_updated_at else None,
+    "stale": stale,
+  }
@@ -3,16 +3,19 @@
 - POST /api/users : 단순 생성 (데모용)
 - GET /api/users/{user_id} : 프로필 조회
 - PUT /api/users/{user_id} : 프로필 수정 (이름/생년월일/전화번호/이메일)
+
+조회/수정은 Bearer 토큰의 본인만 가능합니다.
 """
 from __future__ import annotations
 
 from datetime import datetime
 from typing import Dict
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from bson import ObjectId
 
+from auth_deps import CurrentUser, get_current_user, invalidate_user, resolve_user_id
 from database import collections
 from schemas import UserCreate
 
@@ -46,7 +49,8 @@ async def create_user(payload: UserCreate):
 
 
 @router.get("/{user_id}")
-async def get_user(user_id: str):
+async def get_user(user_id: str, user: CurrentUser = Depends(get_current_user)):
+    resolve_user_id(user, user_id)
     col = collections()["users"]
     try:
         oid = ObjectId(user_id)
@@ -66,7 +70,8 @@ async def get_user(user_id: str):
 
 
 @router.put("/{user_id}")
-async def update_user(user_id: str, payload: UserProfileUpdate):
+async def update_user(user_id: str, payload: UserProfileUpdate, user: CurrentUser = Depends(get_current_user)):
+    resolve_user_id(user, user_id)
     col = collections()["users"]
     try:
         oid = ObjectId(user_id)
@@ -87,6 +92,9 @@ async def update_user(user_id: str, payload: UserProfileUpdate):
         }},
     )
 
+    # 인증 캐시의 이름/이메일도 바로 갱신되도록
+    invalidate_user(user_id)
+
     updated = await col.find_one({"_id": oid})
     return {
         "id": str(updated["_id"]),
@@ -0,0 +1,179 @@
+"""기존 spendings 데이터의 일별 rollup을 items 기준으로 맞추는 스크립트 (1회성/재실행 가능)
+
+- 모든 일별 문서의 category_totals / tag_totals 를 items 기준으로 다시 계산
+- 항목 id가 생기기 전에 저장된 항목에 id를 채움 (PATCH/DELETE /items/{id}로 고칠 수 있도록)
+- 읽은 items 그대로일 때만 $set (그 사이 저장이 있으면 다시 읽어 재시도)
+  → 실행 중에 들어오는 저장과 겹쳐도 합계가 어긋나지 않음
+- monthly_rollups는 여기서 덮어쓰지 않음. complete가 아닌 달은 조회 시
+  rollups.month_totals가 일별 문서로 조건부로 채움 (rollups 모듈 설명 참고)
+- 수동 실행 시에는 월간 문서의 complete도 지워 모든 달을 다음 조회 때 다시 채우게 함
+
+Command 예시:
+- cd backend && python -m scheduler.backfill_rollups
+
+앱 시작 시에도 `start_once()`로 한 번 실행됩니다. job_checkpoints의 rollups.DAILY_BACKFILL_ID 문서로
+여러 서버 중 하나만 실행하고, 모든 문서를 맞추면 done으로 표시해 다음 시작부터는 건너뜁니다.
+(실패하거나, 계속 충돌한 문서가 남거나, 서버가 중간에 죽으면 다음 시작 때 다시 실행)
+done이 되기 전에는 월간 합계 조회가 매번 일별 문서로 계산합니다.
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from database import connect_to_mongo, close_mongo_connection, collections
+from rollups import DAILY_BACKFILL_ID, daily_fields
+
+
+BATCH_SIZE = 500
+CHECKPOINT_ID = DAILY_BACKFILL_ID
+# 읽은 뒤 바뀐 문서를 다시 읽어 맞추는 횟수
+DAY_RETRIES = 3
+# 시작 시 실행을 맡은 서버가 이 시간 안에 끝내지 못하면 다른 서버가 다시 맡음
+LEASE_SEC = 3600
+
+_PROJECTION = {"items": 1, "category_totals": 1, "tag_totals": 1}
+
+_task: Optional[asyncio.Task] = None
+
+
+def with_item_ids(items: List[Dict]) -> Optional[List[Dict]]:
+  """id 없는 항목에 id를 붙인 새 items (모두 있으면 None)"""
+  if all(it.get("id") for it in items):
+    return None
+  return [it if it.get("id") else {**it, "id": str(ObjectId())} for it in items]
+
+
+def outdated_fields(doc: Dict) -> Optional[Dict]:
+  """저장된 rollup이 items와 다르거나 id 없는 항목이 있으면 $set 할 필드, 아니면 None"""
+  items = doc.get("items") or []
+  fields: Dict = daily_fields(items)
+  if doc.get("category_totals") == fields["category_totals"] and doc.get("tag_totals") == fields["tag_totals"]:
+    fields = {}
+  new_items = with_item_ids(items)
+  if new_items is not None:
+    fields["items"] = new_items
+  return fields or None
+
+
+async def _fix_batch(spend_col, docs: List[Dict]) -> Tuple[int, int]:
+  """읽은 items 그대로인 문서만 rollup을 $set. (맞춘 문서 수, 계속 충돌해 남은 문서 수) 반환"""
+  fixed = 0
+  for _ in range(DAY_RETRIES):
+    ops: List[UpdateOne] = []
+    ids: List = []
+    for doc in docs:
+      fields = outdated_fields(doc)
+      if fields is not None:
+        ops.append(UpdateOne({"_id": doc["_id"], "items": doc.get("items")}, {"$set": fields}))
+        ids.append(doc["_id"])
+    if not ops:
+      return fixed, 0
+    result = await spend_col.bulk_write(ops, ordered=False)
+    fixed += result.matched_count
+    if result.matched_count == len(ops):
+      return fixed, 0
+    # 그 사이 바뀐 문서가 있음: 다시 읽어 아직 어긋난 문서만 재시도
+    docs = [doc async for doc in spend_col.find({"_id": {"$in": ids}}, _PROJECTION)]
+  return fixed, sum(1 for doc in docs if outdated_fields(doc) is not None)
+
+
+async def rebuild_daily_rollups() -> Tuple[int, int, int]:
+  """모든 일별 rollup을 items 기준으로 맞춤. (읽은 문서 수, 맞춘 문서 수, 남은 문서 수) 반환"""
+  spend_col = collections()["spendings"]
+  cur = spend_col.find({}, _PROJECTION).sort("_id", 1)
+
+  days = fixed = skipped = 0
+  batch: List[Dict] = []
+  async for doc in cur:
+    batch.append(doc)
+    days += 1
+    if len(batch) >= BATCH_SIZE:
+      f, s = await _fix_batch(spend_col, batch)
+      fixed, skipped, batch = fixed + f, skipped + s, []
+  if batch:
+    f, s = await _fix_batch(spend_col, batch)
+    fixed, skipped = fixed + f, skipped + s
+  return days, fixed, skipped
+
+
+async def _mark_done(days: int, fixed: int) -> None:
+  await collections()["job_checkpoints"].update_one(
+    {"_id": CHECKPOINT_ID},
+    {"$set": {"done": True, "lease_until": None, "days": days, "fixed": fixed, "updated_at": datetime.utcnow()}},
+    upsert=True,
+  )
+
+
+async def backfill_rollups() -> None:
+  await connect_to_mongo()
+  days, fixed, skipped = await rebuild_daily_rollups()
+  if skipped:
+    print(f"[{datetime.now()}] ❌ {skipped} daily docs kept changing, rerun to finish")
+  else:
+    await _mark_done(days, fixed)
+    # 모든 달을 다음 조회 때 일별 문서로 다시 채움 (조건부 저장이라 동시 저장과 겹쳐도 안전)
+    await collections()["monthly_rollups"].update_many({}, {"$unset": {"complete": ""}})
+    print(f"[{datetime.now()}] ✅ Rollups rebuilt: {fixed}/{days} daily docs fixed, monthly docs reset")
+  await close_mongo_connection()
+
+
+async def _claim() -> bool:
+  """아직 끝나지 않았고 다른 서버가 실행 중이 아니면 실행 권한을 가져옴"""
+  now = datetime.utcnow()
+  try:
+    doc = await collections()["job_checkpoints"].find_one_and_update(
+      {"_id": CHECKPOINT_ID, "done": {"$ne": True}, "lease_until": {"$not": {"$gt": now}}},
+      {"$set": {"done": False, "lease_until": now + timedelta(seconds=LEASE_SEC), "updated_at": now}},
+      upsert=True,
+      return_document=ReturnDocument.AFTER,
+    )
+  except DuplicateKeyError:
+    # 이미 끝났거나 다른 서버가 실행 중
+    return False
+  return doc is not None
+
+
+async def _run_once() -> None:
+  ckpt_col = collections()["job_checkpoints"]
+  try:
+    if not await _claim():
+      return
+    print(f"[{datetime.now()}] Rollup backfill started")
+    days, fixed, skipped = await rebuild_daily_rollups()
+    if skipped:
+      print(f"[ROLLUPS] {skipped} daily docs kept changing, will retry on next start")
+      await ckpt_col.update_one({"_id": CHECKPOINT_ID, "done": False}, {"$set": {"lease_until": None}})
+      return
+    await _mark_done(days, fixed)
+    print(f"[{datetime.now()}] ✅ Daily rollups checked: {fixed}/{days} docs fixed")
+  except asyncio.CancelledError:
+    await ckpt_col.update_one({"_id": CHECKPOINT_ID, "done": False}, {"$set": {"lease_until": None}})
+    raise
+  except Exception as e:
+    print(f"[ROLLUPS] backfill failed, will retry on next start: {e}")
+    await ckpt_col.update_one({"_id": CHECKPOINT_ID, "done": False}, {"$set": {"lease_until": None}})
+
+
+def start_once() -> None:
+  """앱 시작 시 기존 데이터 일별 rollup 맞추기를 백그라운드로 (이미 끝났으면 바로 종료)"""
+  global _task
+  if _task is None or _task.done():
+    _task = asyncio.create_task(_run_once())
+
+
+async def stop() -> None:
+  global _task
+  if _task is not None:
+    _task.cancel()
+    await asyncio.gather(_task, return_exceptions=True)
+    _task = None
+
+
+if __name__ == "__main__":
+  asyncio.run(backfill_rollups())
@@ -4,40 +4,238 @@ Render Cron Job에서 다음과 같이 실행하도록 설정하면 된다.
 
 Command 예시:
 - python -m backend.scheduler.send_daily_reminders
+- 여러 러너로 나눠 보내기: REMINDER_SHARDS=4 REMINDER_SHARD=0 python -m backend.scheduler.send_daily_reminders
+  (사용자마다 저장된 reminder_bucket 구간으로 목록을 나눔. 샤드마다 한 번씩 실행)
 
 스케줄:
 - 0 21 * * * (Asia/Seoul 기준 매일 21시)
+
+동작:
+- 사용자 문서의 reminder_bucket(= crc32(_id) % REMINDER_BUCKETS)이 없으면 먼저 채움
+  (새로 가입한 사용자는 다음 실행 때 채워짐, 여러 샤드가 동시에 채워도 같은 값)
+- 샤드 조건(reminder_bucket 구간)을 첫 $match에 넣어, 샤드마다 자기 사용자만
+  (reminder_bucket, _id) 인덱스 순서로 읽고 anti-join 함
+- 오늘(Asia/Seoul 날짜) spendings 문서가 있는 사용자는 제외 (MongoDB에서 anti-join)
+- SendGrid 요청 하나에 최대 1000명(personalizations)씩 묶어 보내고,
+  REMINDER_CONCURRENCY(기본 4)개 요청을 동시에 보냄
+- 묶음(SendGrid 요청) 하나가 성공할 때마다 그 묶음이 덮는 (reminder_bucket, _id) 구간을
+  job_checkpoints에 기록하고, 동시 요청들이 모두 끝나면 이어서 읽을 위치(last)로 합침
+  → 같은 날 다시 실행하면 이미 보낸 구간은 건너뛰고 이어서 보냄 (이미 끝난 날은 건너뜀)
+- 전송 실패 시 그 동시 요청들까지만 보내고 종료 (재실행 시 실패한 묶음만 다시 보냄)
 """
 from __future__ import annotations
 
 import asyncio
+import os
+import zlib
 from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from bson import ObjectId
+from pymongo import UpdateOne
 
+import http_client
 from database import connect_to_mongo, close_mongo_connection, collections
-from utils.mailer import send_reminder_email
+from utils.mailer import MAIL_BATCH_SIZE, send_reminder_batch
+
+
+REMINDER_BATCH_SIZE = min(int(os.getenv("REMINDER_BATCH_SIZE", str(MAIL_BATCH_SIZE))), MAIL_BATCH_SIZE)
+REMINDER_CONCURRENCY = int(os.getenv("REMINDER_CONCURRENCY", "4"))
+REMINDER_SHARDS = int(os.getenv("REMINDER_SHARDS", "1"))
+REMINDER_SHARD = int(os.getenv("REMINDER_SHARD", "0"))
+# 사용자 문서에 저장하는 버킷 수 (샤드는 버킷 구간으로 나눔, REMINDER_SHARDS는 이 값 이하)
+REMINDER_BUCKETS = 4096
+
+Recipient = Tuple[str, str]
+# 사용자 순서 키 (reminder_bucket, _id)
+Key = Tuple[int, ObjectId]
+
+
+def _today_seoul() -> str:
+  return datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d")
+
+
+def reminder_bucket(user_id: ObjectId) -> int:
+  return zlib.crc32(user_id.binary) % REMINDER_BUCKETS
+
+
+def shard_buckets(shard: int, shards: int) -> Tuple[int, int]:
+  """샤드가 맡는 reminder_bucket 구간 [lo, hi)"""
+  shards = max(1, min(shards, REMINDER_BUCKETS))
+  return shard * REMINDER_BUCKETS // shards, (shard + 1) * REMINDER_BUCKETS // shards
+
+
+def _sent_already(key: Key, ranges: List[Tuple[Key, Key]]) -> bool:
+  """이전 실행에서 보낸 구간 (lo, hi] 안의 사용자인지"""
+  return any(lo < key <= hi for lo, hi in ranges)
+
+
+async def _ensure_buckets(users_col) -> None:
+  """reminder_bucket이 없는 사용자에게 채우고 샤드 조회용 인덱스 준비"""
+  await users_col.create_index([("reminder_bucket", 1), ("_id", 1)])
+  ops: List[UpdateOne] = []
+  async for user in users_col.find({"reminder_bucket": {"$exists": False}}, {"_id": 1}):
+    ops.append(UpdateOne({"_id": user["_id"]}, {"$set": {"reminder_bucket": reminder_bucket(user["_id"])}}))
+    if len(ops) >= REMINDER_BATCH_SIZE:
+      await users_col.bulk_write(ops, ordered=False)
+      ops = []
+  if ops:
+    await users_col.bulk_write(ops, ordered=False)
 
 
-async def send_daily_reminders() -> None:
-  """모든 사용자에게 소비 작성 리마인더 메일 발송"""
+def _recipients_pipeline(today: str, buckets: Tuple[int, int], after: Optional[Key]) -> List[Dict]:
+  """이 샤드의 사용자 중 오늘(spent_at == today) 소비 기록이 없는 사용자만
+  (reminder_bucket, _id) 순으로 (anti-join)
+
+  샤드 조건을 첫 $match에 넣어 다른 샤드의 사용자는 읽지도 anti-join 하지도 않는다.
+  spendings의 (user_id, spent_at) unique 인덱스로 사용자당 한 번씩만 조회하고,
+  email/display_name만 남긴다.
+  """
+  match: Dict = {
+    "email": {"$nin": [None, ""]},
+    "reminder_bucket": {"$gte": buckets[0], "$lt": buckets[1]},
+  }
+  if after is not None:
+    match["$or"] = [
+      {"reminder_bucket": {"$gt": after[0]}},
+      {"reminder_bucket": after[0], "_id": {"$gt": after[1]}},
+    ]
+  return [
+    {"$match": match},
+    {"$sort": {"reminder_bucket": 1, "_id": 1}},
+    {
+      "$lookup": {
+        "from": "spendings",
+        "let": {"uid": {"$toString": "$_id"}},
+        "pipeline": [
+          {"$match": {"spent_at": today, "$expr": {"$eq": ["$user_id", "$$uid"]}}},
+          {"$limit": 1},
+          {"$project": {"_id": 1}},
+        ],
+        "as": "logged_today",
+      }
+    },
+    {"$match": {"logged_today": {"$size": 0}}},
+    {"$project": {"email": 1, "display_name": 1, "reminder_bucket": 1}},
+  ]
+
+
+def _key(raw) -> Optional[Key]:
+  return (int(raw[0]), raw[1]) if raw else None
+
+
+async def send_daily_reminders(shard: int = REMINDER_SHARD, shards: int = REMINDER_SHARDS) -> None:
+  """오늘 소비를 기록하지 않은 사용자에게 리마인더 메일 발송"""
   await connect_to_mongo()
   cols = collections()
   users_col = cols["users"]
+  ckpt_col = cols["job_checkpoints"]
+
+  today = _today_seoul()
+  ckpt_id = f"daily_reminders:{today}:{shard}/{shards}"
+  ckpt: Dict = await ckpt_col.find_one({"_id": ckpt_id}) or {}
+  if ckpt.get("done"):
+    print(f"[{datetime.now()}] ⏭️  Daily reminder already sent ({ckpt_id})")
+    await close_mongo_connection()
+    return
+
+  await _ensure_buckets(users_col)
+
+  # last: 여기까지는 모두 보냄 / sent_ranges: last 이후에 이미 보낸 묶음 구간 (lo, hi]
+  last: Optional[Key] = _key(ckpt.get("last"))
+  sent_ranges: List[Tuple[Key, Key]] = [(_key(lo), _key(hi)) for lo, hi in ckpt.get("sent_ranges") or []]
+  count = int(ckpt.get("sent", 0))
 
-  # email, display_name 필드만 조회
-  users = await users_col.find({}, {"email": 1, "display_name": 1}).to_list(None)
+  def _raw(key: Optional[Key]) -> Optional[List]:
+    return [key[0], key[1]] if key else None
 
-  count = 0
-  for user in users:
-    email = user.get("email")
-    name = user.get("display_name") or "사용자"
-    if email:
-      send_reminder_email(email, name)
-      count += 1
+  async def _send_batch(batch: List[Recipient], lo: Optional[Key], hi: Key) -> bool:
+    """묶음 하나 전송, 성공하면 바로 그 구간을 체크포인트에 기록"""
+    nonlocal count
+    if not await send_reminder_batch(batch):
+      return False
+    # 구간 시작이 없으면(처음부터) 가장 작은 키보다 작은 값으로
+    lo = lo if lo is not None else (-1, hi[1])
+    sent_ranges.append((lo, hi))
+    count += len(batch)
+    await ckpt_col.update_one(
+      {"_id": ckpt_id},
+      {
+        "$push": {"sent_ranges": [_raw(lo), _raw(hi)]},
+        "$inc": {"sent": len(batch)},
+        "$set": {"updated_at": datetime.utcnow()},
+      },
+      upsert=True,
+    )
+    return True
 
+  async def _save(done: bool = False) -> None:
+    await ckpt_col.update_one(
+      {"_id": ckpt_id},
+      {
+        "$set": {
+          "last": _raw(last),
+          "sent_ranges": [[_raw(lo), _raw(hi)] for lo, hi in sent_ranges],
+          "sent": count,
+          "done": done,
+          "updated_at": datetime.utcnow(),
+        }
+      },
+      upsert=True,
+    )
+
+  cursor = users_col.aggregate(
+    _recipients_pipeline(today, shard_buckets(shard, shards), last), batchSize=REMINDER_BATCH_SIZE
+  )
+
+  # (수신자 묶음, 구간 시작(제외), 구간 끝(포함))
+  wave: List[Tuple[List[Recipient], Optional[Key], Key]] = []
+  batch: List[Recipient] = []
+  batch_start: Optional[Key] = last
+  key: Optional[Key] = None
+  failed = False
+
+  async def _flush_wave() -> bool:
+    nonlocal wave, last, sent_ranges
+    if not wave:
+      return True
+    results = await asyncio.gather(*(_send_batch(b, lo, hi) for b, lo, hi in wave))
+    if not all(results):
+      return False
+    # 모두 성공: 이어 읽을 위치를 옮기고 그 앞 구간 기록은 정리
+    last = wave[-1][2]
+    sent_ranges = [(lo, hi) for lo, hi in sent_ranges if hi > last]
+    wave = []
+    await _save()
+    return True
+
+  async for user in cursor:
+    key = (int(user["reminder_bucket"]), user["_id"])
+    if _sent_already(key, sent_ranges):
+      continue
+    batch.append((user["email"], user.get("display_name") or "사용자"))
+    if len(batch) >= REMINDER_BATCH_SIZE:
+      wave.append((batch, batch_start, key))
+      batch, batch_start = [], key
+      if len(wave) >= REMINDER_CONCURRENCY and not await _flush_wave():
+        failed = True
+        break
+
+  if not failed:
+    if batch:
+      wave.append((batch, batch_start, key))
+    failed = not await _flush_wave()
+  if not failed:
+    await _save(done=True)
+
+  await http_client.aclose()
   await close_mongo_connection()
-  print(f"[{datetime.now()}] ✅ Daily reminder sent to {count} users")
+  if failed:
+    print(f"[{datetime.now()}] ❌ Daily reminder stopped after {count} users ({ckpt_id}), rerun to resume")
+  else:
+    print(f"[{datetime.now()}] ✅ Daily reminder sent to {count} users without a record today ({ckpt_id})")
 
 
 if __name__ == "__main__":  # 로컬 테스트용
   asyncio.run(send_daily_reminders())
-
@@ -2,7 +2,7 @@
 
 정리용 스키마 모음:
 - UserCreate, UserOut
-- BulkSpendingsRequest, SpendingDailyDoc
+- BulkSpendingsRequest, SpendingItemPatch, SpendingDailyDoc
 - DailyReportResponse, WeeklyReportResponse, MonthlyProfileResponse
 """
 from __future__ import annotations
@@ -10,6 +10,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import List, Optional, Dict
 
+from bson import ObjectId
 from pydantic import BaseModel, Field
 
 
@@ -26,21 +27,24 @@ class UserOut(BaseModel):
 
 
 class SpendingItemInput(BaseModel):
-    """벌크 입력 시, 각 항목의 입력 스키마"""
+    """벌크 입력 시, 각 항목의 입력 스키마
+    - id: 선택. 기존 항목 id (PUT 교체 시 같은 항목으로 짝지음. POST에서는 무시)
+    """
 
     memo: str
     amount: int = Field(ge=0)
+    id: Optional[str] = None
 
 
 class BulkSpendingsRequest(BaseModel):
     """벌크 입력 요청 바디
-    - user_id: 사용자 식별자
+    - user_id: 선택. 사용자 식별자 (보내면 토큰의 사용자와 같아야 함)
     - items: 여러 소비 항목 (메모/금액)
     - date: 선택. 없으면 서버가 오늘로 처리
     - analyze: 선택. 기본 True (AI 분석 수행)
     """
 
-    user_id: str
+    user_id: Optional[str] = None
     items: List[SpendingItemInput]
     date: Optional[str] = None
     analyze: Optional[bool] = True
@@ -49,11 +53,26 @@ class BulkSpendingsRequest(BaseModel):
 class SpendingItemAnalyzed(BaseModel):
     """AI 분석 후 항목 스키마 (DB 저장용)"""
 
+    id: str = Field(default_factory=lambda: str(ObjectId()))  # 항목 단위 수정/삭제용 고유 id
     memo: str
     amount: int
     category: Optional[str] = None
     tags: List[str] = []
     confidence: Optional[float] = None
+    status: Optional[str] = None  # "pending": 비동기 분류 대기 중 (ENRICHMENT_MODE=async)
+
+
+class SpendingItemPatch(BaseModel):
+    """단일 항목 수정 요청 바디 (보낸 필드만 변경)
+    - memo가 바뀌고 category를 보내지 않으면 다시 분류합니다.
+    - category/tags를 보내면 그대로 저장합니다 (사용자 수정).
+    """
+
+    memo: Optional[str] = None
+    amount: Optional[int] = Field(default=None, ge=0)
+    category: Optional[str] = None
+    tags: Optional[List[str]] = None
+    analyze: Optional[bool] = True
 
 
 class SpendingDailyDoc(BaseModel):
@@ -64,7 +83,11 @@ class SpendingDailyDoc(BaseModel):
     spent_at: str  # YYYY-MM-DD
     items: List[SpendingItemAnalyzed]
     total_amount: int
+    category_totals: Dict[str, int] = {}  # 카테고리별 합계 (쓰기 시점 rollup)
+    tag_totals: Dict[str, int] = {}  # 태그별 합계 (쓰기 시점 rollup)
     ai_comment: Optional[str] = None
+    ai_comment_stale: Optional[bool] = None  # 코멘트 재생성 대기 중
+    comment_version: int = 0  # 저장마다 증가 (오래된 재생성 결과 무시용)
     created_at: datetime
 
 
@@ -72,6 +95,7 @@ class DailyReportResponse(BaseModel):
     total_amount: int
     chart_data: Dict[str, float]  # 태그별 비율 (0~1)
     ai_comment: Optional[str]
+    stale: bool = False  # 코멘트 재생성 대기 중이면 True (ai_comment는 직전 코멘트)
 
 
 class WeeklyReportResponse(BaseModel):
@@ -80,11 +104,14 @@ class WeeklyReportResponse(BaseModel):
     deltas: Dict[str, float]  # 전주 대비 증감률 (-1~1 범위 가정)
     comment: str
     total_amount: Optional[int] = None  # 이번 주 총 소비
+    stale: bool = False  # True면 이전 합계 기준 코멘트 (백그라운드에서 갱신 중)
 
 
 class MonthlyProfileResponse(BaseModel):
     type: str
     rationale: str
     advice: str
+    total_amount: Optional[int] = None  # 이번 달 총 소비 (최신 합계)
+    stale: bool = False  # True면 이전 합계 기준 프로필 (백그라운드에서 갱신 중)
 
 
@@ -0,0 +1,366 @@
+"""CSV / 카드·은행 내역 가져오기 (여러 날짜 한 번에)
+
+POST /api/spendings/import 로 올린 CSV(날짜, 메모, 금액)를 한 줄씩 읽어
+일별 문서에 저장하고, AI 분류는 백그라운드에서 배치로 채웁니다.
+
+CSV 형식
+- 첫 줄이 헤더면 이름으로 열을 찾음 (date/날짜/거래일..., memo/내용/가맹점..., amount/금액/출금...)
+- 헤더가 없으면 (날짜, 메모, 금액) 순서로 읽음
+- 날짜: YYYY-MM-DD, YYYY.MM.DD, YYYY/MM/DD, YYYYMMDD (뒤에 시각이 붙어도 됨)
+- 금액: "12,000", "12000원" (음수 금액은 환불/입금으로 보고 건너뜀)
+- 읽을 수 없는 줄은 건너뛰고 skipped/errors(앞의 IMPORT_MAX_ERRORS개)에 기록
+
+저장 (DB 단계)
+- 업로드 파일을 메모리에 올리지 않고 한 줄씩 파싱, IMPORT_WRITE_BATCH(기본 5000)줄마다
+  날짜별로 묶어 spendings에 bulk_write upsert ($push + total/rollup $inc)
+- 월간 rollup도 같은 묶음의 월별 변화량을 bulk_write로 한 번에 반영
+- analyze=True면 항목을 pending으로 저장하고 분류 작업을 시작 (False면 분류 없이 완료)
+
+분류 (백그라운드)
+- 이 작업이 저장한 항목(id) 중 아직 pending인 것만 IMPORT_CLASSIFY_BATCH(기본 200)개씩 analyze_items_async로 분류
+  (분류 캐시/서킷 브레이커를 그대로 거치므로 OpenAI 장애 시 휴리스틱으로 채워짐)
+- 날짜별 rollup을 다시 맞추고 코멘트는 stale 표시만 (과거 날짜 코멘트를 한꺼번에 만들지 않고,
+  일간 리포트를 조회할 때 재생성)
+- 저장이 중간에 실패해도 이미 저장된 항목은 분류하고, 작업 상태는 failed로 남김
+- 분류가 실패하면 남은 항목은 status="failed"로 표시 (PUT으로 다시 저장하면 재분류)
+- 서버가 재시작되면 남은 pending 항목은 그대로 남음 (다시 가져오기 하거나 PUT/PATCH로 분류)
+
+작업 문서 (import_jobs):
+{
+  _id, user_id, filename, status: writing | classifying | done | failed,
+  rows, days, skipped, errors: [{line, reason}], to_classify, classified,
+  first_date, last_date, error, created_at, updated_at
+}
+"""
+from __future__ import annotations
+
+import asyncio
+import codecs
+import csv
+import os
+import re
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from bson import ObjectId
+from fastapi.concurrency import run_in_threadpool
+from pymongo import UpdateOne
+
+from ai_service import analyze_items_async
+from daily_comment import stale_update
+from database import collections
+from enrichment import FAILED as ITEM_FAILED, PENDING, classification_updates, refresh_rollups
+from rollups import inc_paths, item_totals, month_writes
+from schemas import SpendingItemAnalyzed
+
+
+IMPORT_WRITE_BATCH = int(os.getenv("IMPORT_WRITE_BATCH", "5000"))
+IMPORT_CLASSIFY_BATCH = int(os.getenv("IMPORT_CLASSIFY_BATCH", "200"))
+IMPORT_MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS", "100000"))
+IMPORT_MAX_ERRORS = 20
+
+WRITING = "writing"
+CLASSIFYING = "classifying"
+DONE = "done"
+FAILED = "failed"
+
+# 헤더 이름 → 열 종류 (공백 제거, 소문자 기준)
+_HEADER_ALIASES: Dict[str, set] = {
+    "date": {"date", "spent_at", "날짜", "일자", "거래일", "거래일자", "거래일시", "이용일", "이용일자", "승인일자"},
+    "memo": {"memo", "description", "메모", "내용", "적요", "가맹점", "가맹점명", "이용처", "이용가맹점", "거래내용"},
+    "amount": {"amount", "금액", "이용금액", "거래금액", "출금", "출금액", "승인금액"},
+}
+_DATE_RE = re.compile(r"^\s*(\d{4})[-./]?(\d{1,2})[-./]?(\d{1,2})")
+
+# job_id → 분류 태스크
+_tasks: Dict[str, asyncio.Task] = {}
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+def parse_date(value: str) -> str:
+    m = _DATE_RE.match(value or "")
+    if not m:
+        raise ImportRowError("invalid date")
+    try:
+        return datetime(int(m.group(1)), int(m.group(2)), int(m.group(3))).strftime("%Y-%m-%d")
+    except ValueError:
+        raise ImportRowError("invalid date")
+
+
+def parse_amount(value: str) -> int:
+    cleaned = re.sub(r"[,\s원₩]", "", value or "")
+    try:
+        amount = int(round(float(cleaned)))
+    except ValueError:
+        raise ImportRowError("invalid amount")
+    if amount < 0:
+        raise ImportRowError("negative amount (refund/deposit)")
+    return amount
+
+
+def _columns(header: List[str]) -> Optional[Dict[str, int]]:
+    """헤더 줄이면 열 종류별 위치, 아니면 None"""
+    cols: Dict[str, int] = {}
+    for pos, name in enumerate(header):
+        key = re.sub(r"\s+", "", name or "").lower()
+        for kind, aliases in _HEADER_ALIASES.items():
+            if key in aliases and kind not in cols:
+                cols[kind] = pos
+    return cols if len(cols) == 3 else None
+
+
+def _record_error(job: Dict, line: Optional[int], reason: str) -> None:
+    """job errors에 기록 (앞의 IMPORT_MAX_ERRORS개만)"""
+    if len(job["errors"]) < IMPORT_MAX_ERRORS:
+        job["errors"].append({"line": line, "reason": reason})
+
+
+def iter_rows(stream: BinaryIO, encoding: str, job: Dict) -> Iterator[Tuple[str, str, int]]:
+    """업로드 파일을 한 줄씩 읽어 (날짜, 메모, 금액) 생성. 건너뛴 줄은 job에 기록"""
+    reader = csv.reader(codecs.getreader(encoding)(stream, errors="replace"))
+    cols = {"date": 0, "memo": 1, "amount": 2}
+    first = True
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        if first:
+            first = False
+            header = _columns(row)
+            if header is not None:
+                cols = header
+                continue
+            if not _DATE_RE.match(row[0] if row else ""):
+                # 알 수 없는 이름의 헤더: 순서대로 읽음
+                continue
+        try:
+            if len(row) <= max(cols.values()):
+                raise ImportRowError("missing columns")
+            memo = row[cols["memo"]].strip()
+            if not memo:
+                raise ImportRowError("empty memo")
+            yield parse_date(row[cols["date"]]), memo, parse_amount(row[cols["amount"]])
+        except ImportRowError as e:
+            job["skipped"] += 1
+            _record_error(job, reader.line_num, str(e))
+
+
+def _read_batch(
+    rows: Iterator[Tuple[str, str, int]], job: Dict, analyze: bool, item_ids: set
+) -> Tuple[Dict[str, List[Dict]], bool]:
+    """다음 IMPORT_WRITE_BATCH줄을 날짜별 저장용 항목으로 묶음 (스레드풀에서 실행)
+    반환: (날짜 → 항목들, 파일을 끝까지 읽었는지)
+    """
+    days: Dict[str, List[Dict]] = {}
+    buffered = 0
+    for spent_at, memo, amount in rows:
+        if job["rows"] >= IMPORT_MAX_ROWS:
+            _record_error(job, None, f"stopped after {IMPORT_MAX_ROWS} rows")
+            return days, True
+        item = SpendingItemAnalyzed(memo=memo, amount=amount, status=PENDING if analyze else None)
+        days.setdefault(spent_at, []).append(item.model_dump(exclude_none=True))
+        if analyze:
+            item_ids.add(item.id)
+        job["rows"] += 1
+        job["first_date"] = min(job["first_date"] or spent_at, spent_at)
+        job["last_date"] = max(job["last_date"] or spent_at, spent_at)
+        buffered += 1
+        if buffered >= IMPORT_WRITE_BATCH:
+            return days, False
+    return days, True
+
+
+async def _write_days(user_id: str, days: Dict[str, List[Dict]]) -> None:
+    """날짜별 항목 묶음을 일별 문서/월간 rollup에 bulk_write"""
+    now = datetime.utcnow()
+    day_ops: List[UpdateOne] = []
+    months: Dict[str, Tuple[Dict[str, int], Dict[str, int], int]] = {}
+    for spent_at, items in days.items():
+        cat, tag = item_totals(items)
+        total = sum(it["amount"] for it in items)
+        update = stale_update()
+        update["$push"] = {"items": {"$each": items}}
+        update["$inc"].update({"total_amount": total, **inc_paths(cat, tag)})
+        update["$setOnInsert"] = {"created_at": now}
+        day_ops.append(UpdateOne({"user_id": user_id, "spent_at": spent_at}, update, upsert=True))
+
+        m_cat, m_tag, m_total = months.setdefault(spent_at[:7], ({}, {}, 0))
+        for k, v in cat.items():
+            m_cat[k] = m_cat.get(k, 0) + v
+        for k, v in tag.items():
+            m_tag[k] = m_tag.get(k, 0) + v
+        months[spent_at[:7]] = (m_cat, m_tag, m_total + total)
+
+    cols = collections()
+    async with month_writes(user_id, months):
+        await cols["spendings"].bulk_write(day_ops, ordered=False)
+        await cols["monthly_rollups"].bulk_write(
+            [
+                UpdateOne(
+                    {"user_id": user_id, "month": month},
+                    {"$inc": {"total_amount": total, **inc_paths(cat, tag)}, "$set": {"updated_at": now}},
+                    upsert=True,
+                )
+                for month, (cat, tag, total) in months.items()
+            ],
+            ordered=False,
+        )
+
+
+def _summary(job: Dict) -> Dict:
+    out = {k: v for k, v in job.items() if k not in ("_id", "user_id")}
+    out["id"] = str(job["_id"])
+    return out
+
+
+async def start_import(
+    user_id: str, stream: BinaryIO, filename: Optional[str], encoding: str, analyze: bool
+) -> Dict:
+    """CSV를 파싱해 저장(DB 단계)하고, analyze면 분류 작업을 백그라운드로 시작
+    (파일 읽기/파싱/검증은 스레드풀에서 배치 단위로 돌려 이벤트 루프를 막지 않음)"""
+    jobs_col = collections()["import_jobs"]
+    now = datetime.utcnow()
+    job: Dict = {
+        "_id": ObjectId(),
+        "user_id": user_id,
+        "filename": filename,
+        "status": WRITING,
+        "rows": 0,
+        "days": 0,
+        "skipped": 0,
+        "errors": [],
+        "to_classify": 0,
+        "classified": 0,
+        "first_date": None,
+        "last_date": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+    await jobs_col.insert_one(job)
+
+    seen_days: set = set()
+    item_ids: set = set()
+    rows = iter_rows(stream, encoding, job)
+    try:
+        done = False
+        while not done:
+            days, done = await run_in_threadpool(_read_batch, rows, job, analyze, item_ids)
+            if days:
+                seen_days.update(days)
+                await _write_days(user_id, days)
+    except Exception as e:
+        job.update(status=FAILED, error=str(e))
+        print(f"[IMPORT] job {job['_id']} failed while writing: {e}")
+
+    job["days"] = len(seen_days)
+    write_failed = job["status"] == FAILED
+    classify = bool(item_ids) and bool(seen_days)
+    if not write_failed:
+        job["status"] = CLASSIFYING if classify else DONE
+    # 중간에 실패해도 이미 저장된 pending 항목은 분류 (실패한 묶음의 저장 안 된 항목은 찾지 못하고 넘어감)
+    job["to_classify"] = len(item_ids) if classify else 0
+    job["updated_at"] = datetime.utcnow()
+    await jobs_col.update_one({"_id": job["_id"]}, {"$set": {k: v for k, v in job.items() if k != "_id"}})
+
+    if classify:
+        key = str(job["_id"])
+        task = asyncio.create_task(
+            _classify(
+                job["_id"], user_id, job["first_date"], job["last_date"], item_ids,
+                final_status=FAILED if write_failed else DONE,
+            )
+        )
+        _tasks[key] = task
+        task.add_done_callback(lambda _t: _tasks.pop(key, None))
+    return _summary(job)
+
+
+async def _classify_batch(job_id: ObjectId, user_id: str, batch: List[Tuple[str, Dict]]) -> None:
+    results = await analyze_items_async([(it["memo"], int(it["amount"])) for _, it in batch])
+
+    by_day: Dict[str, Tuple[List[Dict], List[Dict]]] = {}
+    for (spent_at, it), ai in zip(batch, results):
+        items, day_results = by_day.setdefault(spent_at, ([], []))
+        items.append(it)
+        day_results.append(ai)
+    ops: List[UpdateOne] = []
+    for spent_at, (items, day_results) in by_day.items():
+        ops.extend(classification_updates({"user_id": user_id, "spent_at": spent_at}, items, day_results))
+
+    await collections()["spendings"].bulk_write(ops, ordered=False)
+    for spent_at in by_day:
+        await refresh_rollups(user_id, spent_at, schedule_comment=False)
+    await collections()["import_jobs"].update_one(
+        {"_id": job_id}, {"$inc": {"classified": len(batch)}, "$set": {"updated_at": datetime.utcnow()}}
+    )
+
+
+async def _mark_items_failed(user_id: str, first_date: str, last_date: str, item_ids: set) -> None:
+    """분류하지 못한 이 작업의 pending 항목을 failed로 표시 (pending으로 영원히 남지 않도록)"""
+    ids = list(item_ids)
+    spend_col = collections()["spendings"]
+    for start in range(0, len(ids), IMPORT_CLASSIFY_BATCH):
+        chunk = ids[start:start + IMPORT_CLASSIFY_BATCH]
+        await spend_col.update_many(
+            {"user_id": user_id, "spent_at": {"$gte": first_date, "$lte": last_date}, "items.id": {"$in": chunk}},
+            {"$set": {"items.$[it].status": ITEM_FAILED}},
+            array_filters=[{"it.id": {"$in": chunk}, "it.status": PENDING}],
+        )
+
+
+async def _classify(
+    job_id: ObjectId, user_id: str, first_date: str, last_date: str, item_ids: set,
+    final_status: str = DONE,
+) -> None:
+    """이 작업이 저장한 항목(item_ids) 중 아직 pending인 것을 배치로 분류
+    (같은 날짜 범위의 다른 pending 항목은 enrichment 워커 등 원래 경로에 맡김)"""
+    jobs_col = collections()["import_jobs"]
+    cursor = collections()["spendings"].find(
+        {"user_id": user_id, "spent_at": {"$gte": first_date, "$lte": last_date}, "items.status": PENDING},
+        {"spent_at": 1, "items": 1},
+    ).sort("spent_at", 1)
+
+    status: Dict = {"status": final_status}
+    try:
+        batch: List[Tuple[str, Dict]] = []
+        async for doc in cursor:
+            for it in doc.get("items") or []:
+                if it.get("status") == PENDING and it.get("id") in item_ids:
+                    batch.append((doc["spent_at"], it))
+            if len(batch) >= IMPORT_CLASSIFY_BATCH:
+                await _classify_batch(job_id, user_id, batch)
+                batch = []
+        if batch:
+            await _classify_batch(job_id, user_id, batch)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"[IMPORT] job {job_id} failed while classifying: {e}")
+        status = {"status": FAILED, "error": str(e)}
+        try:
+            await _mark_items_failed(user_id, first_date, last_date, item_ids)
+        except Exception as mark_error:
+            print(f"[IMPORT] job {job_id} could not mark items failed: {mark_error}")
+
+    await jobs_col.update_one({"_id": job_id}, {"$set": {**status, "updated_at": datetime.utcnow()}})
+
+
+async def get_job(user_id: str, job_id: str) -> Optional[Dict]:
+    try:
+        oid = ObjectId(job_id)
+    except Exception:
+        return None
+    job = await collections()["import_jobs"].find_one({"_id": oid, "user_id": user_id})
+    return _summary(job) if job else None
+
+
+async def stop() -> None:
+    """앱 종료 시 진행 중인 분류 작업 정리 (남은 항목은 pending으로 남음)"""
+    tasks = list(_tasks.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _tasks.clear()
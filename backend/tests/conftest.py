@@ -0,0 +1,12 @@
+"""
+pytest 설정
+
+백엔드 모듈은 backend 폴더 기준으로 임포트하므로(`from database import ...`)
+어느 위치에서 실행해도 backend 폴더가 sys.path에 들어가게 합니다.
+"""
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
@@ -0,0 +1,85 @@
+"""ai_service 스트리밍 테스트 (가짜 OpenAI 클라이언트)"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import ai_service
+import llm_guard
+
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class _Stream:
+    def __init__(self, pieces, fail_after=None, delay_after_first=0.0):
+        self.pieces, self.fail_after, self.delay = pieces, fail_after, delay_after_first
+
+    async def __aiter__(self):
+        for i, piece in enumerate(self.pieces):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise ConnectionError("connection reset")
+            if i:
+                await asyncio.sleep(self.delay)
+            yield _chunk(piece)
+
+
+def _fake_client(stream):
+    async def create(**kwargs):
+        return stream
+
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+@pytest.fixture
+def fresh_breaker(monkeypatch):
+    breaker = llm_guard.CircuitBreaker(failures=3, cooldown_sec=30, slow_sec=0.05)
+    monkeypatch.setattr(llm_guard, "breaker", breaker)
+    return breaker
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    saved = []
+
+    async def lookup(kind, key):
+        return None
+
+    async def store(kind, key, value):
+        saved.append(value)
+
+    monkeypatch.setattr(ai_service.gpt_cache, "lookup", lookup)
+    monkeypatch.setattr(ai_service.gpt_cache, "store", store)
+    return saved
+
+
+async def _collect(gen, out):
+    async for piece in gen:
+        out.append(piece)
+
+
+def test_stream_cached_does_not_store_interrupted_stream(monkeypatch, fresh_breaker, stored):
+    monkeypatch.setattr(ai_service, "aclient", _fake_client(_Stream(["첫 조각", "둘째"], fail_after=1)))
+    got = []
+    with pytest.raises(ai_service.StreamInterrupted):
+        asyncio.run(_collect(ai_service._stream_cached("s", "u", 100, "weekly"), got))
+    assert got == ["첫 조각"]
+    assert stored == []
+    assert fresh_breaker.stats["failures"] == 1
+
+
+def test_stream_cached_stores_complete_stream(monkeypatch, fresh_breaker, stored):
+    monkeypatch.setattr(ai_service, "aclient", _fake_client(_Stream(["좋은 ", "한 주"])))
+    got = []
+    asyncio.run(_collect(ai_service._stream_cached("s", "u", 100, "weekly"), got))
+    assert got == ["좋은 ", "한 주"]
+    assert stored == ["좋은 한 주"]
+
+
+def test_stream_breaker_uses_time_to_first_token(monkeypatch, fresh_breaker, stored):
+    # 전체 스트림은 slow_sec보다 길지만 첫 조각은 바로 옴
+    monkeypatch.setattr(ai_service, "aclient", _fake_client(_Stream(["a", "b", "c"], delay_after_first=0.04)))
+    asyncio.run(_collect(ai_service._stream_gpt("s", "u", 100), []))
+    assert fresh_breaker.stats["slow_calls"] == 0
+    assert fresh_breaker.consecutive_failures == 0
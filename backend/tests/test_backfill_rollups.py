@@ -0,0 +1,70 @@
+"""일별 rollup 맞추기 테스트 (DB 없이 컬렉션을 바꿔 끼움)"""
+import asyncio
+
+from scheduler import backfill_rollups
+from scheduler.backfill_rollups import outdated_fields, with_item_ids
+
+
+ITEMS = [{"id": "a", "amount": 1000, "category": "식비", "tags": ["필수"]}]
+
+
+def test_outdated_fields_skips_docs_already_in_sync():
+    assert outdated_fields({"items": ITEMS, "category_totals": {"식비": 1000}, "tag_totals": {"필수": 1000}}) is None
+    assert outdated_fields({"items": ITEMS}) == {"category_totals": {"식비": 1000}, "tag_totals": {"필수": 1000}}
+
+
+def test_with_item_ids_fills_only_missing_ids():
+    assert with_item_ids(ITEMS) is None
+    legacy = [{"memo": "점심", "amount": 9000}, ITEMS[0], {"id": "", "memo": "커피", "amount": 4500}]
+    filled = with_item_ids(legacy)
+    assert filled[1] is ITEMS[0]
+    assert filled[0]["memo"] == "점심" and filled[0]["id"]
+    assert filled[2]["memo"] == "커피" and filled[2]["id"]
+    assert len({it["id"] for it in filled}) == 3
+
+
+def test_outdated_fields_assigns_ids_even_when_totals_match():
+    legacy = {"items": [{"amount": 1000, "category": "식비"}], "category_totals": {"식비": 1000}, "tag_totals": {}}
+    fields = outdated_fields(legacy)
+    assert set(fields) == {"items"}
+    assert fields["items"][0]["id"]
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self._it = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._it)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _Result:
+    def __init__(self, matched):
+        self.matched_count = matched
+
+
+def test_fix_batch_rereads_docs_changed_in_between():
+    # 읽은 뒤 다른 저장이 항목을 추가함 (그 저장이 rollup도 $inc 했지만 예전 문서라 일부만 있음)
+    changed = {"_id": 2, "items": ITEMS + [{"id": "b", "amount": 500, "category": "교통"}], "category_totals": {"교통": 500}}
+    docs = [{"_id": 1, "items": ITEMS}, {"_id": 2, "items": ITEMS}]
+    writes = []
+
+    class FakeSpendings:
+        async def bulk_write(self, ops, ordered):
+            current = {1: docs[0]["items"], 2: changed["items"]}
+            writes.append([op._filter for op in ops])
+            return _Result(sum(1 for op in ops if op._filter["items"] == current[op._filter["_id"]]))
+
+        def find(self, query, projection):
+            assert query == {"_id": {"$in": [1, 2]}}
+            return _Cursor([{**docs[0], "category_totals": {"식비": 1000}, "tag_totals": {"필수": 1000}}, changed])
+
+    fixed, skipped = asyncio.run(backfill_rollups._fix_batch(FakeSpendings(), docs))
+    assert (fixed, skipped) == (2, 0)
+    assert writes[1] == [{"_id": 2, "items": changed["items"]}]
@@ -0,0 +1,105 @@
+"""enrichment 워커 테스트 (DB 없이 claim/process를 바꿔 끼움)"""
+import asyncio
+import contextlib
+
+import enrichment
+
+
+def test_worker_survives_process_job_error(monkeypatch):
+    calls = []
+
+    async def fake_claim():
+        if len(calls) >= 2:
+            raise asyncio.CancelledError
+        return {"_id": len(calls)}
+
+    async def fake_process(job):
+        calls.append(job["_id"])
+        raise RuntimeError("status write failed")
+
+    monkeypatch.setattr(enrichment, "claim_job", fake_claim)
+    monkeypatch.setattr(enrichment, "process_job", fake_process)
+
+    async def run():
+        try:
+            await enrichment._worker_loop(0)
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run())
+    assert calls == [0, 1]
+
+
+def test_dead_job_marks_items_failed(monkeypatch):
+    writes = {}
+
+    class FakeCol:
+        def __init__(self, name):
+            self.name = name
+
+        async def update_one(self, query, update):
+            writes.setdefault(self.name, []).append(update)
+
+        async def bulk_write(self, ops, ordered=True):
+            writes.setdefault(self.name, []).extend(ops)
+
+    async def failing_apply(job):
+        raise RuntimeError("openai down")
+
+    monkeypatch.setattr(enrichment, "collections", lambda: {n: FakeCol(n) for n in ("enrichment_jobs", "spendings")})
+    monkeypatch.setattr(enrichment, "_apply_classification", failing_apply)
+    monkeypatch.setattr(enrichment, "mark_stale", lambda *a: None)
+
+    job = {
+        "_id": 1, "user_id": "u", "spent_at": "2024-03-05",
+        "attempts": enrichment.ENRICH_MAX_ATTEMPTS,
+        "items": [{"id": "a", "memo": "커피", "amount": 4500}],
+    }
+    asyncio.run(enrichment.process_job(job))
+
+    assert writes["enrichment_jobs"][0]["$set"]["status"] == "dead"
+    (op,) = writes["spendings"]
+    assert op._doc == {"$set": {"items.$[it].status": enrichment.FAILED}}
+    assert op._array_filters == [{"it.id": "a", "it.memo": "커피", "it.status": enrichment.PENDING}]
+
+
+def test_refresh_rollups_retries_when_items_changed(monkeypatch):
+    first = {"_id": 1, "items": [{"amount": 1000, "category": "식비"}], "category_totals": {"기타": 1000}}
+    second = {
+        "_id": 1,
+        "items": [{"amount": 1000, "category": "식비"}, {"amount": 500, "category": "교통"}],
+        "category_totals": {"기타": 1000, "교통": 500},
+    }
+    reads = iter([first, second])
+    filters, deltas = [], []
+
+    class Result:
+        def __init__(self, matched):
+            self.matched_count = matched
+
+    class FakeSpendings:
+        async def find_one(self, query, projection):
+            return next(reads)
+
+        async def update_one(self, query, update):
+            if "items" in query:
+                filters.append(query["items"])
+                # 첫 번째 읽기 뒤에는 다른 저장이 끼어든 상황
+                return Result(0 if query["items"] == first["items"] else 1)
+            return Result(1)
+
+    async def fake_delta(user_id, spent_at, old, new):
+        deltas.append((old, new))
+
+    monkeypatch.setattr(enrichment, "collections", lambda: {"spendings": FakeSpendings()})
+    @contextlib.asynccontextmanager
+    async def fake_month_writes(user_id, months):
+        yield
+
+    monkeypatch.setattr(enrichment, "apply_month_delta", fake_delta)
+    monkeypatch.setattr(enrichment, "month_writes", fake_month_writes)
+
+    asyncio.run(enrichment.refresh_rollups("u", "2024-03-05", schedule_comment=False))
+
+    assert filters == [first["items"], second["items"]]
+    assert deltas == [(({"기타": 1000, "교통": 500}, {}), ({"식비": 1000, "교통": 500}, {}))]
@@ -0,0 +1,75 @@
+"""gpt_cache single-flight 테스트 (persist=False 종류만 사용해 DB 없이 실행)"""
+import asyncio
+
+import pytest
+
+import gpt_cache
+
+
+@pytest.fixture(autouse=True)
+def _clean_cache():
+    gpt_cache._lru.clear()
+    gpt_cache._inflight.clear()
+    yield
+    gpt_cache._lru.clear()
+    gpt_cache._inflight.clear()
+
+
+def test_followers_share_leader_result():
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "응답"
+
+    async def run():
+        return await asyncio.gather(*(gpt_cache.cached_call("classify", "k", call) for _ in range(3)))
+
+    assert asyncio.run(run()) == ["응답"] * 3
+    assert len(calls) == 1
+
+
+def test_follower_survives_leader_cancellation():
+    async def run():
+        gate = asyncio.Event()
+
+        async def slow_call():
+            gate.set()
+            await asyncio.sleep(10)
+            return "leader"
+
+        async def fast_call():
+            return "follower"
+
+        leader = asyncio.create_task(gpt_cache.cached_call("classify", "k", slow_call))
+        await gate.wait()
+        follower = asyncio.create_task(gpt_cache.cached_call("classify", "k", fast_call))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(run()) == "follower"
+
+
+def test_follower_retries_after_empty_leader_result():
+    async def run():
+        gate = asyncio.Event()
+
+        async def leader_call():
+            await gate.wait()
+            return ""  # 예: 먼저 호출한 쪽의 마감이 지나 폴백
+
+        async def follower_call():
+            return "follower"
+
+        leader = asyncio.create_task(gpt_cache.cached_call("classify", "k", leader_call))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(gpt_cache.cached_call("classify", "k", follower_call))
+        await asyncio.sleep(0)
+        gate.set()
+        return await leader, await follower
+
+    assert asyncio.run(run()) == ("", "follower")
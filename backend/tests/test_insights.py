@@ -0,0 +1,84 @@
+"""insights 헤드라인 캐시 테스트 (DB/NewsAPI 없이)"""
+import asyncio
+
+import pytest
+
+from routers import insights
+
+
+class _Col:
+    async def find_one(self, *args, **kwargs):
+        return None
+
+
+@pytest.fixture(autouse=True)
+def _clean(monkeypatch):
+    insights._headlines_cache.clear()
+    monkeypatch.setattr(insights, "_kick", None)
+    monkeypatch.setattr(insights, "collections", lambda: {"news_headlines": _Col()})
+    yield
+    insights._headlines_cache.clear()
+
+
+def test_first_request_waits_for_initial_fill(monkeypatch):
+    calls = []
+
+    async def fake_refresh(force=False):
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        insights._headlines_cache["2024-W10"] = {"headlines": [{"title": "t", "url": "u"}]}
+
+    monkeypatch.setattr(insights, "refresh_headlines", fake_refresh)
+
+    async def run():
+        return await asyncio.gather(*(insights._cached_headlines("2024-W10") for _ in range(3)))
+
+    assert asyncio.run(run()) == [([{"title": "t", "url": "u"}], False)] * 3
+    assert calls == [1]
+
+
+def test_first_fill_gives_up_after_timeout(monkeypatch):
+    async def slow_refresh(force=False):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(insights, "refresh_headlines", slow_refresh)
+    monkeypatch.setattr(insights, "NEWS_FIRST_FILL_SEC", 0.01)
+
+    async def run():
+        headlines = await insights._cached_headlines("2024-W10")
+        assert insights._kick is not None and not insights._kick.done()
+        await insights.stop_refresher()
+        return headlines
+
+    assert asyncio.run(run()) == ([], True)
+
+
+def test_first_fill_error_returns_empty(monkeypatch):
+    async def failing_refresh(force=False):
+        raise RuntimeError("newsapi down")
+
+    monkeypatch.setattr(insights, "refresh_headlines", failing_refresh)
+    assert asyncio.run(insights._cached_headlines("2024-W10")) == ([], True)
+
+
+def test_week_rollover_serves_previous_week_without_waiting(monkeypatch):
+    insights._headlines_cache["2024-W09"] = {"headlines": [{"title": "old", "url": "u"}]}
+    refreshed = []
+
+    async def slow_refresh(force=False):
+        await asyncio.sleep(0.05)
+        refreshed.append(1)
+        insights._headlines_cache.clear()
+        insights._headlines_cache["2024-W10"] = {"headlines": [{"title": "new", "url": "u"}]}
+
+    monkeypatch.setattr(insights, "refresh_headlines", slow_refresh)
+
+    async def run():
+        first = await insights._cached_headlines("2024-W10")
+        assert refreshed == []  # 갱신을 기다리지 않음
+        await insights._kick
+        return first, await insights._cached_headlines("2024-W10")
+
+    first, second = asyncio.run(run())
+    assert first == ([{"title": "old", "url": "u"}], True)
+    assert second[0] == [{"title": "new", "url": "u"}]
@@ -0,0 +1,45 @@
+"""keyword_classifier 테스트"""
+import pytest
+
+from keyword_classifier import HIGH_AMOUNT, MAX_TAGS, classify, is_confident
+
+
+def test_single_strong_keyword_is_confident():
+    match = classify("스타벅스 아메리카노", 4500)
+    assert match.category == "식비"
+    assert match.tags == ["즐거움"]
+    assert is_confident(match)
+
+
+def test_longest_keyword_wins():
+    assert classify("배달의민족 주문", 20000).matched == ["배달의민족"]
+
+
+def test_mixed_categories_lower_confidence():
+    single = classify("택시", 10000)
+    mixed = classify("택시 타고 영화", 10000)
+    assert mixed.category == "교통"
+    assert mixed.confidence < single.confidence
+
+
+def test_unknown_memo_falls_back():
+    match = classify("알 수 없는 지출", 1000)
+    assert (match.category, match.tags, match.matched) == ("기타", [], [])
+    assert not is_confident(match)
+
+
+@pytest.mark.parametrize("memo", ["미술관", "기술 세미나", "책상 구매"])
+def test_short_keywords_need_word_boundaries(memo):
+    assert classify(memo, 10000).matched == []
+
+
+@pytest.mark.parametrize("memo, keyword", [("술", "술"), ("친구랑 술 한잔", "술"), ("책 구매", "책")])
+def test_short_keywords_match_whole_words(memo, keyword):
+    assert classify(memo, 10000).matched == [keyword]
+
+
+def test_high_amount_tag_respects_tag_limit():
+    match = classify("점심 회식", HIGH_AMOUNT)
+    assert len(match.tags) <= MAX_TAGS
+    assert classify("택시", HIGH_AMOUNT).tags == ["효율", "고가"]
+    assert classify("택시 ktx", HIGH_AMOUNT).tags == ["효율", "필수"]
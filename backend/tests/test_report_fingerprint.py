@@ -0,0 +1,51 @@
+"""report_fingerprint 테스트"""
+import pytest
+
+from report_fingerprint import THRESHOLDS, distance, fingerprint, needs_refresh, relative_change
+
+
+BASE = {"식비": 60000, "교통": 30000, "여가": 10000}
+
+
+def _doc(totals):
+    return {"fingerprint": fingerprint(totals), "total_amount": sum(totals.values())}
+
+
+def test_fingerprint_shares_ignore_non_positive():
+    fp = fingerprint({"식비": 75, "교통": 25, "기타": 0, "환불": -10})
+    assert fp == {"total": 100, "shares": {"식비": 0.75, "교통": 0.25}}
+    assert fingerprint({}) == {"total": 0, "shares": {}}
+
+
+def test_distance_and_relative_change():
+    assert distance({"a": 1.0}, {"a": 1.0}) == 0
+    assert distance({"a": 1.0}, {"b": 1.0}) == 1
+    assert relative_change(100, 110) == pytest.approx(0.1)
+    assert relative_change(0, 0) == 0.0
+    assert relative_change(0, 1) == float("inf")
+
+
+def test_missing_doc_needs_refresh():
+    assert needs_refresh("weekly", None, BASE)
+
+
+@pytest.mark.parametrize("kind", ["weekly", "monthly"])
+def test_small_change_keeps_report(kind):
+    assert not needs_refresh(kind, _doc(BASE), {**BASE, "식비": 60001})
+
+
+@pytest.mark.parametrize("kind", ["weekly", "monthly"])
+def test_large_total_change_refreshes(kind):
+    bump = 1 + THRESHOLDS[kind].relative_change + 0.05
+    assert needs_refresh(kind, _doc(BASE), {k: int(v * bump) for k, v in BASE.items()})
+
+
+def test_distribution_shift_refreshes_with_same_total():
+    shifted = {"식비": 40000, "교통": 30000, "여가": 30000}
+    assert needs_refresh("weekly", _doc(BASE), shifted)
+
+
+def test_legacy_doc_without_fingerprint_compares_total():
+    legacy = {"total_amount": 100000}
+    assert not needs_refresh("monthly", legacy, BASE)
+    assert needs_refresh("monthly", legacy, {**BASE, "식비": 60001})
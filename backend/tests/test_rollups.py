@@ -0,0 +1,157 @@
+"""rollups 헬퍼 테스트"""
+import asyncio
+from datetime import datetime, timedelta
+
+import rollups
+from rollups import daily_fields, diff_totals, doc_totals, inc_paths, item_totals, safe_key
+
+
+ITEMS = [
+    {"memo": "점심", "amount": 9000, "category": "식비", "tags": ["필수"]},
+    {"memo": "커피", "amount": 4500, "category": "식비", "tags": ["즐거움"]},
+    {"memo": "미분류", "amount": 1000, "status": "pending"},
+]
+
+
+def test_item_totals_defaults_to_etc():
+    cat, tag = item_totals(ITEMS)
+    assert cat == {"식비": 13500, "기타": 1000}
+    assert tag == {"필수": 9000, "즐거움": 4500}
+
+
+def test_safe_key_replaces_path_characters():
+    assert safe_key("a.b") == "a·b"
+    assert safe_key("$set") == "set"
+    assert safe_key("$") == "기타"
+
+
+def test_doc_totals_prefers_stored_rollup_and_falls_back_to_items():
+    stored = {"items": ITEMS, "category_totals": {"식비": 1}, "tag_totals": {}}
+    assert doc_totals(stored) == ({"식비": 1}, {})
+    assert doc_totals({"items": ITEMS}) == item_totals(ITEMS)
+    assert doc_totals(None) == ({}, {})
+
+
+def test_diff_totals_drops_zero_keys():
+    old = ({"식비": 10, "교통": 5}, {"필수": 10})
+    new = ({"식비": 10, "여가": 3}, {"필수": 4})
+    assert diff_totals(old, new) == ({"교통": -5, "여가": 3}, {"필수": -6})
+    assert diff_totals(old, old) == ({}, {})
+
+
+def test_inc_paths_prefixes_fields():
+    assert inc_paths({"식비": 3}, {"필수": -2}) == {"category_totals.식비": 3, "tag_totals.필수": -2}
+
+
+def test_daily_fields_matches_item_totals():
+    cat, tag = item_totals(ITEMS)
+    assert daily_fields(ITEMS) == {"category_totals": cat, "tag_totals": tag}
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        self._it = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._it)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _Col:
+    def __init__(self, one=None, docs=()):
+        self.one, self.docs = one, list(docs)
+        self.updates = []
+
+    async def find_one(self, *args, **kwargs):
+        return self.one
+
+    def find(self, *args, **kwargs):
+        return _Cursor(self.docs)
+
+    async def update_one(self, query, update, upsert=False):
+        self.updates.append((query, update))
+
+
+DAYS = [
+    # 배포 전 문서: 저장된 rollup이 일부만 있어도 items 기준으로 계산
+    {"items": [{"amount": 5000, "category": "식비", "tags": ["필수"]}], "category_totals": {}},
+    {"items": [{"amount": 3000, "category": "교통", "tags": ["필수"]}]},
+]
+DAYS_TOTALS = ({"식비": 5000, "교통": 3000}, {"필수": 8000})
+
+
+def _use(monkeypatch, month_col, ready=True):
+    monkeypatch.setattr(rollups, "_daily_ready", ready)
+    monkeypatch.setattr(
+        rollups,
+        "collections",
+        lambda: {"monthly_rollups": month_col, "spendings": _Col(docs=DAYS), "job_checkpoints": _Col()},
+    )
+
+
+def test_month_totals_computes_from_items_before_daily_backfill(monkeypatch):
+    # delta만 쌓인 complete 아닌 문서는 믿지 않음
+    month_col = _Col(one={"_id": 1, "category_totals": {"식비": 100}, "tag_totals": {}})
+    _use(monkeypatch, month_col, ready=False)
+    assert asyncio.run(rollups.month_totals("u", "2024-03")) == DAYS_TOTALS
+    assert month_col.updates == []
+
+
+def test_month_totals_trusts_complete_doc(monkeypatch):
+    month_col = _Col(one={"_id": 1, "category_totals": {"식비": 100, "교통": 0}, "tag_totals": {}, "complete": True})
+    _use(monkeypatch, month_col)
+    assert asyncio.run(rollups.month_totals("u", "2024-03")) == ({"식비": 100}, {})
+
+
+def test_month_totals_seeds_with_version_check(monkeypatch):
+    month_col = _Col(one={"_id": 1, "category_totals": {"식비": 100}, "version": 4, "writing": 0})
+    _use(monkeypatch, month_col)
+    assert asyncio.run(rollups.month_totals("u", "2024-03")) == DAYS_TOTALS
+    ((query, update),) = month_col.updates
+    assert query == {"_id": 1, "version": 4}
+    assert update["$set"]["complete"] is True
+    assert update["$set"]["total_amount"] == 8000
+
+
+def test_month_totals_does_not_seed_while_writing(monkeypatch):
+    month_col = _Col(one={"_id": 1, "version": 4, "writing": 1, "writing_at": datetime.utcnow()})
+    _use(monkeypatch, month_col)
+    assert asyncio.run(rollups.month_totals("u", "2024-03")) == DAYS_TOTALS
+    assert month_col.updates == []
+
+
+def test_month_totals_ignores_stale_writing_mark(monkeypatch):
+    old = datetime.utcnow() - timedelta(seconds=rollups.MONTH_WRITE_STALE_SEC + 1)
+    month_col = _Col(one={"_id": 1, "version": 4, "writing": 1, "writing_at": old})
+    _use(monkeypatch, month_col)
+    asyncio.run(rollups.month_totals("u", "2024-03"))
+    assert [q for q, _ in month_col.updates] == [{"_id": 1, "version": 4}]
+
+
+def test_month_writes_brackets_and_unsets_complete_on_error(monkeypatch):
+    month_col = _Col()
+    _use(monkeypatch, month_col)
+
+    async def write(fail):
+        async with rollups.month_writes("u", ["2024-03-05", "2024-03-06"]):
+            if fail:
+                raise RuntimeError("boom")
+
+    asyncio.run(write(False))
+    begin, end = month_col.updates
+    assert begin[0] == {"user_id": "u", "month": "2024-03"}
+    assert begin[1]["$inc"] == {"writing": 1, "version": 1}
+    assert end[1] == {"$inc": {"writing": -1}}
+
+    month_col.updates.clear()
+    try:
+        asyncio.run(write(True))
+    except RuntimeError:
+        pass
+    assert month_col.updates[-1][1] == {"$inc": {"writing": -1}, "$unset": {"complete": ""}}
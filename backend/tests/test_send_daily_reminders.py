@@ -0,0 +1,41 @@
+"""리마인더 샤딩/체크포인트 헬퍼 테스트"""
+from bson import ObjectId
+
+from scheduler.send_daily_reminders import (
+    REMINDER_BUCKETS,
+    _recipients_pipeline,
+    _sent_already,
+    reminder_bucket,
+    shard_buckets,
+)
+
+
+def test_shard_buckets_partition_all_buckets():
+    for shards in (1, 3, 4, 7):
+        ranges = [shard_buckets(s, shards) for s in range(shards)]
+        assert ranges[0][0] == 0 and ranges[-1][1] == REMINDER_BUCKETS
+        assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+
+
+def test_reminder_bucket_is_stable():
+    oid = ObjectId("65a000000000000000000001")
+    assert reminder_bucket(oid) == reminder_bucket(ObjectId(str(oid)))
+    assert 0 <= reminder_bucket(oid) < REMINDER_BUCKETS
+
+
+def test_pipeline_matches_shard_before_lookup():
+    after = (5, ObjectId())
+    pipeline = _recipients_pipeline("2024-03-05", (0, 1024), after)
+    first = pipeline[0]["$match"]
+    assert first["reminder_bucket"] == {"$gte": 0, "$lt": 1024}
+    assert first["$or"][1] == {"reminder_bucket": 5, "_id": {"$gt": after[1]}}
+    assert "$lookup" in pipeline[2]
+
+
+def test_sent_already_uses_half_open_ranges():
+    a, b, c = ObjectId(), ObjectId(), ObjectId()
+    ranges = [((1, a), (1, c))]
+    assert not _sent_already((1, a), ranges)
+    assert _sent_already((1, b), ranges)
+    assert _sent_already((1, c), ranges)
+    assert not _sent_already((2, a), ranges)
@@ -0,0 +1,156 @@
+"""spending_import CSV 파싱 테스트"""
+import io
+
+import pytest
+
+from spending_import import IMPORT_MAX_ERRORS, ImportRowError, _read_batch, iter_rows, parse_amount, parse_date
+
+
+def _job():
+    return {"rows": 0, "skipped": 0, "errors": [], "first_date": None, "last_date": None}
+
+
+def _rows(text, encoding="utf-8", job=None):
+    return list(iter_rows(io.BytesIO(text.encode(encoding)), encoding, job if job is not None else _job()))
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("2024-03-05", "2024-03-05"),
+        ("2024.3.5", "2024-03-05"),
+        ("2024/03/05 13:22", "2024-03-05"),
+        ("20240305", "2024-03-05"),
+    ],
+)
+def test_parse_date_formats(value, expected):
+    assert parse_date(value) == expected
+
+
+@pytest.mark.parametrize("value", ["", "03-05", "2024-02-30", "어제"])
+def test_parse_date_invalid(value):
+    with pytest.raises(ImportRowError):
+        parse_date(value)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("12,000", 12000), ("12000원", 12000), ("₩ 3,500", 3500), ("4500.4", 4500), ("0", 0)],
+)
+def test_parse_amount(value, expected):
+    assert parse_amount(value) == expected
+
+
+@pytest.mark.parametrize("value", ["-12000", "-1,000원"])
+def test_parse_amount_rejects_negative(value):
+    with pytest.raises(ImportRowError):
+        parse_amount(value)
+
+
+def test_parse_amount_invalid():
+    with pytest.raises(ImportRowError):
+        parse_amount("abc")
+
+
+def test_iter_rows_header_by_name():
+    text = "금액,가맹점,거래일자\n\"12,000\",스타벅스,2024.03.05\n3000,편의점,2024-03-06\n"
+    assert _rows(text) == [("2024-03-05", "스타벅스", 12000), ("2024-03-06", "편의점", 3000)]
+
+
+def test_iter_rows_without_header_and_unknown_header():
+    assert _rows("2024-03-05,점심,9000\n") == [("2024-03-05", "점심", 9000)]
+    assert _rows("a,b,c\n2024-03-05,점심,9000\n") == [("2024-03-05", "점심", 9000)]
+
+
+def test_iter_rows_cp949():
+    assert _rows("날짜,내용,금액\n2024-03-05,김밥,3500\n", encoding="cp949") == [("2024-03-05", "김밥", 3500)]
+
+
+def test_iter_rows_skips_bad_rows_and_records_lines():
+    job = _job()
+    text = "날짜,메모,금액\n2024-03-05,점심,9000\n\n2024-13-01,x,1\n2024-03-06,,1000\n2024-03-07,환불,-5000\n2024-03-08,택시\n"
+    assert _rows(text, job=job) == [("2024-03-05", "점심", 9000)]
+    assert job["skipped"] == 4
+    assert [e["line"] for e in job["errors"]] == [4, 5, 6, 7]
+    assert [e["reason"] for e in job["errors"]] == [
+        "invalid date", "empty memo", "negative amount (refund/deposit)", "missing columns",
+    ]
+
+
+def test_iter_rows_caps_recorded_errors():
+    job = _job()
+    _rows("".join("bad,row,x\n" for _ in range(IMPORT_MAX_ERRORS + 5)), job=job)
+    assert job["skipped"] == IMPORT_MAX_ERRORS + 4  # 첫 줄은 알 수 없는 헤더로 건너뜀
+    assert len(job["errors"]) == IMPORT_MAX_ERRORS
+
+
+def test_read_batch_groups_by_day_and_tracks_ids(monkeypatch):
+    monkeypatch.setattr("spending_import.IMPORT_WRITE_BATCH", 2)
+    job, ids = _job(), set()
+    rows = iter([("2024-03-06", "a", 1), ("2024-03-05", "b", 2), ("2024-03-05", "c", 3)])
+
+    days, done = _read_batch(rows, job, True, ids)
+    assert not done
+    assert sorted(days) == ["2024-03-05", "2024-03-06"]
+    assert days["2024-03-05"][0]["status"] == "pending"
+
+    days, done = _read_batch(rows, job, True, ids)
+    assert done
+    assert [it["memo"] for it in days["2024-03-05"]] == ["c"]
+    assert job["rows"] == 3 and len(ids) == 3
+    assert (job["first_date"], job["last_date"]) == ("2024-03-05", "2024-03-06")
+
+
+def test_read_batch_row_limit_error_is_capped(monkeypatch):
+    monkeypatch.setattr("spending_import.IMPORT_MAX_ROWS", 1)
+    job = _job()
+    job["errors"] = [{"line": n, "reason": "invalid date"} for n in range(IMPORT_MAX_ERRORS)]
+    days, done = _read_batch(iter([("2024-03-05", "a", 1), ("2024-03-05", "b", 2)]), job, False, set())
+    assert done and job["rows"] == 1
+    assert len(job["errors"]) == IMPORT_MAX_ERRORS
+
+
+def test_start_import_classifies_written_items_after_write_failure(monkeypatch):
+    import asyncio
+
+    import spending_import
+
+    class FakeJobs:
+        def __init__(self):
+            self.saved = {}
+
+        async def insert_one(self, doc):
+            self.saved = dict(doc)
+
+        async def update_one(self, query, update):
+            self.saved.update(update["$set"])
+
+    jobs = FakeJobs()
+    writes, started = [], []
+
+    async def flaky_write(user_id, days):
+        if writes:
+            raise RuntimeError("bulk write failed")
+        writes.append(days)
+
+    async def fake_classify(job_id, user_id, first, last, item_ids, final_status):
+        started.append((set(item_ids), final_status))
+
+    monkeypatch.setattr(spending_import, "IMPORT_WRITE_BATCH", 1)
+    monkeypatch.setattr(spending_import, "collections", lambda: {"import_jobs": jobs})
+    monkeypatch.setattr(spending_import, "_write_days", flaky_write)
+    monkeypatch.setattr(spending_import, "_classify", fake_classify)
+
+    async def run():
+        stream = io.BytesIO("2024-03-05,점심,9000\n2024-03-06,택시,12000\n".encode())
+        summary = await spending_import.start_import("u", stream, "x.csv", "utf-8", True)
+        await asyncio.gather(*spending_import._tasks.values())
+        return summary
+
+    summary = asyncio.run(run())
+    assert summary["status"] == spending_import.FAILED
+    assert summary["to_classify"] == 2
+    (written,) = writes
+    ids, final_status = started[0]
+    assert written["2024-03-05"][0]["id"] in ids
+    assert final_status == spending_import.FAILED
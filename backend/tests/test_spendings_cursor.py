@@ -0,0 +1,33 @@
+"""GET /api/spendings keyset 커서 토큰 테스트"""
+import base64
+import json
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from routers.spendings import _decode_cursor, _encode_cursor
+
+
+def test_cursor_round_trip():
+    oid = ObjectId()
+    token = _encode_cursor({"spent_at": "2024-03-05", "_id": oid})
+    assert "=" not in token
+    assert _decode_cursor(token) == {
+        "$or": [{"spent_at": {"$gt": "2024-03-05"}}, {"spent_at": "2024-03-05", "_id": {"$gt": oid}}]
+    }
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        "not-base64!!",
+        base64.urlsafe_b64encode(b"not json").decode(),
+        base64.urlsafe_b64encode(json.dumps({"s": "2024-03-05"}).encode()).decode(),
+        base64.urlsafe_b64encode(json.dumps({"s": "2024-03-05", "i": "bad"}).encode()).decode(),
+    ],
+)
+def test_decode_cursor_rejects_bad_tokens(token):
+    with pytest.raises(HTTPException) as exc:
+        _decode_cursor(token)
+    assert exc.value.status_code == 400
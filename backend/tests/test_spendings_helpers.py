@@ -0,0 +1,81 @@
+"""routers/spendings 순수 헬퍼 테스트"""
+from bson import ObjectId
+
+from routers.spendings import (
+    _content_changed,
+    _item_signature,
+    _match_existing,
+    _reused_item,
+)
+from schemas import SpendingItemInput
+
+
+def _input(memo, amount, id=None):
+    return SpendingItemInput(memo=memo, amount=amount, id=id)
+
+
+COFFEE = {"id": "c1", "memo": "커피", "amount": 4500, "category": "식비", "tags": ["즐거움"], "confidence": 0.9}
+LUNCH = {"id": "l1", "memo": "점심", "amount": 9000, "category": "식비", "tags": ["필수"]}
+PENDING_TAXI = {"id": "t1", "memo": "택시", "amount": 12000, "status": "pending"}
+
+
+def test_match_existing_prefers_id_then_exact_then_similar():
+    items = [_input("점심 식사", 9000, id="l1"), _input("커피", 4500), _input("택시", 15000)]
+    assert _match_existing(items, [COFFEE, LUNCH, PENDING_TAXI]) == [LUNCH, COFFEE, None]
+
+
+def test_match_existing_pairs_each_existing_item_once():
+    items = [_input("커피", 4500), _input("커피", 4500)]
+    assert _match_existing(items, [COFFEE]) == [COFFEE, None]
+
+
+def test_match_existing_similar_memo_in_same_amount_bucket():
+    items = [_input(" 커피!", 5000)]
+    assert _match_existing(items, [COFFEE]) == [COFFEE]
+    # 금액 자릿수가 바뀌면 짝짓지 않음
+    assert _match_existing([_input("커피", 45000)], [COFFEE]) == [None]
+
+
+def test_reused_item_exact_keeps_previous_item():
+    assert _reused_item(_input("커피", 4500), COFFEE) == COFFEE
+    assert _reused_item(_input("택시", 12000), PENDING_TAXI) == PENDING_TAXI
+
+
+def test_reused_item_amount_change_reuses_classification():
+    item = _reused_item(_input("커피", 5500), COFFEE)
+    assert item["id"] == "c1" and item["amount"] == 5500
+    assert (item["category"], item["tags"], item["confidence"]) == ("식비", ["즐거움"], 0.9)
+
+
+def test_reused_item_needs_reclassification():
+    assert _reused_item(_input("커피", 4500), None) is None
+    assert _reused_item(_input("녹차", 4500), COFFEE) is None
+    assert _reused_item(_input("택시", 13000), PENDING_TAXI) is None
+    assert _reused_item(_input("커피", 4500), {**COFFEE, "status": "failed"}) is None
+
+
+def test_reused_item_classifies_items_saved_without_analysis():
+    # analyze=False로 저장된 항목 (category 없음, pending 아님)
+    unclassified = {"id": "u1", "memo": "커피", "amount": 4500, "tags": []}
+    assert _reused_item(_input("커피", 4500), unclassified) is None
+
+
+def test_reused_item_assigns_id_to_legacy_items():
+    legacy = {k: v for k, v in COFFEE.items() if k != "id"}
+    assert ObjectId.is_valid(_reused_item(_input("커피", 4500), legacy)["id"])
+
+
+def test_content_changed_mixed_none_and_str_does_not_crash():
+    # 같은 날 같은 memo/amount: 하나는 pending(category None), 하나는 분류 완료
+    pending = {"memo": "커피", "amount": 4500, "status": "pending"}
+    analyzed = {"memo": "커피", "amount": 4500, "category": "카페", "tags": ["커피"]}
+    old = _item_signature([pending, analyzed])
+    assert _content_changed(_item_signature([analyzed, pending]), old) is False
+    assert _content_changed(_item_signature([analyzed, analyzed]), old) is True
+
+
+def test_content_changed_ignores_order_but_counts_duplicates():
+    a = {"memo": "점심", "amount": 9000, "category": "식비"}
+    b = {"memo": "택시", "amount": 12000, "category": "교통"}
+    assert _content_changed(_item_signature([a, b]), _item_signature([b, a])) is False
+    assert _content_changed(_item_signature([a, a, b]), _item_signature([a, b, b])) is True
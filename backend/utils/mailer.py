@@ -5,39 +5,31 @@
 - SENDER_EMAIL: 발신자 이메일 주소 (SendGrid에 인증된 주소)
 
 스케줄러(`backend/scheduler/send_daily_reminders.py`)에서 import해서 사용한다.
+
+HTML 템플릿은 모듈 로드 시 한 번만 만들고, 수신자 이름은 SendGrid
+personalization의 substitutions(-name-)로 채운다. 요청 한 번에 최대
+MAIL_BATCH_SIZE(1000)명까지 보낼 수 있다 (수신자끼리는 서로 보이지 않음).
 """
 from __future__ import annotations
 
+import html
 import os
-import requests
+from typing import Dict, List, Tuple
+
+import http_client
 
 
 SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
 SENDER_EMAIL = os.getenv("SENDER_EMAIL")
+SENDGRID_URL = "https://api.sendgrid.com/v3/mail/send"
+# SendGrid 요청 하나당 personalizations 최대 개수
+MAIL_BATCH_SIZE = 1000
 
+SUBJECT = "💸 SpendWallet - 오늘 소비 기록, 1분이면 끝나요!"
+NAME_TAG = "-name-"
 
-def send_reminder_email(to_email: str, name: str) -> None:
-    """SendGrid로 하루 소비 기록 알림 메일 전송 (HTML 템플릿)
-
-    본문 멘트는 다음 내용을 기반으로 한다:
-
-    안녕하세요, {name}님 👋
-
-    오늘 하루 소비를 아직 기록하지 않으셨다면
-    지금 SpendWallet에서 하루를 마무리해보세요!
-
-    작은 기록이 모여 더 똑똑한 소비로 이어집니다 💪
-    (이 메일은 매일 저녁 9시에 자동 발송됩니다)
-    """
-
-    if not SENDGRID_API_KEY or not SENDER_EMAIL:
-        print("[메일 전송 건너뜀] SENDGRID_API_KEY 또는 SENDER_EMAIL 미설정")
-        return
-
-    safe_name = name or "사용자"
-
-    # HTML 템플릿 (Gmail/SendGrid 친화적인 간단한 브랜드 메일)
-    html_template = """<!DOCTYPE html>
+# HTML 템플릿 (Gmail/SendGrid 친화적인 간단한 브랜드 메일)
+HTML_TEMPLATE = """<!DOCTYPE html>
 <html lang=\"ko\">
 <head>
   <meta charset=\"UTF-8\">
@@ -100,7 +92,7 @@ def send_reminder_email(to_email: str, name: str) -> None:
   <div class=\"container\">
     <div class=\"header\">SpendWallet 💸</div>
     <div class=\"content\">
-      <p>안녕하세요, <strong>{name}</strong>님 👋</p>
+      <p>안녕하세요, <strong>-name-</strong>님 👋</p>
       <p>
         오늘 하루 소비를 아직 기록하지 않으셨다면<br/>
         지금 SpendWallet에서 하루를 마무리해보세요!
@@ -120,31 +112,65 @@ def send_reminder_email(to_email: str, name: str) -> None:
 </html>
 """
 
-    html_content = html_template.replace("{name}", safe_name)
+
+def _personalization(to_email: str, name: str) -> Dict:
+    safe_name = html.escape(name or "사용자")
+    return {"to": [{"email": to_email}], "substitutions": {NAME_TAG: safe_name}}
+
+
+async def send_reminder_batch(recipients: List[Tuple[str, str]]) -> bool:
+    """여러 명에게 리마인더 메일을 SendGrid 요청 한 번으로 전송
+
+    recipients: [(email, 이름)] (최대 MAIL_BATCH_SIZE)
+    성공(200/202) 여부를 반환한다.
+    """
+    if not SENDGRID_API_KEY or not SENDER_EMAIL:
+        print("[메일 전송 건너뜀] SENDGRID_API_KEY 또는 SENDER_EMAIL 미설정")
+        return False
+    if not recipients:
+        return True
+    if len(recipients) > MAIL_BATCH_SIZE:
+        raise ValueError(f"too many recipients: {len(recipients)} > {MAIL_BATCH_SIZE}")
 
     data = {
-        "personalizations": [{"to": [{"email": to_email}]}],
+        "personalizations": [_personalization(email, name) for email, name in recipients],
         "from": {"email": SENDER_EMAIL, "name": "SpendWallet"},
-        "subject": "💸 SpendWallet - 오늘 소비 기록, 1분이면 끝나요!",
-        "content": [{"type": "text/html", "value": html_content}],
+        "subject": SUBJECT,
+        "content": [{"type": "text/html", "value": HTML_TEMPLATE}],
     }
 
     try:
-        res = requests.post(
-            "https://api.sendgrid.com/v3/mail/send",
+        res = await http_client.post(
+            "sendgrid",
+            SENDGRID_URL,
             headers={
                 "Authorization": f"Bearer {SENDGRID_API_KEY}",
                 "Content-Type": "application/json",
             },
             json=data,
-            timeout=10,
         )
     except Exception as e:  # pragma: no cover - 네트워크 환경 의존
-        print(f"[메일 전송 실패] {to_email}: {e}")
-        return
+        print(f"[메일 전송 실패] {len(recipients)}명: {e}")
+        return False
 
     if res.status_code not in (200, 202):
-        print(f"[메일 전송 실패] {to_email}: {res.status_code} {res.text}")
-    else:
-        print(f"[메일 전송 성공] {to_email}")
+        print(f"[메일 전송 실패] {len(recipients)}명: {res.status_code} {res.text}")
+        return False
+    print(f"[메일 전송 성공] {len(recipients)}명")
+    return True
+
 
+async def send_reminder_email(to_email: str, name: str) -> None:
+    """SendGrid로 하루 소비 기록 알림 메일 전송 (HTML 템플릿)
+
+    본문 멘트는 다음 내용을 기반으로 한다:
+
+    안녕하세요, {name}님 👋
+
+    오늘 하루 소비를 아직 기록하지 않으셨다면
+    지금 SpendWallet에서 하루를 마무리해보세요!
+
+    작은 기록이 모여 더 똑똑한 소비로 이어집니다 💪
+    (이 메일은 매일 저녁 9시에 자동 발송됩니다)
+    """
+    await send_reminder_batch([(to_email, name)])